@@ -1,72 +1,44 @@
-import os
 import argparse 
-import json
+import os
 import uuid
-from urllib.parse import urlparse
 from typing import *
 from indexer.trees.avl_tree import AVLTreeIndex
 from indexer.trees.bst_index import BinarySearchTreeIndex
 from indexer.maps.hash_map import HashMapIndex
 from indexer.arrays.array import SortedArrayIndex
+from indexer.trees.radix_tree import RadixTreeIndex
+from indexer.trees.bplus_tree import BPlusTreeIndex
+from indexer.trees.array_avl_tree import ArrayAVLTreeIndex
+from indexer.segments.segmented_index import SegmentedIndex
+from indexer.shards.sharded_index import ShardedIndex
 from indexer.util.timer import timer
 from indexer.abstract_index import AbstractIndex
 from utils.exp2csv import log_timing_data
 from utils.expsets import generate_experiment_datasets
 from indexer.util.pickle_utils import save_index_to_pickle, load_index_from_pickle
+from indexer.postings.posting_list import PostingList
+from indexer.postings.compressed import CompressedPostingList
+from indexer.postings.positional import PositionalPostingList
+from indexer.postings.frequency import FrequencyPostingList
+from indexer.query.cache import CachedIndex, QueryCache
+from indexer.util.corpus import tokenize, process_file, index_files, index_files_parallel
+from indexer.util.manifest import Manifest, manifest_path, index_files_incremental
+from indexer.util.binary_index import MmapIndex, save_binary_index, is_binary_index
+from indexer.util.lazy_index import LazyIndex
 
 
-# turns a string into list of tokens
-# will be used to turn title & author names into processed text
-def tokenize(text: str): #-> List[str]:
-    if not text: 
-        return [] # gives us an empty list if no text is provided
-    text = text.lower() # converts the text to lowercase
-    tokens = text.split() # splits the text by whitespace so each word is a token
-    cleaned_tokens = [''.join(char for char in token if char.isalnum()) for token in tokens] # keeps only alphanumeric characters from each token
-    return [token for token in cleaned_tokens if token] # filters out empty tokens (which could happen if there were non-alphanumeric-only inputs)
-
-# parses a json file
-def process_file(json_data: Dict[str, Any]) -> Dict[str, Any]:
-    title = json_data.get("title")
-    full_url = json_data.get("url")
-    if full_url:
-        domain_url = urlparse(full_url).netloc # source: ChatGPT, this made it easier to get the domain by identifying the network location
-    author = json_data.get("author")
-    preprocessed_text = json_data.get("preprocessed_text")
-    # tokenize title and add to preprocessed_text
-    title_tokens = tokenize(title)
-    preprocessed_text.extend(title_tokens)
-    # tokenize author last name (if present) and add to preprocessed_text
-    if author:
-        author_tokens = tokenize(author)
-        preprocessed_text.extend(author_tokens)
-        
-    return {
-        "title": title,
-        "url": domain_url,
-        "author": author,
-        "preprocessed_text": preprocessed_text
-    }
-
-# crawls through files in the path, extracts metadata, and indexes them into the particular index structure
-def index_files(path: str, index: AbstractIndex) -> None:
-    if path is not None:
-        print(f"path = {path}") # as long as the directory actually exists this should print, just a sanity check
+# menu number -> (name used when logging the timings, index class)
+INDEX_CHOICES = {
+    "1": ("BST", BinarySearchTreeIndex),
+    "2": ("AVL", AVLTreeIndex),
+    "3": ("Hash", HashMapIndex),
+    "4": ("Array", SortedArrayIndex),
+    "5": ("Radix", RadixTreeIndex),
+    "6": ("BPlus", BPlusTreeIndex),
+    "7": ("ArrayAVL", ArrayAVLTreeIndex),
+    "8": ("Segmented", SegmentedIndex),
+}
 
-    for root, subs, files in os.walk(path): # recursively go through the directory 
-        for file in files: 
-            if file.endswith('.json'):  # only for the .json files just in case, also just sanity check
-                file_path = os.path.join(root, file) # does: /top_folder/wtv_sub_folder(s) += /filename.json
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    try:
-                        json_data = json.load(f) # reads json file
-                        metadata = process_file(json_data) # parses into python dictionary with relevant info
-                        for word in set(metadata["preprocessed_text"]): # only indexes the unique words just for convenience
-                            index.insert(word, file) # insert the k,v into the index structure
-                    except json.JSONDecodeError: # source: ChatGPT for if the json couldn't be read for troubleshooting
-                        print(f"Error decoding JSON in file: {file_path}")
-                        
-                       
 def timed_search(index, word):
     # just here so we can time the search for each word 
     @timer
@@ -76,6 +48,15 @@ def timed_search(index, word):
     result, time_ns = search_word()  # gets both result and execution time
     return result, time_ns  
 
+def timed_search_all(index, words):
+    # times a multi-word (AND) query: the lookups plus the intersection of their doc lists
+    @timer
+    def search_words():
+        return index.search_all(words)
+
+    result, time_ns = search_words()
+    return result, time_ns
+
 def search(index, search_set):
     valid_kvs = {}
     search_times = [] 
@@ -86,18 +67,10 @@ def search(index, search_set):
             split_words = word.split()
             word_count = len(split_words)  
     
-            if word_count == 3:
-                r1, time_ns_1 = timed_search(index, split_words[0])
-                r2, time_ns_2 = timed_search(index, split_words[1])
-                r3, time_ns_3 = timed_search(index, split_words[2])
-                result = list(set(r1) & set(r2) & set(r3))  # finds common docs
-                search_times.append(time_ns_1 + time_ns_2 + time_ns_3)
-    
-            elif word_count == 2:
-                r1, time_ns_1 = timed_search(index, split_words[0])
-                r2, time_ns_2 = timed_search(index, split_words[1])
-                result = list(set(r1) & set(r2))  # find common docs
-                search_times.append(time_ns_1 + time_ns_2)
+            if word_count > 1:
+                # any number of words: rarest doc list first, stops early if a word isn't indexed
+                result, time_ns = timed_search_all(index, split_words)
+                search_times.append(time_ns)
     
             else:  # single-word case
                 result, time_ns = timed_search(index, word)  
@@ -135,33 +108,109 @@ def main():
         help="Load the index from the pickle file instead of creating a new one."
     ) # when referring to/running experiments for an index structure that is already constructed we can do python assign_01.py --load -p index.pkl
     
+    parser.add_argument(
+        '-w', '--workers', 
+        type=int, 
+        default=1,
+        help="Number of worker processes used to parse the dataset (1 = single process)."
+    ) # python assign_01.py -d path -w 8 spreads parsing and tokenizing across 8 processes
+    
+    parser.add_argument(
+        '--compress', 
+        action='store_true', 
+        help="Store posting lists as delta + variable-byte encoded doc ids."
+    ) # python assign_01.py -d path --compress builds the index with compressed posting lists
+    
+    parser.add_argument(
+        '--positional', 
+        action='store_true', 
+        help="Also store the token offsets of every posting so phrase and NEAR queries can run."
+    ) # python assign_01.py -d path --positional builds a positional index (takes priority over --compress)
+    
+    parser.add_argument(
+        '--ranked', 
+        action='store_true', 
+        help="Also store term frequencies so results can be ranked with BM25."
+    ) # python assign_01.py -d path --ranked (a --positional index can be ranked too)
+    
+    parser.add_argument(
+        '--cache', 
+        type=int, 
+        default=0,
+        help="Cache up to this many query results in front of the index (0 = no cache)."
+    ) # python assign_01.py --load -p index.pkl --cache 50000 runs the experiments through an LRU query cache
+    
+    parser.add_argument(
+        '--incremental', 
+        action='store_true', 
+        help="Keep a manifest of the indexed files next to the pickle and only parse new or changed files on later runs."
+    ) # python assign_01.py -d path -p index.pkl --incremental builds index.pkl the first time and updates it afterwards
+    
+    parser.add_argument(
+        '--binary', 
+        action='store_true', 
+        help="Save the index in the memory-mapped binary format instead of as a pickle."
+    ) # python assign_01.py -d path -p index.idx --binary; --load -p index.idx then opens it without unpickling anything
+    
+    parser.add_argument(
+        '--lazy', 
+        type=int, 
+        default=0,
+        help="Open a binary index lazily: load only the term dictionary and keep up to this many terms' postings in memory (0 = memory-map it instead)."
+    ) # python assign_01.py --load -p index.idx --lazy 20000 reads postings from the file the first time they're searched
+    
+    parser.add_argument(
+        '--shards', 
+        type=int, 
+        default=1,
+        help="Split the terms over this many shards of the selected index type, each in its own worker process (1 = no sharding)."
+    ) # python assign_01.py -d path --shards 4 builds 4 shards in parallel and fans queries out to them
+    
     # saves info passed into terminal run command
     args = parser.parse_args()
     
+    if args.incremental and not (args.dataset and args.pickle):
+        parser.error("--incremental requires both --dataset and --pickle.")
+    if args.incremental and args.binary:
+        parser.error("--incremental updates a pickled index, a binary index is read-only.")
+    # an incremental run loads the saved index if there is one and only builds from scratch the first time
+    load = args.load or (args.incremental and os.path.exists(args.pickle))
+    
     # loads whichever index file is specified if --load command is used 
-    if args.load:
+    if load:
         if args.pickle:
-            index = load_index_from_pickle(args.pickle)
+            if is_binary_index(args.pickle) and args.lazy > 0:
+                index = LazyIndex(args.pickle, max_terms=args.lazy) # only the term dictionary is read, postings are cached as they're searched
+            elif is_binary_index(args.pickle):
+                index = MmapIndex(args.pickle) # only the header and document names are read, postings are read as they're searched
+            else:
+                index = load_index_from_pickle(args.pickle)
             print("Select the indexing structure you loaded:")
             print("1 - Binary Search Tree (BST)")
             print("2 - AVL Tree")
             print("3 - Hash Table")
             print("4 - Array")
+            print("5 - Radix Tree")
+            print("6 - B+ Tree")
+            print("7 - AVL Tree (array-backed)")
+            print("8 - Segmented (LSM)")
             choice = input("Enter the number corresponding to your choice: ").strip()
         
             # just for record-keeping purposes
-            if choice == "1":
-                choice = "BST"
-            elif choice == "2":
-                choice = "AVL"
-            elif choice == "3":
-                choice = "Hash"
-            elif choice == "4":
-               choice = "Array"
+            if choice in INDEX_CHOICES:
+                choice = INDEX_CHOICES[choice][0]
             else:
                 print("Invalid choice.")
+        
+            # applies whatever changed in the dataset since the index was saved, then saves it again
+            if args.incremental:
+                manifest = Manifest.load(manifest_path(args.pickle))
+                index_files_incremental(args.dataset, index, manifest, workers=args.workers)
+                save_index_to_pickle(index, args.pickle)
+                manifest.save(manifest_path(args.pickle))
         else:
             print("Error: --load requires a --pickle argument.")
+            return
     else:
        # asks which index structure the user wants to construct if they don't choose to load a pickle file
         print("Select an indexing structure:")
@@ -169,40 +218,59 @@ def main():
         print("2 - AVL Tree")
         print("3 - Hash Table")
         print("4 - Array")
+        print("5 - Radix Tree")
+        print("6 - B+ Tree")
+        print("7 - AVL Tree (array-backed)")
+        print("8 - Segmented (LSM)")
         choice = input("Enter the number corresponding to your choice: ").strip()
     
         # construct the selected index
-        if choice == "1":
-            choice = "BST"
-            index = BinarySearchTreeIndex()
-        elif choice == "2":
-            choice = "AVL"
-            index = AVLTreeIndex()
-        elif choice == "3":
-            choice = "Hash"
-            index = HashMapIndex()
-        elif choice == "4":
-           choice = "Array"
-           index = SortedArrayIndex()
-        else:
+        posting_type = PostingList
+        if args.positional:
+            posting_type = PositionalPostingList
+        elif args.ranked:
+            posting_type = FrequencyPostingList
+        elif args.compress:
+            posting_type = CompressedPostingList
+        if choice not in INDEX_CHOICES:
             print("Invalid choice.")
+            return
+        choice, index_class = INDEX_CHOICES[choice]
+        if args.shards > 1:
+            # the selected structure becomes the type of every shard, only the shards are created
+            index = ShardedIndex(num_shards=args.shards, index_type=index_class, posting_type=posting_type)
+        else:
+            index = index_class(posting_type=posting_type)
     
         # constructs whichever index structure is indicated
-        if args.dataset:
-            index_files(args.dataset, index)
+        manifest = None
+        if args.dataset and args.incremental:
+            manifest = Manifest()
+            index_files_incremental(args.dataset, index, manifest, workers=args.workers) # everything is new on the first run
+        elif args.dataset:
+            if args.workers and args.workers > 1:
+                index_files_parallel(args.dataset, index, workers=args.workers)
+            else:
+                index_files(args.dataset, index)
         else:
             print("Error: --dataset argument is required for indexing.")
     
         # saves new index structure to a pickle file with whatever name was provided in the terminal
-        if args.pickle:
+        if args.pickle and args.binary:
+            save_binary_index(index, args.pickle)
+        elif args.pickle:
             save_index_to_pickle(index, args.pickle)
+        if manifest is not None:
+            manifest.save(manifest_path(args.pickle))
 
     # As a gut check, we are printing the keys that were added to the
     # index in order
     print(index.get_keys_in_order())
     tokens = len(index.get_keys_in_order())
     
-
+    # the cache wraps the index after it is built/saved so only the searches go through it
+    if args.cache > 0:
+        index = CachedIndex(index, QueryCache(max_entries=args.cache))
     
     for i in range(5): 
         datasets, n = generate_experiment_datasets(index)
@@ -218,6 +286,8 @@ def main():
                 search_set = dataset
             )
 
+    if args.cache > 0:
+        print(f"Query cache: {index.cache.stats()}")
        
 
 if __name__ == "__main__":
@@ -1,14 +1,64 @@
-from typing import List, Optional, Any, Generator
+from typing import List, Dict, Optional, Any, Generator, Iterable, Iterator, Tuple
 from abc import ABC, abstractmethod
 
 from indexer.trees.bst_node import BSTNode
+from indexer.postings.document_dictionary import DocumentDictionary
+from indexer.postings.posting_list import PostingList
+from indexer.postings.frequency import FrequencyPostingList
+from indexer.postings.positional import PositionalPostingList
+from indexer.postings.intersect import intersect
+
+
+def prefix_end(prefix: str) -> Optional[str]:
+    """
+    Returns the smallest string greater than every string that starts with prefix, so
+    the keys with that prefix are exactly the keys in [prefix, prefix_end(prefix)).
+
+    Args:
+        prefix (str): The prefix.
+    Returns:
+        Optional[str]: The exclusive upper bound, or None if there is none (every key from prefix on matches).
+    """
+    prefix = prefix.rstrip(chr(0x10FFFF)) # the largest character can't be bumped, the one before it is
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def document_postings(doc_id: int, words: List[str], positional: bool = False, frequencies: bool = False) -> Dict[str, Any]:
+    """
+    Builds the value each distinct word of one document is indexed with: the bare doc
+    id, a (doc id, token offsets) pair for positional posting lists, or a (doc id, term
+    frequency) pair for frequency posting lists.
+
+    Args:
+        doc_id (int): The id of the document.
+        words (List[str]): The document's tokens, in order.
+        positional (bool): Build (doc id, token offsets) pairs.
+        frequencies (bool): Build (doc id, term frequency) pairs.
+    Returns:
+        Dict[str, Any]: word -> value, in order of first occurrence.
+    """
+    if positional:
+        offsets: Dict[str, List[int]] = {}
+        for position, word in enumerate(words):
+            offsets.setdefault(word, []).append(position)
+        return {word: (doc_id, positions) for word, positions in offsets.items()}
+    if frequencies:
+        counts: Dict[str, int] = {}
+        for word in words:
+            counts[word] = counts.get(word, 0) + 1
+        return {word: (doc_id, tf) for word, tf in counts.items()}
+    return dict.fromkeys(words, doc_id)
 
 
 class AbstractIndex(ABC):
-    def __init__(self):
+    def __init__(self, posting_type: type = PostingList):
        self.values: List[Any] = []
        self.left: Optional['BSTNode'] = None
        self.right: Optional['BSTNode'] = None
+       self.documents: DocumentDictionary = DocumentDictionary() # filename <-> integer doc id, ids are what the postings store
+       self.posting_type: type = posting_type # PostingList, or CompressedPostingList for delta + variable-byte encoded postings
 
 
     @abstractmethod
@@ -24,3 +74,180 @@ class AbstractIndex(ABC):
     def __iter__(self) -> Generator[Any, None, None]:
         yield from self._inorder_traversal_generator(self.root)
 
+    def _new_postings(self) -> PostingList:
+        """
+        Creates an empty posting list (of the index's posting_type) for a newly indexed key.
+        """
+        return self.posting_type()
+
+    def search_many(self, keys: Iterable[Any]) -> List[Any]:
+        """
+        Looks up a batch of keys. Indexes override this to resolve the whole batch in
+        one pass over their structure; this fallback calls search once per key.
+
+        Args:
+            keys (Iterable[Any]): The keys to search for.
+        Returns:
+            List[Any]: The result search() would give for each key, in the same order.
+        """
+        return [self.search(key) for key in keys]
+
+    def range(self, lo: Optional[Any] = None, hi: Optional[Any] = None) -> Iterator[Tuple[Any, Any]]:
+        """
+        Lazily yields the (key, postings) pairs with lo <= key < hi in ascending key
+        order. Only indexes that keep their keys sorted can do this; they override it.
+
+        Args:
+            lo (Optional[Any]): The first key to include (None starts at the smallest key).
+            hi (Optional[Any]): The key to stop before (None runs to the largest key).
+        Returns:
+            Iterator[Tuple[Any, Any]]: The matching (key, postings) pairs.
+        Raises:
+            NotImplementedError: If the index doesn't keep its keys in order.
+        """
+        raise NotImplementedError(f"{type(self).__name__} doesn't keep its keys in order")
+
+    def range_keys(self, lo: Optional[Any] = None, hi: Optional[Any] = None) -> Iterator[Any]:
+        """
+        Lazily yields the keys with lo <= key < hi in ascending order, like range() without
+        the postings. Indexes that have to fetch postings from elsewhere override it.
+
+        Args:
+            lo (Optional[Any]): The first key to include (None starts at the smallest key).
+            hi (Optional[Any]): The key to stop before (None runs to the largest key).
+        Returns:
+            Iterator[Any]: The matching keys.
+        Raises:
+            NotImplementedError: If the index doesn't keep its keys in order.
+        """
+        return (key for key, postings in self.range(lo, hi))
+
+    def prefix(self, prefix: str) -> Iterator[Tuple[Any, Any]]:
+        """
+        Lazily yields the (key, postings) pairs whose key starts with prefix, in
+        ascending key order (a query like `north*`).
+
+        Args:
+            prefix (str): The prefix to match.
+        Returns:
+            Iterator[Tuple[Any, Any]]: The matching (key, postings) pairs.
+        """
+        return self.range(prefix, prefix_end(prefix))
+
+    def search_all(self, keys: Iterable[Any]) -> List[Any]:
+        """
+        Returns the values (doc ids) shared by every key, i.e. an AND query. Stops
+        looking keys up as soon as one is missing, then intersects the posting lists
+        rarest first.
+
+        Args:
+            keys (Iterable[Any]): The keys to search for.
+        Returns:
+            List[Any]: The doc ids found under every key, in ascending order.
+        """
+        postings_lists = []
+        for key in dict.fromkeys(keys): # drops repeated words but keeps their order
+            postings = self.search(key)
+            if not postings:
+                return []
+            postings_lists.append(postings)
+        return intersect(postings_lists)
+
+    def delete(self, key: Any, value: Any) -> bool:
+        """
+        Removes value (a doc id) from the posting list of key, and removes key itself
+        once its posting list is empty. Every index overrides this.
+
+        Args:
+            key (Any): The key (word).
+            value (Any): The value (doc id) to remove.
+        Returns:
+            bool: True if value was indexed under key.
+        """
+        raise NotImplementedError(f"{type(self).__name__} doesn't support deletion")
+
+    def add_document(self, name: str, terms: Iterable[str]) -> int:
+        """
+        Indexes one document under its words, recording its length and its words in the
+        document dictionary (so it can be removed later).
+
+        Args:
+            name (str): The document name.
+            terms (Iterable[str]): The document's tokens, in order.
+        Returns:
+            int: The id of the document.
+        """
+        terms = list(terms)
+        doc_id = self.documents.add(name)
+        self.documents.set_length(doc_id, len(terms))
+        self.documents.record_terms(doc_id, terms)
+        # positions or term frequencies too, if the posting lists keep them (like add_to_partial does for ingestion)
+        values = document_postings(doc_id, terms, issubclass(self.posting_type, PositionalPostingList),
+                                   issubclass(self.posting_type, FrequencyPostingList))
+        for term, value in values.items():
+            self.insert(term, value)
+        return doc_id
+
+    def _document_id(self, doc: Any) -> Optional[int]:
+        """
+        Returns the id of a document given by name or id, or None if it was already removed.
+
+        Raises:
+            ValueError: If there is no such document.
+        """
+        doc_id = self.documents.find(doc)
+        if doc_id is None:
+            raise ValueError(f"unknown document: {doc!r}")
+        return None if self.documents.is_removed(doc_id) else doc_id
+
+    def remove_document(self, doc: Any) -> int:
+        """
+        Removes a document from every posting list it is in. The words come from the
+        document dictionary's forward index, so only those posting lists are touched.
+
+        Args:
+            doc (Any): The doc id, or the document name.
+        Returns:
+            int: The number of posting lists the document was removed from (0 if it was already removed).
+        Raises:
+            ValueError: If there is no such document.
+        """
+        doc_id = self._document_id(doc)
+        if doc_id is None:
+            return 0
+        removed = 0
+        for term in self.documents.terms_of(doc_id):
+            if self.delete(term, doc_id):
+                removed += 1
+        self.documents.remove(doc_id)
+        return removed
+
+    def update_document(self, name: str, terms: Iterable[str]) -> int:
+        """
+        Replaces a document's contents: its old postings are removed and it is indexed
+        again under the new words, keeping its id.
+
+        Args:
+            name (str): The document name.
+            terms (Iterable[str]): The document's new tokens, in order.
+        Returns:
+            int: The id of the document.
+        """
+        if name in self.documents:
+            self.remove_document(name)
+        return self.add_document(name, terms)
+
+    def bulk_load(self, items: Iterable[Tuple[Any, Iterable[Any]]]) -> None:
+        """
+        Loads a stream of (key, values) pairs sorted by key. Indexes override this to
+        build their structure directly from the sorted run; this fallback simply
+        inserts every value one at a time.
+
+        Args:
+            items (Iterable[Tuple[Any, Iterable[Any]]]): (key, values) pairs in ascending key order.
+        Returns:
+            None
+        """
+        for key, values in items:
+            for value in values:
+                self.insert(key, value)
@@ -1,4 +1,6 @@
 from indexer.abstract_index import AbstractIndex
+from indexer.postings.posting_list import PostingList
+from indexer.postings.intersect import gallop
 import bisect
 
 class SortedArrayIndex(AbstractIndex):
@@ -7,8 +9,9 @@ class SortedArrayIndex(AbstractIndex):
     Stores words in a sorted array and maintains a list of associated documents.
     """
     
-    def __init__(self):
-        self._array = []        # [(word, [doc_ids])]
+    def __init__(self, posting_type=PostingList):
+        super().__init__(posting_type)
+        self._array = []        # [(word, PostingList of doc ids)]
         self._words = []        # just the words (in the same order) so we can do the bisect 
     
     def insert(self, word: str, document: str) -> None:
@@ -17,12 +20,55 @@ class SortedArrayIndex(AbstractIndex):
         
         if idx < len(self._words) and self._words[idx] == word: # idx < len(self._words) used to avoid IndexError
             # if the word already exists add the document to it's docs list
-            if document not in self._array[idx][1]:
-                self._array[idx][1].append(document)
+            self._array[idx][1].add(document) # the posting list ignores docs it already has
         else:
             # adds new word at the correct position alphabetically to words array and to the k,v array
+            postings = self._new_postings()
+            postings.add(document)
             self._words.insert(idx, word)
-            self._array.insert(idx, (word, [document]))
+            self._array.insert(idx, (word, postings))
+    
+    def bulk_load(self, items) -> None:
+        """
+        Loads a stream of (word, docs) pairs sorted by word in a single pass. The stream
+        is merged with whatever is already in the array (like the merge step of merge
+        sort), so no list.insert shifting is needed.
+
+        Raises:
+            ValueError: If the words are not in strictly ascending order.
+        """
+        merged = []
+        existing = self._array
+        i = 0
+        previous = None
+        for word, docs in items:
+            if previous is not None and not previous < word:
+                raise ValueError(f"bulk_load expects strictly ascending keys, got {previous!r} before {word!r}")
+            previous = word
+            while i < len(existing) and existing[i][0] < word: # copy over the existing words that come first
+                merged.append(existing[i])
+                i += 1
+            if i < len(existing) and existing[i][0] == word: # word already indexed so add the new docs to it
+                existing[i][1].merge(docs)
+                merged.append(existing[i])
+                i += 1
+            else:
+                postings = self._new_postings()
+                postings.merge(docs)
+                merged.append((word, postings))
+        merged.extend(existing[i:])
+        self._array = merged
+        self._words = [word for word, docs in merged]
+    
+    def delete(self, word: str, document) -> bool:
+        # removes the document from the word's doc list, and the word from both arrays once its list is empty
+        idx = bisect.bisect_left(self._words, word)
+        if idx == len(self._words) or self._words[idx] != word or not self._array[idx][1].remove(document):
+            return False
+        if not self._array[idx][1]:
+            del self._array[idx]
+            del self._words[idx]
+        return True
     
     def search(self, word: str):
         # uses binary search to find where we expect to find the word alphabetically
@@ -32,6 +78,31 @@ class SortedArrayIndex(AbstractIndex):
             return self._array[idx][1] # if the word is indexed, return it's doc list
         return []
     
+    def search_many(self, words):
+        # sorts the batch and walks a window forward through the array: each search starts where the last one ended
+        # and gallops forward, so the whole batch costs about one pass instead of a full bisect per word
+        words = list(words)
+        found = {}
+        lo = 0
+        for word in sorted(set(words)):
+            lo = gallop(self._words, word, lo)
+            if lo == len(self._words):
+                break
+            if self._words[lo] == word:
+                found[word] = self._array[lo][1]
+        return [found.get(word, []) for word in words]
+    
+    def range(self, lo=None, hi=None):
+        # binary search for the first word >= lo, then walk forward until hi
+        idx = 0 if lo is None else bisect.bisect_left(self._words, lo)
+        array = self._array
+        while idx < len(array):
+            word, docs = array[idx]
+            if hi is not None and word >= hi:
+                return
+            yield word, docs
+            idx += 1
+    
     def __iter__(self):
         for word, docs in self._array:
             yield word
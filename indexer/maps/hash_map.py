@@ -1,70 +1,258 @@
 from indexer.abstract_index import AbstractIndex
-import hashlib
+from indexer.postings.posting_list import PostingList
+from indexer.query.fuzzy import BKTree
+import zlib
+
+MAX_LOAD = 0.7       # grow once more than 70% of the slots are taken
+MIGRATE_STEP = 16    # old slots moved into the new table on every insert while a resize is in progress
+MIN_CAPACITY = 8
+MAX_TOMBSTONES = 0.25 # compact once more than a quarter of the slots are tombstones
+
+
+class _Tombstone:
+    # marks a slot whose key was deleted: lookups have to keep probing past it, inserts can reuse it
+    def __reduce__(self):
+        return "TOMBSTONE" # pickles as a reference to the module-level instance, so `is TOMBSTONE` still holds after loading
+
+    def __repr__(self):
+        return "TOMBSTONE"
+
+TOMBSTONE = _Tombstone()
+
 
 class HashMapIndex(AbstractIndex):
-    
-    def __init__(self, size=500000):
-        super().__init__()
-        # self.hash_map = {} 
-        self.bucket_size = size 
-        self.buckets = [None for _ in range(self.bucket_size)] # used Nones since I wasn't sure if I could generate empty tuples to hold space in the table
-        self.num_occupied = 0 # to keep track of non-None elements of the hash table for resizing purposes
-        
-    def __iter__(self): # how to iterate/traverse through the hash map
+    """
+    Open-addressing hash table implementation of an index.
+    Each slot holds None or a (term, PostingList of doc ids) tuple. Collisions are resolved with
+    triangular (quadratic) probing over a power-of-two table, which visits every slot.
+    When the load factor passes MAX_LOAD the table doubles, but the old slots are moved
+    over a few at a time (MIGRATE_STEP per insert) instead of all at once, so no single
+    insert pays for a full rehash. Until the move is done, lookups check the new table
+    and then the old one.
+
+    Deleting a key leaves a TOMBSTONE in its slot so the probe sequences running through
+    it still work. Inserts reuse tombstones, and once they take up more than
+    MAX_TOMBSTONES of the table it is rebuilt without them.
+
+    Fuzzy lookups can't walk the keys in order, so they use a BK-tree of the keys. It is
+    built by the first bk_tree() call and then kept up to date by insert and delete, so
+    later queries reuse it. It isn't pickled (it is rebuilt when next needed).
+    """
+    _bk_tree = None # BKTree of the keys, once bk_tree() has been called (class default so older pickles load)
+
+    def __init__(self, expected_keys=1024, posting_type=PostingList):
+        super().__init__(posting_type)
+        self.bucket_size = self._capacity_for(expected_keys) # sized from the expected number of unique terms instead of a fixed size
+        self.buckets = [None] * self.bucket_size
+        self.num_occupied = 0 # keys stored in self.buckets
+        self.num_tombstones = 0 # deleted slots in self.buckets
+        self._old_buckets = None # table still being drained by an incremental resize
+        self._migrate_pos = 0 # next slot of _old_buckets to move over
+
+    @staticmethod
+    def _capacity_for(expected_keys):
+        # smallest power of two that holds expected_keys without passing MAX_LOAD
+        capacity = MIN_CAPACITY
+        while capacity * MAX_LOAD < expected_keys:
+            capacity *= 2
+        return capacity
+
+    def _entries(self):
+        # every (term, postings) in the table, including old slots that haven't been moved yet
         for element in self.buckets:
-            for k,v in element:  # each bucket contains (term, [doc_ids])
-                yield k
-                
+            if element is not None and element is not TOMBSTONE:
+                yield element
+        if self._old_buckets is not None:
+            for pos in range(self._migrate_pos, len(self._old_buckets)):
+                element = self._old_buckets[pos]
+                if element is not None and element is not TOMBSTONE:
+                    yield element
+
+    def __iter__(self): # how to iterate/traverse through the hash map
+        for k, v in self._entries():
+            yield k
+
     def __resize__(self): # makes the table bigger if necessary
-        self.buckets.extend([None] * self.bucket_size) # doubles the size of the table 
-        self.bucket_size = len(self.buckets) # updates the size of the table to reflect the doubling
-        
-    def hash_function(self,term):
-        pos_hex = hashlib.sha256(term.encode("utf-8"))
-        pos = int(pos_hex.hexdigest(), 16) % self.bucket_size
-        return pos   
+        if self._old_buckets is not None:
+            self._migrate(len(self._old_buckets)) # finish any resize that is still going before starting another
+        self._old_buckets = self.buckets
+        self._migrate_pos = 0
+        self.bucket_size *= 2 # doubles the size of the table
+        self.buckets = [None] * self.bucket_size
+        self.num_occupied = 0
+        self.num_tombstones = 0
+
+    def _compact(self):
+        # rebuilds the table without tombstones, sized for the keys that are left (it can shrink)
+        if self._old_buckets is not None:
+            self._migrate(len(self._old_buckets))
+        entries = list(self._entries())
+        self.bucket_size = self._capacity_for(len(entries))
+        self.buckets = [None] * self.bucket_size
+        for element in entries:
+            slot, found = self._probe(self.buckets, element[0])
+            self.buckets[slot] = element
+        self.num_occupied = len(entries)
+        self.num_tombstones = 0
+
+    def _migrate(self, steps):
+        # moves up to `steps` slots of the old table into the new one
+        old = self._old_buckets
+        end = min(self._migrate_pos + steps, len(old))
+        for pos in range(self._migrate_pos, end):
+            element = old[pos]
+            if element is not None and element is not TOMBSTONE:
+                slot, found = self._probe(self.buckets, element[0])
+                if self.buckets[slot] is TOMBSTONE:
+                    self.num_tombstones -= 1 # reusing a slot deleted during the resize
+                self.buckets[slot] = element
+                self.num_occupied += 1
+        self._migrate_pos = end
+        if end == len(old):
+            self._old_buckets = None # done, the old table can be freed
+
+    def hash_function(self, term):
+        # CRC-32 is a fast non-cryptographic hash that, unlike hash(), gives the same value in every process (needed for pickling)
+        return zlib.crc32(term.encode("utf-8"))
+
+    def _probe(self, buckets, term):
+        # returns (slot, True) where term is stored, or (first free slot, False) if it isn't in this table
+        return self._probe_from(buckets, term, self.hash_function(term) & (len(buckets) - 1))
+
+    def _probe_from(self, buckets, term, pos):
+        # same as _probe, starting from an already computed home slot. A missing term gets the first tombstone
+        # passed on the way (if any) as its free slot, so deleted slots are reused.
+        mask = len(buckets) - 1
+        i = 0
+        free = None
+        while True:
+            element = buckets[pos]
+            if element is None:
+                return (pos if free is None else free), False
+            if element is TOMBSTONE:
+                if free is None:
+                    free = pos
+            elif element[0] == term:
+                return pos, True
+            i += 1
+            pos = (pos + i) & mask # triangular probing: +1, +2, +3, ... from the home slot
+
+    def _find(self, term):
+        # the (term, postings) entry for term, or None if it isn't indexed
+        pos, found = self._probe(self.buckets, term)
+        if found:
+            return self.buckets[pos]
+        if self._old_buckets is not None:
+            pos, found = self._probe(self._old_buckets, term)
+            if found and pos >= self._migrate_pos: # slots before _migrate_pos were already moved (and may have been deleted since)
+                return self._old_buckets[pos]
+        return None
 
     def insert(self, term, document_id):
-        pos = self.hash_function(term)
-        
-        if self.buckets[pos] is not None and self.buckets[pos][0] == term: #if the word is already in the table, add the file to that word's doc list
-            if document_id not in self.buckets[pos][1]:
-                self.buckets[pos][1].append(document_id) 
+        if self._old_buckets is not None:
+            self._migrate(MIGRATE_STEP) # pay off a little of the pending resize
+
+        pos, found = self._probe(self.buckets, term)
+        if not found and self._old_buckets is not None: # the word might still be waiting in the old table
+            element = self._find(term)
+            if element is not None:
+                element[1].add(document_id)
+                return
+
+        if found: #if the word is already in the table, add the file to that word's doc list
+            self.buckets[pos][1].add(document_id) # the posting list ignores docs it already has
         else:
-           self.buckets[pos] = (term, [document_id]) # if the word isn't indexed already replace the None with (term, [doc_ids]) 
+           postings = self._new_postings()
+           postings.add(document_id)
+           if self.buckets[pos] is TOMBSTONE:
+               self.num_tombstones -= 1 # reusing a deleted slot
+           self.buckets[pos] = (term, postings) # if the word isn't indexed already replace the None with (term, postings)
            self.num_occupied += 1 # update the occupancy counter
-        
-        if self.num_occupied / self.bucket_size > 0.9:
-            self.__resize__() # if the occupancy of the table is over 90%, resize the table
+           if self._bk_tree is not None:
+               self._bk_tree.add(term)
+
+        if self.num_occupied + self.num_tombstones > self.bucket_size * MAX_LOAD: # tombstones make probes longer just like keys
+            self.__resize__() # if the occupancy of the table is over MAX_LOAD, start growing the table
+
+    def bulk_load(self, items):
+        # sizes the table for the whole stream up front so nothing needs to grow while loading
+        items = list(items)
+        if self.count_keys() == 0:
+            self.bucket_size = self._capacity_for(len(items))
+            self.buckets = [None] * self.bucket_size
+            self.num_occupied = 0
+            self.num_tombstones = 0
+            self._old_buckets = None
+        for term, documents in items:
+            for document_id in documents:
+                self.insert(term, document_id)
+
+    def delete(self, term, document_id):
+        # removes document_id from the term's doc list; a term left with no docs is replaced by a tombstone
+        if self._old_buckets is not None:
+            self._migrate(MIGRATE_STEP)
+        buckets = self.buckets
+        pos, found = self._probe(buckets, term)
+        if not found and self._old_buckets is not None:
+            buckets = self._old_buckets
+            pos, found = self._probe(buckets, term)
+            found = found and pos >= self._migrate_pos
+        if not found or not buckets[pos][1].remove(document_id):
+            return False
+        if not buckets[pos][1]:
+            buckets[pos] = TOMBSTONE
+            if self._bk_tree is not None:
+                self._bk_tree.discard(term)
+            if buckets is self.buckets: # the old table is never probed for free slots, so its tombstones aren't counted
+                self.num_occupied -= 1
+                self.num_tombstones += 1
+                if self.num_tombstones > self.bucket_size * MAX_TOMBSTONES:
+                    self._compact()
+        return True
 
     def search(self, term):
-        pos = self.hash_function(term) # the position where we expect to find this word
-        if self.buckets[pos] is not None: # if the word is indexed, return it's doc list
-            k,v = self.buckets[pos]
-            if k == term:
-              return v
+        element = self._find(term) # the slot where we expect to find this word
+        if element is not None: # if the word is indexed, return it's doc list
+            return element[1]
         return None
-    
+
+    def search_many(self, terms):
+        # hashes the whole batch first and probes the slots in table order, so consecutive probes land near each other
+        terms = list(terms)
+        if self._old_buckets is not None: # a resize is half done, look in both tables the normal way
+            return [self.search(term) for term in terms]
+        buckets = self.buckets
+        mask = self.bucket_size - 1
+        found = {}
+        for home, term in sorted((self.hash_function(term) & mask, term) for term in set(terms)):
+            pos, hit = self._probe_from(buckets, term, home)
+            if hit:
+                found[term] = buckets[pos][1]
+        return [found.get(term) for term in terms]
+
+    def bk_tree(self):
+        # the BK-tree of the keys that fuzzy lookups use, built on first use and maintained by insert/delete
+        if self._bk_tree is None:
+            self._bk_tree = BKTree(self)
+        return self._bk_tree
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_bk_tree", None)
+        return state
+
     def get_keys_in_order(self):
-        keys = []
-        for element in self.buckets: 
-            if element is not None:
-                k,v = element 
-                keys.append(k)
-        return sorted(keys)
-    
+        return sorted(self)
+
     def count_keys(self) -> int:
-        return len(self.get_keys_in_order())
-    
+        return sum(1 for _ in self._entries())
+
     def get_avg_value_list_len(self):
         element_lens = []
         list_len_sum = 0
         num_keys = 0
-        for element in self.buckets:
-            if element is not None:
-                element_lens.append(len(element[1]))
-                list_len_sum += len(element[1])
-                num_keys += 1  
-        return (list_len_sum / num_keys), element_lens 
-
-
+        for element in self._entries():
+            element_lens.append(len(element[1]))
+            list_len_sum += len(element[1])
+            num_keys += 1
+        return (list_len_sum / num_keys), element_lens
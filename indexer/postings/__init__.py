@@ -0,0 +1 @@
+# postings module __init__ file
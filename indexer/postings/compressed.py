@@ -0,0 +1,182 @@
+from array import array
+from bisect import insort
+from typing import Any, Iterable, Iterator, List, Tuple
+
+
+def vbyte_encode(value: int, out: bytearray) -> None:
+    """
+    Appends a non-negative integer to out using variable-byte encoding: 7 bits per
+    byte, low bits first, with the high bit set on every byte except the last.
+    Small numbers (like the gaps between neighbouring doc ids) take a single byte.
+
+    Args:
+        value (int): The number to encode.
+        out (bytearray): The buffer to append to.
+    Returns:
+        None
+    """
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def vbyte_decode(data: bytes, pos: int) -> Tuple[int, int]:
+    """
+    Decodes one variable-byte integer starting at data[pos].
+
+    Args:
+        data (bytes): The encoded buffer.
+        pos (int): Where the number starts.
+    Returns:
+        Tuple[int, int]: The decoded number and the position just after it.
+    """
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class CompressedPostingList:
+    """
+    A posting list stored as variable-byte encoded gaps between sorted document ids.
+    Frequent terms have small gaps, so most postings take one byte instead of four.
+    Iterating decodes the ids one at a time, so a search can consume the list without
+    ever building the full list of ids.
+
+    Ids are kept sorted and unique. Adding ids in increasing order (how the corpus is
+    ingested) just appends the next gap; an id smaller than the last one forces the
+    list to be decoded, merged and re-encoded.
+
+    There is no random access without decoding, so the class is marked sequential:
+    intersect walks it front to back instead of decoding it to gallop through.
+
+    Methods:
+        add(doc_id: int) -> None:
+            Adds a document id to the list.
+        merge(doc_ids: Iterable[int]) -> None:
+            Adds many document ids at once.
+        remove(doc_id: int) -> bool:
+            Removes a document id from the list.
+        to_list() -> List[int]:
+            Returns the decoded ids as a list.
+    """
+    sequential = True # ids can only be decoded front to back
+
+    def __init__(self, doc_ids: Iterable[int] = ()):
+        self._data = bytearray()
+        self._count = 0
+        self._last = -1 # last (largest) id, the next gap is measured from it
+        for doc_id in doc_ids:
+            self.add(doc_id)
+
+    def add(self, doc_id: int) -> None:
+        """
+        Adds a document id, keeping the list sorted and free of duplicates.
+
+        Parameters:
+            doc_id (int): The document id.
+
+        Returns:
+            None
+        """
+        if doc_id > self._last:
+            vbyte_encode(doc_id - self._last - 1, self._data) # gaps are at least 1 so store gap - 1
+            self._last = doc_id
+            self._count += 1
+        elif doc_id not in self:
+            doc_ids = self.to_list()
+            insort(doc_ids, doc_id)
+            self._rebuild(doc_ids)
+
+    def merge(self, doc_ids: Iterable[int]) -> None:
+        """
+        Adds many document ids at once, re-encoding the list at most once.
+
+        Parameters:
+            doc_ids (Iterable[int]): The document ids to add.
+
+        Returns:
+            None
+        """
+        incoming = sorted(set(doc_ids))
+        if incoming and incoming[0] <= self._last:
+            self._rebuild(sorted(set(self.to_list()).union(incoming)))
+        else:
+            for doc_id in incoming:
+                self.add(doc_id)
+
+    def remove(self, doc_id: int) -> bool:
+        """
+        Removes a document id. The gaps on both sides of it change, so the list is
+        decoded and re-encoded.
+
+        Parameters:
+            doc_id (int): The document id.
+
+        Returns:
+            bool: True if the id was in the list.
+        """
+        if doc_id not in self:
+            return False
+        self._rebuild([current for current in self if current != doc_id])
+        return True
+
+    def _rebuild(self, doc_ids: List[int]) -> None:
+        self._data = bytearray()
+        self._count = 0
+        self._last = -1
+        for doc_id in doc_ids:
+            self.add(doc_id)
+
+    def as_array(self) -> array:
+        """
+        Decodes the ids into an array (used when a search needs random access).
+        """
+        return array('I', self)
+
+    def to_list(self) -> List[int]:
+        """
+        Returns the document ids as a list.
+        """
+        return list(self)
+
+    def __iter__(self) -> Iterator[int]:
+        data = self._data
+        end = len(data)
+        pos = 0
+        doc_id = -1
+        while pos < end:
+            gap, pos = vbyte_decode(data, pos)
+            doc_id += gap + 1
+            yield doc_id
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i):
+        return self.to_list()[i]
+
+    def __contains__(self, doc_id: Any) -> bool:
+        if doc_id > self._last:
+            return False
+        for current in self:
+            if current >= doc_id:
+                return current == doc_id
+        return False
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, CompressedPostingList):
+            return self._data == other._data
+        try:
+            return self.to_list() == list(other)
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"CompressedPostingList({self.to_list()})"
@@ -0,0 +1,180 @@
+from array import array
+from typing import List, Dict, Iterable, Optional, Set, Tuple, Union
+
+
+class DocumentDictionary:
+    """
+    Maps document names (the JSON filenames) to dense integer ids and back.
+    Indexes store the small integer ids in their posting lists; names are only
+    looked up again when results are shown. It also keeps every document's length
+    (number of tokens), which ranking needs, and the words each document was indexed
+    under (a forward index), so a document can be removed from exactly the posting
+    lists it is in instead of scanning the whole index.
+
+    Removed documents keep their id (so posting lists never need renumbering); adding
+    the same name again brings the id back.
+
+    Methods:
+        add(name: str) -> int:
+            Returns the id for name, assigning the next free id if it is new.
+        get_id(name: str) -> int:
+            Returns the id of an already known name.
+        find(doc: Union[str, int]) -> Optional[int]:
+            Returns the id of a document given by name or id, or None if it is unknown.
+        name_of(doc_id: int) -> str:
+            Returns the name for an id.
+        resolve(doc_ids: Iterable[int]) -> List[str]:
+            Turns a posting list of ids back into document names.
+        set_length(doc_id: int, length: int) -> None:
+            Records the number of tokens in a document.
+        length_of(doc_id: int) -> int:
+            Returns the number of tokens in a document.
+        average_length() -> float:
+            Returns the average document length.
+        record_terms(doc_id: int, terms: Iterable[str]) -> None:
+            Records the words a document was indexed under.
+        terms_of(doc_id: int) -> Tuple[str, ...]:
+            Returns the words a document was indexed under.
+        remove(doc_id: int) -> None:
+            Marks a document as removed.
+        live_ids() -> List[int]:
+            Returns the ids of the documents that haven't been removed.
+        count() -> int:
+            Returns the number of documents that haven't been removed.
+    """
+    def __init__(self):
+        self._names: List[str] = []        # id -> name
+        self._ids: Dict[str, int] = {}     # name -> id
+        self._lengths = array('I')         # id -> number of tokens
+        self._terms: Dict[int, Tuple[str, ...]] = {} # id -> words it was indexed under
+        self._removed: Set[int] = set()
+
+    def add(self, name: str) -> int:
+        """
+        Interns a document name.
+
+        Parameters:
+            name (str): The document name.
+
+        Returns:
+            int: The id of the document (existing names keep their id).
+        """
+        doc_id = self._ids.get(name)
+        if doc_id is None:
+            doc_id = len(self._names)
+            self._names.append(name)
+            self._ids[name] = doc_id
+            self._lengths.append(0)
+        else:
+            self._removed.discard(doc_id) # a removed document being indexed again
+        return doc_id
+
+    def get_id(self, name: str) -> int:
+        """
+        Returns the id of a known document.
+
+        Raises:
+            KeyError: If the document was never added.
+        """
+        return self._ids[name]
+
+    def find(self, doc: Union[str, int]) -> Optional[int]:
+        """
+        Returns the id of a document given by its name or its id (removed documents
+        included), or None if no such document was ever added.
+        """
+        if isinstance(doc, str):
+            return self._ids.get(doc)
+        if isinstance(doc, int) and 0 <= doc < len(self._names):
+            return doc
+        return None
+
+    def name_of(self, doc_id: int) -> str:
+        """
+        Returns the document name for an id.
+        """
+        return self._names[doc_id]
+
+    def resolve(self, doc_ids: Iterable[int]) -> List[str]:
+        """
+        Turns a posting list of ids into document names. Missing results
+        (None) resolve to an empty list.
+        """
+        if doc_ids is None:
+            return []
+        names = self._names
+        return [names[doc_id] for doc_id in doc_ids]
+
+    def set_length(self, doc_id: int, length: int) -> None:
+        """
+        Records the number of tokens in a document.
+        """
+        self._lengths[doc_id] = length
+
+    def length_of(self, doc_id: int) -> int:
+        """
+        Returns the number of tokens in a document (0 if it was never recorded).
+        """
+        return self._lengths[doc_id]
+
+    def average_length(self) -> float:
+        """
+        Returns the average length of the documents that haven't been removed (0 if there are none).
+        """
+        count = self.count()
+        return sum(self._lengths) / count if count else 0.0 # removed documents have length 0
+
+    def min_length(self) -> int:
+        """
+        Returns the length of the shortest document that hasn't been removed (0 if there are none).
+        """
+        if not self._removed:
+            return min(self._lengths) if self._lengths else 0
+        return min((self._lengths[doc_id] for doc_id in self.live_ids()), default=0)
+
+    def record_terms(self, doc_id: int, terms: Iterable[str]) -> None:
+        """
+        Records the words a document was indexed under (repeats are dropped).
+        """
+        self._terms[doc_id] = tuple(dict.fromkeys(terms))
+
+    def terms_of(self, doc_id: int) -> Tuple[str, ...]:
+        """
+        Returns the words a document was indexed under (empty if none were recorded).
+        """
+        return self._terms.get(doc_id, ())
+
+    def remove(self, doc_id: int) -> None:
+        """
+        Marks a document as removed and forgets its words and length. The id and name
+        stay reserved, so adding the name again gives the same id back. Ids that were
+        never handed out, or are already removed, are ignored.
+        """
+        if not 0 <= doc_id < len(self._names) or doc_id in self._removed:
+            return
+        self._terms.pop(doc_id, None)
+        self._lengths[doc_id] = 0
+        self._removed.add(doc_id)
+
+    def is_removed(self, doc_id: int) -> bool:
+        return doc_id in self._removed
+
+    def live_ids(self) -> List[int]:
+        """
+        Returns the ids of the documents that haven't been removed, in ascending order.
+        """
+        if not self._removed:
+            return list(range(len(self._names)))
+        return [doc_id for doc_id in range(len(self._names)) if doc_id not in self._removed]
+
+    def count(self) -> int:
+        """
+        Returns the number of documents that haven't been removed.
+        """
+        return len(self._names) - len(self._removed)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+    def __len__(self) -> int:
+        return len(self._names)
@@ -0,0 +1,78 @@
+from array import array
+from bisect import bisect_left
+from typing import Any, Iterable
+
+from indexer.postings.posting_list import PostingList
+
+
+class FrequencyPostingList(PostingList):
+    """
+    A PostingList that also stores how many times the term occurs in each document
+    (its term frequency), in an array parallel to the doc ids. The largest frequency
+    is tracked as well, which ranking uses to bound how much the term can add to a
+    document's score.
+
+    add() takes either a doc id (frequency 1) or a (doc id, frequency) tuple; adding a
+    document again replaces its frequency.
+
+    Methods:
+        tf_at(i: int) -> int:
+            Returns the term frequency of the i-th document in the list.
+    """
+    def __init__(self, values: Iterable[Any] = ()):
+        self._tfs = array('I')
+        self.max_tf = 0
+        super().__init__(values)
+
+    def add(self, value: Any) -> None:
+        """
+        Adds a document and its term frequency, keeping the list sorted by doc id.
+
+        Parameters:
+            value (Any): A doc id, or a (doc id, frequency) tuple.
+
+        Returns:
+            None
+        """
+        doc_id, tf = value if isinstance(value, tuple) else (value, 1)
+        ids = self._ids
+        if tf > self.max_tf:
+            self.max_tf = tf
+        if not ids or doc_id > ids[-1]:
+            ids.append(doc_id)
+            self._tfs.append(tf)
+            return
+        i = bisect_left(ids, doc_id)
+        if ids[i] == doc_id:
+            self._tfs[i] = tf
+        else:
+            ids.insert(i, doc_id)
+            self._tfs.insert(i, tf)
+
+    def merge(self, values: Iterable[Any]) -> None:
+        """
+        Adds many documents (doc ids or (doc id, frequency) tuples) at once.
+        """
+        for value in values:
+            self.add(value)
+
+    def remove(self, doc_id: int) -> bool:
+        """
+        Removes a document and its term frequency. max_tf is left as it was, it only
+        has to stay an upper bound.
+        """
+        pos = self._position(doc_id)
+        if pos < 0:
+            return False
+        del self._ids[pos]
+        del self._tfs[pos]
+        return True
+
+    def tf_at(self, i: int) -> int:
+        """
+        Returns the term frequency of the i-th document in the list.
+        """
+        return self._tfs[i]
+
+    def __repr__(self) -> str:
+        return f"FrequencyPostingList({list(zip(self._ids.tolist(), self._tfs.tolist()))})"
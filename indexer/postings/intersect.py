@@ -0,0 +1,103 @@
+from bisect import bisect_left
+from typing import Any, Iterable, List, Sequence
+
+
+def as_sequence(postings: Iterable[int]) -> Sequence[int]:
+    """
+    Returns something indexable for a posting list. PostingLists hand out their
+    backing array without copying; compressed lists have to be decoded first.
+
+    Args:
+        postings (Iterable[int]): A posting list (PostingList, CompressedPostingList or list).
+    Returns:
+        Sequence[int]: The sorted doc ids.
+    """
+    as_array = getattr(postings, "as_array", None)
+    if as_array is not None:
+        return as_array()
+    if isinstance(postings, (list, tuple)):
+        return postings
+    return list(postings)
+
+
+def gallop(seq: Sequence[int], target: int, lo: int) -> int:
+    """
+    Exponential (galloping) search: finds the first position at or after lo whose id is
+    >= target. The probe distance doubles until it passes target and then a binary
+    search finishes inside that last window, so skipping k ids costs O(log k).
+
+    Args:
+        seq (Sequence[int]): Sorted doc ids.
+        target (int): The id to look for.
+        lo (int): Where to start looking.
+    Returns:
+        int: The position of the first id >= target (len(seq) if there is none).
+    """
+    n = len(seq)
+    step = 1
+    hi = lo
+    while hi < n and seq[hi] < target:
+        lo = hi + 1
+        hi = lo + step
+        step *= 2
+    return bisect_left(seq, target, lo, min(hi, n))
+
+
+def intersect(postings_lists: List[Iterable[int]]) -> List[int]:
+    """
+    Intersects any number of sorted posting lists. The lists are processed smallest
+    first: the running result (never bigger than the rarest list) is used to gallop
+    through each bigger list, so the cost depends on the rarest term rather than the
+    most common one. Stops as soon as a list is empty or the result runs out.
+    Compressed lists can't be galloped through without decoding all of them, so they
+    are decoded in order instead, only as far as the last remaining candidate.
+
+    Args:
+        postings_lists (List[Iterable[int]]): Sorted, duplicate-free posting lists.
+    Returns:
+        List[int]: The doc ids found in every list, in ascending order.
+    """
+    if not postings_lists or any(not postings for postings in postings_lists):
+        return []
+    ordered = sorted(postings_lists, key=len) # len() is O(1) on every posting type, nothing is decoded yet
+    result = list(ordered[0])
+    for postings in ordered[1:]:
+        if getattr(postings, "sequential", False):
+            result = _walk(postings, result)
+        else:
+            result = _gallop_through(as_sequence(postings), result)
+        if not result:
+            break
+    return result
+
+
+def _gallop_through(seq: Sequence[int], result: List[int]) -> List[int]:
+    # the ids of result that are in seq, galloping through seq from one candidate to the next
+    n = len(seq)
+    matches = []
+    pos = 0
+    for doc_id in result:
+        pos = gallop(seq, doc_id, pos)
+        if pos == n:
+            break
+        if seq[pos] == doc_id:
+            matches.append(doc_id)
+            pos += 1
+    return matches
+
+
+def _walk(postings: Iterable[int], result: List[int]) -> List[int]:
+    # the ids of result that are in a list that can only be decoded front to back (compressed postings).
+    # decoding stops at the last candidate instead of decoding the whole list up front
+    matches = []
+    ids = iter(postings)
+    current = next(ids, None)
+    for doc_id in result:
+        while current is not None and current < doc_id:
+            current = next(ids, None)
+        if current is None:
+            break
+        if current == doc_id:
+            matches.append(doc_id)
+            current = next(ids, None)
+    return matches
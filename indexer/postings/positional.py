@@ -0,0 +1,156 @@
+from array import array
+from bisect import bisect_left
+from typing import Any, Iterable, List, Tuple
+
+from indexer.postings.posting_list import PostingList
+from indexer.postings.compressed import vbyte_encode, vbyte_decode
+
+
+def encode_positions(positions: Iterable[int]) -> bytearray:
+    """
+    Encodes sorted token offsets as variable-byte gaps.
+
+    Args:
+        positions (Iterable[int]): Token offsets in ascending order.
+    Returns:
+        bytearray: The encoded offsets.
+    """
+    out = bytearray()
+    previous = 0
+    for position in positions:
+        vbyte_encode(position - previous, out)
+        previous = position
+    return out
+
+
+def decode_positions(data: bytes, start: int = 0, end: int = None) -> List[int]:
+    """
+    Decodes the token offsets stored in data[start:end].
+    """
+    if end is None:
+        end = len(data)
+    positions = []
+    position = 0
+    pos = start
+    while pos < end:
+        gap, pos = vbyte_decode(data, pos)
+        position += gap
+        positions.append(position)
+    return positions
+
+
+class PositionalPostingList(PostingList):
+    """
+    A PostingList that also keeps, for every document, the offsets at which the term
+    occurs there. The offsets of all documents live in one bytearray as variable-byte
+    gaps; _offsets[i] and _offsets[i + 1] mark where the i-th document's part starts and
+    ends. The doc ids are the same array a plain PostingList uses, so queries that
+    don't need positions (and the intersection kernel) read them at no extra cost.
+
+    add() takes either a doc id or a (doc id, positions) tuple; adding a document again
+    merges the new positions into the old ones.
+
+    The term frequency of a document is the number of offsets stored for it.
+
+    Methods:
+        tf_at(i: int) -> int:
+            Returns the term frequency of the i-th document in the list.
+        positions_at(i: int) -> List[int]:
+            Returns the offsets for the i-th document in the list.
+        positions_of(doc_id: int) -> List[int]:
+            Returns the offsets for a document id (empty if the document isn't listed).
+    """
+    def __init__(self, values: Iterable[Any] = ()):
+        self._positions = bytearray()
+        self._offsets = array('I', [0])
+        self.max_tf = 0
+        super().__init__(values)
+
+    def add(self, value: Any) -> None:
+        """
+        Adds a document (with its token offsets), keeping the list sorted by doc id.
+
+        Parameters:
+            value (Any): A doc id, or a (doc id, positions) tuple.
+
+        Returns:
+            None
+        """
+        doc_id, positions = value if isinstance(value, tuple) else (value, ())
+        ids = self._ids
+        if len(positions) > self.max_tf:
+            self.max_tf = len(positions)
+        if not ids or doc_id > ids[-1]:
+            ids.append(doc_id) # in-order ingestion, positions just go on the end
+            self._positions.extend(encode_positions(sorted(positions)))
+            self._offsets.append(len(self._positions))
+            return
+        i = bisect_left(ids, doc_id)
+        if ids[i] == doc_id:
+            merged = sorted(set(self.positions_at(i)).union(positions))
+            self.max_tf = max(self.max_tf, len(merged))
+            self._splice(i, encode_positions(merged), replace=True)
+        else:
+            ids.insert(i, doc_id)
+            self._splice(i, encode_positions(sorted(positions)), replace=False)
+
+    def _splice(self, i: int, encoded: bytearray, replace: bool) -> None:
+        # puts encoded in as the i-th document's offsets and shifts the later offsets along
+        start = self._offsets[i]
+        end = self._offsets[i + 1] if replace else start
+        self._positions[start:end] = encoded
+        shift = len(encoded) - (end - start)
+        offsets = self._offsets
+        if not replace:
+            offsets.insert(i + 1, start)
+        for j in range(i + 1, len(offsets)):
+            offsets[j] += shift
+
+    def merge(self, values: Iterable[Any]) -> None:
+        """
+        Adds many documents (doc ids or (doc id, positions) tuples) at once.
+        """
+        for value in values:
+            self.add(value)
+
+    def remove(self, doc_id: int) -> bool:
+        """
+        Removes a document and its token offsets. max_tf is left as it was, it only has
+        to stay an upper bound.
+        """
+        pos = self._position(doc_id)
+        if pos < 0:
+            return False
+        start, end = self._offsets[pos], self._offsets[pos + 1]
+        del self._positions[start:end]
+        del self._ids[pos]
+        offsets = self._offsets
+        del offsets[pos + 1]
+        for j in range(pos + 1, len(offsets)):
+            offsets[j] -= end - start
+        return True
+
+    def tf_at(self, i: int) -> int:
+        """
+        Returns the term frequency of the i-th document (how many offsets it has).
+        """
+        # every encoded offset ends with exactly one byte below 0x80
+        return sum(1 for byte in self._positions[self._offsets[i]:self._offsets[i + 1]] if byte < 0x80)
+
+    def positions_at(self, i: int) -> List[int]:
+        """
+        Returns the token offsets for the i-th document in the list.
+        """
+        return decode_positions(self._positions, self._offsets[i], self._offsets[i + 1])
+
+    def positions_of(self, doc_id: int) -> List[int]:
+        """
+        Returns the token offsets for a document, or [] if it isn't in the list.
+        """
+        i = bisect_left(self._ids, doc_id)
+        if i < len(self._ids) and self._ids[i] == doc_id:
+            return self.positions_at(i)
+        return []
+
+    def __repr__(self) -> str:
+        return f"PositionalPostingList({[(doc_id, self.positions_at(i)) for i, doc_id in enumerate(self._ids)]})"
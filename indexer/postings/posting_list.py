@@ -0,0 +1,127 @@
+from array import array
+from bisect import bisect_left
+from typing import Any, Iterable, Iterator, List
+
+
+class PostingList:
+    """
+    A posting list of integer document ids stored in a typed array ('I', 4 bytes per
+    id) instead of a Python list, which would hold an 8 byte pointer to a separate
+    object for every posting.
+
+    Ids are kept sorted and unique, which is what intersections rely on. Adding ids in
+    increasing order (how the corpus is ingested) is an O(1) amortized append with no
+    membership scan; an out-of-order id is placed with a binary search and a single
+    array insert.
+
+    A PostingList compares equal to any sequence holding the same ids, so callers can
+    keep treating search results as lists.
+
+    Methods:
+        add(doc_id: int) -> None:
+            Adds a document id to the list.
+        merge(doc_ids: Iterable[int]) -> None:
+            Adds many document ids at once.
+        remove(doc_id: int) -> bool:
+            Removes a document id from the list.
+        to_list() -> List[int]:
+            Returns the ids as a plain list.
+    """
+    def __init__(self, doc_ids: Iterable[int] = ()):
+        self._ids = array('I')
+        self.merge(doc_ids)
+
+    def add(self, doc_id: int) -> None:
+        """
+        Adds a document id, keeping the list sorted and free of duplicates.
+
+        Parameters:
+            doc_id (int): The document id.
+
+        Returns:
+            None
+        """
+        ids = self._ids
+        if not ids or doc_id > ids[-1]:
+            ids.append(doc_id) # in-order ingestion, nothing to check
+        elif doc_id != ids[-1]:
+            pos = bisect_left(ids, doc_id)
+            if ids[pos] != doc_id:
+                ids.insert(pos, doc_id)
+
+    def merge(self, doc_ids: Iterable[int]) -> None:
+        """
+        Adds many document ids at once. Ids that all come after the current last id are
+        appended directly; otherwise both runs are merged in one sort.
+
+        Parameters:
+            doc_ids (Iterable[int]): The document ids to add.
+
+        Returns:
+            None
+        """
+        incoming = sorted(set(doc_ids))
+        if not incoming:
+            return
+        ids = self._ids
+        if not ids or incoming[0] > ids[-1]:
+            ids.extend(incoming)
+        else:
+            self._ids = array('I', sorted(set(ids).union(incoming)))
+
+    def _position(self, doc_id: int) -> int:
+        # where doc_id sits in the list, or -1 if it isn't there
+        ids = self._ids
+        pos = bisect_left(ids, doc_id)
+        return pos if pos < len(ids) and ids[pos] == doc_id else -1
+
+    def remove(self, doc_id: int) -> bool:
+        """
+        Removes a document id.
+
+        Parameters:
+            doc_id (int): The document id.
+
+        Returns:
+            bool: True if the id was in the list.
+        """
+        pos = self._position(doc_id)
+        if pos < 0:
+            return False
+        del self._ids[pos]
+        return True
+
+    def as_array(self) -> array:
+        """
+        Returns the backing array of ids (not a copy, so don't modify it).
+        """
+        return self._ids
+
+    def to_list(self) -> List[int]:
+        """
+        Returns the document ids as a list.
+        """
+        return self._ids.tolist()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._ids)
+
+    def __getitem__(self, i):
+        return self._ids[i]
+
+    def __contains__(self, doc_id: Any) -> bool:
+        return doc_id in self._ids
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, PostingList):
+            return self._ids == other._ids
+        try:
+            return self._ids.tolist() == list(other)
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"PostingList({self._ids.tolist()})"
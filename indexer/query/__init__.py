@@ -0,0 +1 @@
+# query module __init__ file
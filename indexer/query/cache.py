@@ -0,0 +1,186 @@
+from collections import OrderedDict
+from typing import Any, Dict, Generator, Hashable, Iterable, List, Optional, Set
+
+from indexer.abstract_index import AbstractIndex
+
+_MISSING = object() # marks "not cached" so that a cached None (word not indexed) still counts as a hit
+
+
+class QueryCache:
+    """
+    A bounded least-recently-used cache for query results. It is bounded both by the
+    number of entries and by the total number of postings it holds, so a few huge
+    posting lists can't push out everything else. Every entry remembers which words
+    it depends on, so when one of those words changes, all the entries that used it
+    can be dropped.
+
+    Attributes:
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that had to go to the index.
+        evictions (int): Entries dropped to stay within the limits.
+    """
+    def __init__(self, max_entries: int = 10000, max_postings: int = 5000000):
+        self.max_entries = max_entries
+        self.max_postings = max_postings
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict() # least recently used first
+        self._sizes: Dict[Hashable, int] = {}
+        self._terms: Dict[Hashable, tuple] = {}            # entry -> the words it depends on
+        self._by_term: Dict[str, Set[Hashable]] = {}       # word -> entries that depend on it
+        self.total_postings = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Returns the cached value for key (marking it as recently used), or _MISSING.
+        """
+        value = self._entries.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any, terms: Iterable[str]) -> None:
+        """
+        Caches value under key, evicting the least recently used entries if needed.
+
+        Args:
+            key (Hashable): The cache key.
+            value (Any): The result (a posting list, a list of doc ids or None).
+            terms (Iterable[str]): The words the result depends on.
+        """
+        if key in self._entries:
+            self._remove(key)
+        size = len(value) if value else 1
+        if size > self.max_postings:
+            return # would push out everything else
+        terms = tuple(terms)
+        self._entries[key] = value
+        self._sizes[key] = size
+        self._terms[key] = terms
+        for term in terms:
+            self._by_term.setdefault(term, set()).add(key)
+        self.total_postings += size
+        while len(self._entries) > self.max_entries or self.total_postings > self.max_postings:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        del self._entries[key]
+        self.total_postings -= self._sizes.pop(key)
+        for term in self._terms.pop(key):
+            keys = self._by_term.get(term)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_term[term]
+
+    def invalidate(self, term: str) -> None:
+        """
+        Drops every entry that depends on term.
+        """
+        for key in list(self._by_term.get(term, ())):
+            self._remove(key)
+
+    def clear(self) -> None:
+        """
+        Drops every entry (the counters are kept).
+        """
+        for key in list(self._entries):
+            self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the counters and the current size, for tuning the limits.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "postings": self.total_postings,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CachedIndex(AbstractIndex):
+    """
+    Wraps any AbstractIndex with a QueryCache in front of its search path. Single-word
+    lookups and multi-word (AND) results are both cached; an insert into the wrapped
+    index drops the cached results that involve the inserted word. Everything else is
+    passed through to the wrapped index.
+    """
+    def __init__(self, index: AbstractIndex, cache: Optional[QueryCache] = None):
+        super().__init__(index.posting_type)
+        self.index = index
+        self.documents = index.documents
+        self.cache = cache if cache is not None else QueryCache()
+
+    def insert(self, key: Any, value: Any) -> None:
+        self.index.insert(key, value)
+        self.cache.invalidate(key)
+
+    def delete(self, key: Any, value: Any) -> bool:
+        removed = self.index.delete(key, value)
+        self.cache.invalidate(key)
+        return removed
+
+    def bulk_load(self, items) -> None:
+        items = list(items)
+        self.index.bulk_load(items)
+        for key, values in items:
+            self.cache.invalidate(key)
+
+    def search(self, key: Any) -> Any:
+        result = self.cache.get(key)
+        if result is _MISSING:
+            result = self.index.search(key)
+            self.cache.put(key, result, (key,))
+        return result
+
+    def search_many(self, keys: Iterable[Any]) -> List[Any]:
+        keys = list(keys)
+        results = {}
+        misses = []
+        for key in dict.fromkeys(keys):
+            result = self.cache.get(key)
+            if result is _MISSING:
+                misses.append(key)
+            else:
+                results[key] = result
+        for key, result in zip(misses, self.index.search_many(misses)): # only the misses go to the index, as one batch
+            self.cache.put(key, result, (key,))
+            results[key] = result
+        return [results[key] for key in keys]
+
+    def search_all(self, keys: Iterable[Any]) -> List[Any]:
+        keys = list(dict.fromkeys(keys))
+        cache_key = ("AND",) + tuple(sorted(keys)) # AND doesn't care about word order
+        result = self.cache.get(cache_key)
+        if result is _MISSING:
+            result = super().search_all(keys) # the lookups inside go through the single-word cache
+            self.cache.put(cache_key, result, keys)
+        return result
+
+    def range(self, lo: Any = None, hi: Any = None):
+        return self.index.range(lo, hi) # scans aren't cached
+
+    def range_keys(self, lo: Any = None, hi: Any = None):
+        return self.index.range_keys(lo, hi)
+
+    def __iter__(self) -> Generator[Any, None, None]:
+        yield from self.index
+
+    def __getattr__(self, name: str) -> Any:
+        # anything the wrapper doesn't define (get_keys_in_order, count_nodes, ...) comes from the wrapped index
+        if name == "index":
+            raise AttributeError(name)
+        return getattr(self.index, name)
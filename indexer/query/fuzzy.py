@@ -0,0 +1,186 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from indexer.abstract_index import AbstractIndex, prefix_end
+from indexer.postings.intersect import as_sequence
+
+
+def _next_row(row: List[int], word: str, char: str) -> List[int]:
+    # one more row of the edit distance table: row is the distances from word's prefixes to some key prefix p,
+    # the result is the distances to p + char
+    new_row = [row[0] + 1]
+    for j, word_char in enumerate(word, 1):
+        new_row.append(min(new_row[j - 1] + 1, row[j] + 1, row[j - 1] + (word_char != char)))
+    return new_row
+
+
+def levenshtein(a: str, b: str) -> int:
+    """
+    Returns the edit distance (insertions, deletions and substitutions) between two strings.
+    """
+    row = list(range(len(b) + 1))
+    for char in a:
+        row = _next_row(row, b, char)
+    return row[-1]
+
+
+class _BKNode:
+    def __init__(self, word: str):
+        self.word = word
+        self.live = True # False once the word is discarded (the node stays, its subtree still hangs off it)
+        self.children: Dict[int, "_BKNode"] = {} # distance to self.word -> subtree
+
+
+class BKTree:
+    """
+    A Burkhard-Keller tree over a set of words. Every child of a node sits under its
+    edit distance to the node's word, so by the triangle inequality a search for words
+    within k of a query only has to enter the children whose distance is within k of
+    the query's own distance to the node.
+
+    Useful for indexes that don't keep their keys in order (HashMapIndex keeps one and
+    updates it as keys are added and deleted). Discarding a word only marks its node, so
+    the distances stored below it stay valid.
+    """
+    def __init__(self, words: Iterable[str] = ()):
+        self.root: Optional[_BKNode] = None
+        self.size = 0
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str) -> None:
+        """
+        Adds a word to the tree (adding a word twice does nothing).
+        """
+        if self.root is None:
+            self.root = _BKNode(word)
+            self.size += 1
+            return
+        node = self.root
+        while True:
+            distance = levenshtein(word, node.word)
+            if distance == 0:
+                if not node.live: # a discarded word coming back
+                    node.live = True
+                    self.size += 1
+                return
+            child = node.children.get(distance)
+            if child is None:
+                node.children[distance] = _BKNode(word)
+                self.size += 1
+                return
+            node = child
+
+    def discard(self, word: str) -> None:
+        """
+        Removes a word from the search results (discarding a word that isn't there does nothing).
+        """
+        node = self.root
+        while node is not None:
+            distance = levenshtein(word, node.word)
+            if distance == 0:
+                if node.live:
+                    node.live = False
+                    self.size -= 1
+                return
+            node = node.children.get(distance)
+
+    def search(self, word: str, k: int) -> List[Tuple[str, int]]:
+        """
+        Finds the words within edit distance k of word.
+
+        Args:
+            word (str): The query word.
+            k (int): The largest allowed edit distance.
+        Returns:
+            List[Tuple[str, int]]: (word, distance) pairs, closest first.
+        """
+        matches = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = levenshtein(word, node.word)
+            if distance <= k and node.live:
+                matches.append((node.word, distance))
+            for child_distance, child in node.children.items():
+                if distance - k <= child_distance <= distance + k:
+                    stack.append(child)
+        return sorted(matches, key=lambda match: (match[1], match[0]))
+
+    def __len__(self) -> int:
+        return self.size
+
+
+def _walk_sorted_keys(index: AbstractIndex, word: str, k: int) -> List[Tuple[str, int]]:
+    # Runs the edit distance table along the index's keys in sorted order, as if walking a trie: a key shares the
+    # rows of the prefix it has in common with the previous key, so only the new characters are computed. Once
+    # every entry of a row is above k, no key starting with that prefix can match, and the scan seeks straight
+    # past all of them with range_keys() (keys only, the postings are never needed here).
+    matches = []
+    rows = [list(range(len(word) + 1))] # rows[i] belongs to previous[:i]
+    previous = ""
+    scan = index.range_keys()
+    for key in iter(lambda: next(scan, None), None):
+        common = 0
+        while common < len(previous) and common < len(key) and previous[common] == key[common]:
+            common += 1
+        del rows[common + 1:]
+        dead_prefix = None
+        for char in key[common:]:
+            rows.append(_next_row(rows[-1], word, char))
+            if min(rows[-1]) > k:
+                dead_prefix = key[:len(rows) - 1]
+                break
+        previous = key[:len(rows) - 1]
+        if dead_prefix is not None:
+            upper = prefix_end(dead_prefix)
+            if upper is None:
+                break
+            scan = index.range_keys(upper)
+        elif rows[-1][-1] <= k:
+            matches.append((key, rows[-1][-1]))
+    return sorted(matches, key=lambda match: (match[1], match[0]))
+
+
+def fuzzy_terms(index: AbstractIndex, word: str, k: int = 1, bk_tree: Optional[BKTree] = None) -> List[Tuple[str, int]]:
+    """
+    Finds the indexed words within edit distance k of word. Ordered indexes (the trees
+    and the sorted array) are walked in key order, skipping every run of keys whose
+    common prefix is already too far from word. Other indexes are searched through a
+    BK-tree of their keys: the one the index keeps (HashMapIndex.bk_tree()) if it has
+    one, otherwise one built for this query. A tree can also be passed in.
+
+    Args:
+        index (AbstractIndex): The index to search.
+        word (str): The (possibly misspelled) query word.
+        k (int): The largest allowed edit distance.
+        bk_tree (Optional[BKTree]): A BK-tree over the index's keys, for indexes without key order.
+    Returns:
+        List[Tuple[str, int]]: (word, distance) pairs, closest first.
+    """
+    if bk_tree is None:
+        try:
+            return _walk_sorted_keys(index, word, k)
+        except NotImplementedError:
+            kept_tree = getattr(index, "bk_tree", None)
+            bk_tree = kept_tree() if kept_tree is not None else BKTree(index) # iterating an index gives its keys
+    return bk_tree.search(word, k)
+
+
+def fuzzy_search(index: AbstractIndex, word: str, k: int = 1, bk_tree: Optional[BKTree] = None) -> List[int]:
+    """
+    Returns the documents containing any indexed word within edit distance k of word.
+
+    Args:
+        index (AbstractIndex): The index to search.
+        word (str): The (possibly misspelled) query word.
+        k (int): The largest allowed edit distance.
+        bk_tree (Optional[BKTree]): A BK-tree over the index's keys, for indexes without key order.
+    Returns:
+        List[int]: The matching doc ids in ascending order.
+    """
+    terms = [term for term, distance in fuzzy_terms(index, word, k, bk_tree)]
+    doc_ids = set()
+    for postings in index.search_many(terms):
+        if postings:
+            doc_ids.update(as_sequence(postings))
+    return sorted(doc_ids)
@@ -0,0 +1,218 @@
+import re
+from typing import Any, List, Optional
+
+
+class QuerySyntaxError(ValueError):
+    """
+    Raised when a boolean query can't be parsed.
+    """
+
+
+class Node:
+    """
+    Base class for the nodes of a parsed query (and of the plans built from it).
+    Two nodes are equal if they are the same kind of node with the same contents.
+    """
+    def __eq__(self, other: Any) -> bool:
+        return type(self) is type(other) and self.__dict__ == other.__dict__
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{value!r}" for value in self.__dict__.values())
+        return f"{type(self).__name__}({fields})"
+
+
+class Term(Node):
+    """
+    A single word. Matches the documents in the word's posting list.
+    """
+    def __init__(self, word: str):
+        self.word: str = word
+
+
+class And(Node):
+    """
+    Matches documents matched by every child.
+    """
+    def __init__(self, children: List[Node]):
+        self.children: List[Node] = children
+
+
+class Or(Node):
+    """
+    Matches documents matched by any child.
+    """
+    def __init__(self, children: List[Node]):
+        self.children: List[Node] = children
+
+
+class Phrase(Node):
+    """
+    Matches documents in which the words appear next to each other, in order
+    (written as a quoted phrase: "stock market").
+    """
+    def __init__(self, words: List[str]):
+        self.words: List[str] = words
+
+
+class Near(Node):
+    """
+    Matches documents in which two words appear within k positions of each other
+    (written as: stock NEAR/3 market).
+    """
+    def __init__(self, first: str, second: str, k: int):
+        self.first: str = first
+        self.second: str = second
+        self.k: int = k
+
+
+class Not(Node):
+    """
+    Matches documents not matched by the child.
+    """
+    def __init__(self, child: Node):
+        self.child: Node = child
+
+
+# quoted phrases, words, parentheses; AND / OR / NOT / NEAR/k are recognised as keywords when they are written in capitals
+TOKEN_PATTERN = re.compile(r'"[^"]*"|\(|\)|[^\s()"]+')
+NEAR_PATTERN = re.compile(r'NEAR/(\d+)$')
+KEYWORDS = {"AND", "OR", "NOT"}
+
+
+def tokenize_query(query: str) -> List[str]:
+    """
+    Splits a query into quoted phrases, words, parentheses and keywords.
+
+    Args:
+        query (str): The query text.
+    Returns:
+        List[str]: The tokens.
+    """
+    return TOKEN_PATTERN.findall(query)
+
+
+class _Parser:
+    """
+    Recursive descent parser for the grammar (lowest precedence first):
+
+        query   := or_expr
+        or_expr  := and_expr ("OR" and_expr)*
+        and_expr := not_expr (["AND"] not_expr)*      words next to each other are ANDed
+        not_expr := "NOT" not_expr | primary
+        primary  := "(" or_expr ")" | '"' word+ '"' | word "NEAR/k" word | word
+    """
+    def __init__(self, tokens: List[str]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self) -> str:
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse(self) -> Node:
+        if self.peek() is None:
+            raise QuerySyntaxError("empty query")
+        node = self.or_expr()
+        if self.peek() is not None:
+            raise QuerySyntaxError(f"unexpected {self.peek()!r} at token {self.pos}")
+        return node
+
+    def or_expr(self) -> Node:
+        children = [self.and_expr()]
+        while self.peek() == "OR":
+            self.take()
+            children.append(self.and_expr())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def and_expr(self) -> Node:
+        children = [self.not_expr()]
+        while self.peek() is not None and self.peek() not in ("OR", ")"):
+            if self.peek() == "AND":
+                self.take()
+            children.append(self.not_expr())
+        return children[0] if len(children) == 1 else And(children)
+
+    def not_expr(self) -> Node:
+        if self.peek() == "NOT":
+            self.take()
+            return Not(self.not_expr())
+        return self.primary()
+
+    def primary(self) -> Node:
+        token = self.peek()
+        if token is None:
+            raise QuerySyntaxError("query ends where a word or '(' was expected")
+        if token == "(":
+            self.take()
+            node = self.or_expr()
+            if self.peek() != ")":
+                raise QuerySyntaxError("missing ')'")
+            self.take()
+            return node
+        if token.startswith('"'):
+            words = self.take().strip('"').lower().split()
+            if not words:
+                raise QuerySyntaxError("empty phrase")
+            return Phrase(words) if len(words) > 1 else Term(words[0])
+        self.word_token(token)
+        word = self.take().lower()
+        near = NEAR_PATTERN.match(self.peek() or "")
+        if near:
+            self.take()
+            second = self.peek()
+            if second is None:
+                raise QuerySyntaxError("NEAR needs a word on both sides")
+            self.word_token(second)
+            return Near(word, self.take().lower(), int(near.group(1)))
+        return Term(word)
+
+    def word_token(self, token: str) -> None:
+        # raises unless token can be used as a word
+        if token in ("(", ")") or token in KEYWORDS or NEAR_PATTERN.match(token) or token.startswith('"'):
+            raise QuerySyntaxError(f"unexpected {token!r} at token {self.pos}")
+
+
+def parse_query(query: str) -> Node:
+    """
+    Parses a boolean query such as `(stock OR bond) AND NOT crypto` into a tree of
+    Term / Phrase / Near / And / Or / Not nodes. Words are lowercased like the rest of the search path.
+
+    Args:
+        query (str): The query text.
+    Returns:
+        Node: The root of the parsed query.
+    Raises:
+        QuerySyntaxError: If the query is malformed.
+    """
+    return _Parser(tokenize_query(query)).parse()
+
+
+def query_words(node: Node) -> List[str]:
+    """
+    Returns every word a parsed query looks up (terms, phrase words and NEAR words),
+    without repeats, in the order they appear, so they can all be fetched in one batch.
+
+    Args:
+        node (Node): The parsed query.
+    Returns:
+        List[str]: The words of the query.
+    """
+    words: List[str] = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Term):
+            words.append(node.word)
+        elif isinstance(node, Phrase):
+            words.extend(node.words)
+        elif isinstance(node, Near):
+            words.extend([node.first, node.second])
+        elif isinstance(node, Not):
+            stack.append(node.child)
+        elif isinstance(node, (And, Or)):
+            stack.extend(reversed(node.children))
+    return list(dict.fromkeys(words))
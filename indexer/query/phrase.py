@@ -0,0 +1,84 @@
+from typing import Any, List, Optional
+
+from indexer.abstract_index import AbstractIndex
+from indexer.postings.intersect import intersect
+from indexer.postings.positional import PositionalPostingList
+
+
+def _positional_postings(index: AbstractIndex, words: List[str], found: Optional[List[Any]] = None) -> Optional[List[PositionalPostingList]]:
+    # the posting list of every word (all looked up in one batch unless they were already), or None if one word isn't indexed
+    if found is None:
+        found = index.search_many(words)
+    postings_lists = []
+    for postings in found:
+        if not postings:
+            return None
+        if not isinstance(postings, PositionalPostingList):
+            raise ValueError("phrase and NEAR queries need an index built with PositionalPostingList postings")
+        postings_lists.append(postings)
+    return postings_lists
+
+
+def phrase_search(index: AbstractIndex, words: List[str], postings: Optional[List[Any]] = None) -> List[int]:
+    """
+    Finds the documents in which the words appear next to each other, in order.
+    The documents containing every word are found with the normal intersection
+    first; positions are only decoded for those candidates.
+
+    Args:
+        index (AbstractIndex): An index built with positional postings.
+        words (List[str]): The words of the phrase.
+        postings (Optional[List[Any]]): The words' posting lists, if they were already looked up.
+    Returns:
+        List[int]: The matching doc ids in ascending order.
+    Raises:
+        ValueError: If the index doesn't store positions.
+    """
+    if not words:
+        return []
+    postings_lists = _positional_postings(index, words, postings)
+    if postings_lists is None:
+        return []
+    matches = []
+    for doc_id in intersect(postings_lists):
+        offsets = [set(postings.positions_of(doc_id)) for postings in postings_lists]
+        # a phrase starting at p needs word i at p + i for every word
+        if any(all(start + i in offsets[i] for i in range(1, len(words))) for start in offsets[0]):
+            matches.append(doc_id)
+    return matches
+
+
+def near_search(index: AbstractIndex, first: str, second: str, k: int, postings: Optional[List[Any]] = None) -> List[int]:
+    """
+    Finds the documents in which two words appear within k positions of each
+    other (in either order).
+
+    Args:
+        index (AbstractIndex): An index built with positional postings.
+        first (str): One word.
+        second (str): The other word.
+        k (int): The largest allowed distance between the two words.
+        postings (Optional[List[Any]]): The two words' posting lists, if they were already looked up.
+    Returns:
+        List[int]: The matching doc ids in ascending order.
+    Raises:
+        ValueError: If the index doesn't store positions.
+    """
+    postings_lists = _positional_postings(index, [first, second], postings)
+    if postings_lists is None:
+        return []
+    matches = []
+    for doc_id in intersect(postings_lists):
+        a = postings_lists[0].positions_of(doc_id)
+        b = postings_lists[1].positions_of(doc_id)
+        # both offset lists are sorted, so walk them together looking for a close pair
+        i = j = 0
+        while i < len(a) and j < len(b):
+            if abs(a[i] - b[j]) <= k:
+                matches.append(doc_id)
+                break
+            if a[i] < b[j]:
+                i += 1
+            else:
+                j += 1
+    return matches
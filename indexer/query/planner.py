@@ -0,0 +1,279 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+from indexer.abstract_index import AbstractIndex
+from indexer.postings.intersect import as_sequence, gallop, intersect
+from indexer.query.parser import Node, Term, Phrase, Near, And, Or, Not, parse_query, query_words
+from indexer.query.phrase import phrase_search, near_search
+
+
+class PlanNode(Node):
+    """
+    Base class for the steps of a query plan. `estimate` is the planner's guess of how
+    many documents the step returns, taken from the document frequencies in the index.
+    """
+    estimate: int = 0
+
+
+class TermScan(PlanNode):
+    """
+    Reads one word's posting list (looked up while planning, with the rest of the query's words).
+    """
+    def __init__(self, word: str, postings: Any):
+        self.word: str = word
+        self.postings: Any = postings
+        self.estimate: int = len(postings) if postings else 0
+
+
+class PositionalScan(PlanNode):
+    """
+    A phrase or NEAR match, with the posting lists of its words. Its estimate is the
+    smallest document frequency of its words, since every match has to contain all of them.
+    """
+    def __init__(self, query: Node, postings: List[Any]):
+        self.query: Node = query
+        self.postings: List[Any] = postings
+        self.estimate: int = min(len(word_postings or []) for word_postings in postings)
+
+
+class Intersect(PlanNode):
+    """
+    Documents in every child. Children are ordered cheapest (most selective) first.
+    """
+    def __init__(self, children: List[PlanNode]):
+        self.children: List[PlanNode] = children
+        self.estimate: int = min(child.estimate for child in children)
+
+
+class Union(PlanNode):
+    """
+    Documents in any child.
+    """
+    def __init__(self, children: List[PlanNode], num_docs: int):
+        self.children: List[PlanNode] = children
+        self.estimate: int = min(num_docs, sum(child.estimate for child in children))
+
+
+class Difference(PlanNode):
+    """
+    Documents of `include` that are in none of `excludes`. This is how NOT runs: the
+    candidates are narrowed by the positive part of the query first and only those
+    candidates are checked against the excluded posting lists.
+    """
+    def __init__(self, include: PlanNode, excludes: List[PlanNode]):
+        self.include: PlanNode = include
+        self.excludes: List[PlanNode] = excludes
+        self.estimate: int = include.estimate
+
+
+class AllDocs(PlanNode):
+    """
+    Every document in the index (only needed for a NOT with nothing positive to narrow it).
+    """
+    def __init__(self, num_docs: int):
+        self.estimate: int = num_docs
+
+
+class Empty(PlanNode):
+    """
+    Matches nothing (e.g. an AND containing a word that isn't indexed).
+    """
+
+
+def count_documents(index: AbstractIndex) -> int:
+    """
+    Number of documents in the index, from its document dictionary (index_files
+    registers every document there before indexing it).
+    """
+    return index.documents.count()
+
+
+def _flatten(node: Node, kind: type) -> List[Node]:
+    # And(a, And(b, c)) -> [a, b, c] (same for Or)
+    if isinstance(node, kind):
+        children = []
+        for child in node.children:
+            children.extend(_flatten(child, kind))
+        return children
+    return [node]
+
+
+def plan_query(node: Node, index: AbstractIndex, num_docs: Optional[int] = None, postings: Optional[Dict[str, Any]] = None) -> PlanNode:
+    """
+    Turns a parsed query into an executable plan, rewriting it with the document
+    frequencies stored in the index:
+      - nested ANDs / ORs are flattened and double NOTs removed,
+      - AND children run rarest first and an AND with an unindexed word becomes Empty,
+      - NOTs under an AND become a Difference against the AND's positive part.
+    Every word of the query is looked up up front, in one search_many batch (which a
+    ShardedIndex sends to all its shards at once), and the plan keeps the posting lists.
+
+    Args:
+        node (Node): The parsed query.
+        index (AbstractIndex): The index the query will run against.
+        num_docs (Optional[int]): Number of documents in the index (looked up if not given).
+        postings (Optional[Dict[str, Any]]): word -> posting list for every word of the query (looked up if not given).
+    Returns:
+        PlanNode: The root of the plan.
+    """
+    if num_docs is None:
+        num_docs = count_documents(index)
+    if postings is None:
+        words = query_words(node)
+        postings = dict(zip(words, index.search_many(words)))
+
+    if isinstance(node, Term):
+        word_postings = postings[node.word]
+        return TermScan(node.word, word_postings) if word_postings else Empty()
+
+    if isinstance(node, (Phrase, Near)):
+        words = node.words if isinstance(node, Phrase) else [node.first, node.second]
+        step = PositionalScan(node, [postings[word] for word in words])
+        return step if step.estimate else Empty()
+
+    if isinstance(node, Not):
+        if isinstance(node.child, Not):
+            return plan_query(node.child.child, index, num_docs, postings) # NOT NOT x == x
+        return plan_query(And([node]), index, num_docs, postings)
+
+    if isinstance(node, And):
+        positives, negatives = [], []
+        for child in _flatten(node, And):
+            while isinstance(child, Not) and isinstance(child.child, Not):
+                child = child.child.child
+            if isinstance(child, Not):
+                negatives.append(child.child)
+            else:
+                positives.append(child)
+
+        include_steps = []
+        for child in positives:
+            step = plan_query(child, index, num_docs, postings)
+            if isinstance(step, Empty):
+                return Empty() # nothing can match, skip the rest of the query
+            if not isinstance(step, AllDocs):
+                include_steps.append(step)
+        include_steps.sort(key=lambda step: step.estimate)
+        if not include_steps:
+            include = AllDocs(num_docs)
+        elif len(include_steps) == 1:
+            include = include_steps[0]
+        else:
+            include = Intersect(include_steps)
+
+        excludes = []
+        for child in negatives:
+            step = plan_query(child, index, num_docs, postings)
+            if isinstance(step, AllDocs):
+                return Empty()
+            if not isinstance(step, Empty):
+                excludes.append(step)
+        if not excludes:
+            return include
+        excludes.sort(key=lambda step: step.estimate, reverse=True) # the biggest exclusion shrinks the candidates the most
+        return Difference(include, excludes)
+
+    if isinstance(node, Or):
+        steps = []
+        for child in _flatten(node, Or):
+            step = plan_query(child, index, num_docs, postings)
+            if isinstance(step, AllDocs):
+                return step
+            if not isinstance(step, Empty):
+                steps.append(step)
+        if not steps:
+            return Empty()
+        if len(steps) == 1:
+            return steps[0]
+        return Union(steps, num_docs)
+
+    raise TypeError(f"Unknown query node {node!r}")
+
+
+def _all_doc_ids(index: AbstractIndex) -> Sequence[int]:
+    # ids are dense, so every id that hasn't been removed is a document
+    documents = index.documents
+    return documents.live_ids() if documents.count() != len(documents) else range(len(documents))
+
+
+def _remove(candidates: List[int], excluded: Sequence[int]) -> List[int]:
+    # keeps the (sorted) candidates that aren't in the sorted excluded list, galloping through it
+    kept = []
+    pos = 0
+    n = len(excluded)
+    for doc_id in candidates:
+        pos = gallop(excluded, doc_id, pos)
+        if pos == n or excluded[pos] != doc_id:
+            kept.append(doc_id)
+    return kept
+
+
+def execute_plan(step: PlanNode, index: AbstractIndex) -> List[int]:
+    """
+    Runs a plan and returns the matching doc ids in ascending order.
+
+    Args:
+        step (PlanNode): The plan (or part of it) to run.
+        index (AbstractIndex): The index the plan was made for.
+    Returns:
+        List[int]: The matching doc ids.
+    """
+    if isinstance(step, TermScan):
+        return list(step.postings)
+
+    if isinstance(step, PositionalScan):
+        if isinstance(step.query, Phrase):
+            return phrase_search(index, step.query.words, step.postings)
+        return near_search(index, step.query.first, step.query.second, step.query.k, step.postings)
+
+    if isinstance(step, Intersect):
+        # all the posting lists go through the intersection kernel together, sub-queries only run while something is left
+        term_lists = [child.postings for child in step.children if isinstance(child, TermScan)]
+        result = intersect(term_lists) if term_lists else None
+        for child in step.children:
+            if isinstance(child, TermScan):
+                continue
+            if result is not None and not result:
+                return []
+            child_result = execute_plan(child, index)
+            result = child_result if result is None else intersect([result, child_result])
+        return result
+
+    if isinstance(step, Union):
+        merged = set()
+        for child in step.children:
+            merged.update(execute_plan(child, index))
+        return sorted(merged)
+
+    if isinstance(step, Difference):
+        candidates = execute_plan(step.include, index)
+        for exclude in step.excludes:
+            if not candidates:
+                break
+            if isinstance(exclude, TermScan):
+                candidates = _remove(candidates, as_sequence(exclude.postings))
+            else:
+                candidates = _remove(candidates, execute_plan(exclude, index))
+        return candidates
+
+    if isinstance(step, AllDocs):
+        return list(_all_doc_ids(index))
+
+    if isinstance(step, Empty):
+        return []
+
+    raise TypeError(f"Unknown plan step {step!r}")
+
+
+def boolean_search(index: AbstractIndex, query: str) -> List[int]:
+    """
+    Runs a boolean query (AND / OR / NOT and parentheses; words next to each other
+    are ANDed) against any AbstractIndex. Quoted phrases and NEAR/k need an index
+    built with positional postings.
+
+    Args:
+        index (AbstractIndex): The index to search.
+        query (str): The query, e.g. `(stock OR bond) AND NOT crypto`.
+    Returns:
+        List[int]: The matching doc ids in ascending order.
+    """
+    return execute_plan(plan_query(parse_query(query), index), index)
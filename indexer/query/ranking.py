@@ -0,0 +1,153 @@
+import heapq
+import math
+from typing import Any, Iterable, List, Tuple
+
+from indexer.abstract_index import AbstractIndex
+from indexer.postings.intersect import as_sequence, gallop
+
+
+class _Cursor:
+    """
+    A position in one query word's posting list, plus the most that word can add to
+    any document's score.
+    """
+    def __init__(self, postings: Any, idf: float, upper_bound: float):
+        self.postings = postings
+        self.ids = as_sequence(postings)
+        self.pos = 0
+        self.idf = idf
+        self.upper_bound = upper_bound
+
+    def doc(self) -> int:
+        return self.ids[self.pos]
+
+    def tf(self) -> int:
+        tf_at = getattr(self.postings, "tf_at", None)
+        return tf_at(self.pos) if tf_at is not None else 1 # plain posting lists only know the word is there
+
+    def exhausted(self) -> bool:
+        return self.pos >= len(self.ids)
+
+    def advance_to(self, doc_id: int) -> None:
+        self.pos = gallop(self.ids, doc_id, self.pos)
+
+
+class BM25Ranker:
+    """
+    Ranks documents for a bag-of-words (OR) query with BM25:
+
+        score(d) = sum over words t of idf(t) * tf(t, d) * (k1 + 1) / (tf(t, d) + k1 * (1 - b + b * |d| / avgdl))
+
+    top_k uses the WAND algorithm. Every word gets an upper bound on what it can add to
+    a score (from its largest term frequency and the shortest document length). Cursors
+    are kept sorted by their current doc id; a document is only scored when the bounds
+    of the words that could contain it add up to more than the current k-th best score,
+    and the cursors gallop past everything else. Term frequencies come from
+    FrequencyPostingList / PositionalPostingList postings; a plain posting list counts as
+    a frequency of 1.
+
+    Attributes:
+        documents_scored (int): How many documents the last top_k call fully scored.
+    """
+    def __init__(self, index: AbstractIndex, k1: float = 1.2, b: float = 0.75):
+        self.index = index
+        self.k1 = k1
+        self.b = b
+        self.num_docs = index.documents.count()
+        self.avgdl = index.documents.average_length() or 1.0
+        self.min_length = index.documents.min_length()
+        self.documents_scored = 0
+
+    def idf(self, df: int) -> float:
+        """
+        Inverse document frequency of a word that appears in df documents.
+        """
+        return math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+
+    def term_score(self, idf: float, tf: int, length: int) -> float:
+        """
+        What one word adds to a document's score.
+        """
+        k1 = self.k1
+        return idf * tf * (k1 + 1) / (tf + k1 * (1 - self.b + self.b * length / self.avgdl))
+
+    def score(self, words: Iterable[str], doc_id: int) -> float:
+        """
+        Fully scores one document for the query (no pruning).
+        """
+        total = 0.0
+        length = self.index.documents.length_of(doc_id)
+        for postings in self.index.search_many(dict.fromkeys(words)): # one batch for all the words
+            if not postings:
+                continue
+            ids = as_sequence(postings)
+            pos = gallop(ids, doc_id, 0)
+            if pos < len(ids) and ids[pos] == doc_id:
+                tf_at = getattr(postings, "tf_at", None)
+                tf = tf_at(pos) if tf_at is not None else 1
+                total += self.term_score(self.idf(len(postings)), tf, length)
+        return total
+
+    def top_k(self, words: Iterable[str], k: int = 10) -> List[Tuple[int, float]]:
+        """
+        Returns the k best-scoring documents for the words (any of them may match).
+
+        Args:
+            words (Iterable[str]): The query words.
+            k (int): How many documents to return.
+        Returns:
+            List[Tuple[int, float]]: (doc id, score) pairs, best first (none if k <= 0).
+        """
+        if k <= 0:
+            self.documents_scored = 0
+            return []
+        cursors = []
+        for postings in self.index.search_many(dict.fromkeys(words)): # one batch for all the words
+            if not postings:
+                continue
+            idf = self.idf(len(postings))
+            max_tf = getattr(postings, "max_tf", 1)
+            cursors.append(_Cursor(postings, idf, self.term_score(idf, max_tf, self.min_length)))
+
+        heap: List[Tuple[float, int]] = [] # (score, doc id) min-heap holding the best k so far
+        self.documents_scored = 0
+        lengths = self.index.documents
+        while cursors:
+            cursors.sort(key=_Cursor.doc)
+            threshold = heap[0][0] if len(heap) == k else 0.0
+
+            # pivot: the first cursor at which the bounds so far could beat the threshold
+            bound = 0.0
+            pivot = None
+            for i, cursor in enumerate(cursors):
+                bound += cursor.upper_bound
+                if bound > threshold:
+                    pivot = i
+                    break
+            if pivot is None:
+                break # no document left can make it into the top k
+            pivot_doc = cursors[pivot].doc()
+
+            if cursors[0].doc() == pivot_doc:
+                # every cursor up to the pivot sits on pivot_doc, so it's worth scoring
+                self.documents_scored += 1
+                length = lengths.length_of(pivot_doc)
+                total = 0.0
+                for cursor in cursors:
+                    if cursor.doc() != pivot_doc:
+                        break
+                    total += self.term_score(cursor.idf, cursor.tf(), length)
+                    cursor.pos += 1
+                if len(heap) < k:
+                    heapq.heappush(heap, (total, pivot_doc))
+                elif total > threshold:
+                    heapq.heapreplace(heap, (total, pivot_doc))
+            else:
+                # documents before pivot_doc can't beat the threshold, skip them
+                for cursor in cursors[:pivot]:
+                    if cursor.doc() >= pivot_doc:
+                        break
+                    cursor.advance_to(pivot_doc)
+            cursors = [cursor for cursor in cursors if not cursor.exhausted()]
+
+        return [(doc_id, score) for score, doc_id in sorted(heap, key=lambda pair: (-pair[0], pair[1]))]
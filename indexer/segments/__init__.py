@@ -0,0 +1 @@
+# segments module __init__ file
@@ -0,0 +1,458 @@
+import math
+import heapq
+import threading
+from bisect import bisect_left
+from typing import *
+from indexer.abstract_index import AbstractIndex
+from indexer.postings.posting_list import PostingList
+from indexer.postings.frequency import FrequencyPostingList
+from indexer.postings.positional import PositionalPostingList
+
+MEMTABLE_SIZE = 100000 # postings (and deletes) buffered in memory before they are flushed as a segment
+MERGE_FACTOR = 4       # this many segments of the same size tier are merged into one
+
+
+def posting_values(postings: Any) -> List[Any]:
+    # the values that rebuild postings with add(): doc ids, or (doc id, tf) / (doc id, positions) tuples
+    if isinstance(postings, PositionalPostingList):
+        return [(doc_id, postings.positions_at(i)) for i, doc_id in enumerate(postings)]
+    if isinstance(postings, FrequencyPostingList):
+        return [(doc_id, postings.tf_at(i)) for i, doc_id in enumerate(postings)]
+    return list(postings)
+
+def combine_postings(parts: List[Tuple[Any, Optional[Set[int]]]], posting_type: type) -> Any:
+    # merges one term's postings from several segments, given oldest first, each with the doc ids deleted by newer segments
+    if len(parts) == 1 and not parts[0][1]:
+        return parts[0][0] # the usual case after merging: one segment has the term, nothing to copy
+    merged = posting_type()
+    for postings, deleted in parts: # oldest first, so a newer tf or set of positions wins
+        values = posting_values(postings)
+        if deleted:
+            values = [value for value in values if (value[0] if isinstance(value, tuple) else value) not in deleted]
+        merged.merge(values)
+    return merged if merged else None
+
+
+class Segment:
+    """
+    An immutable sorted run of (term, postings) pairs, plus the (term, doc id) pairs that
+    were deleted while it was being filled. Those deletes hide the matching postings in
+    every older segment; they can be forgotten once the segment is merged into the
+    oldest one.
+    """
+    __slots__ = ("terms", "postings", "deletes", "size")
+
+    def __init__(self, items: List[Tuple[str, Any]], deletes: Dict[str, Set[int]]):
+        self.terms: List[str] = [term for term, postings in items]
+        self.postings: List[Any] = [postings for term, postings in items]
+        self.deletes: Dict[str, Set[int]] = deletes
+        self.size = sum(len(postings) for postings in self.postings) + sum(len(docs) for docs in deletes.values())
+
+    def search(self, term: str) -> Optional[Any]:
+        i = bisect_left(self.terms, term)
+        if i < len(self.terms) and self.terms[i] == term:
+            return self.postings[i]
+        return None
+
+    def __repr__(self) -> str:
+        return f"Segment({len(self.terms)} terms, {self.size} postings)"
+
+
+class _Memtable:
+    # the segment being filled: a plain dict of posting lists plus the deletes it has seen
+    def __init__(self):
+        self.postings: Dict[str, Any] = {}
+        self.deletes: Dict[str, Set[int]] = {}
+        self.size = 0
+
+    def search(self, term: str) -> Optional[Any]:
+        return self.postings.get(term)
+
+    def freeze(self, copy: bool = False) -> Segment:
+        # the memtable as a sorted segment (copying the posting lists if the memtable will keep changing)
+        items = sorted(self.postings.items())
+        if copy:
+            items = [(term, type(postings)(posting_values(postings))) for term, postings in items]
+            return Segment(items, {term: set(docs) for term, docs in self.deletes.items()})
+        return Segment(items, self.deletes)
+
+
+def search_segments(sources: Sequence[Any], term: str, posting_type: type) -> Optional[Any]:
+    """
+    Looks a term up across segments given oldest first. Newer segments are read
+    first so their deletes can be applied to the older ones.
+
+    Args:
+        sources (Sequence[Any]): Segments (or the memtable), oldest first.
+        term (str): The term to look up.
+        posting_type (type): The posting list class of the index.
+    Returns:
+        Optional[Any]: The merged postings, or None if the term has none left.
+    """
+    parts = []
+    deleted: Set[int] = set()
+    for source in reversed(sources):
+        postings = source.search(term)
+        if postings:
+            parts.append((postings, set(deleted)))
+        docs = source.deletes.get(term)
+        if docs:
+            deleted |= docs
+    if not parts:
+        return None
+    parts.reverse()
+    return combine_postings(parts, posting_type)
+
+def contains_posting(sources: Sequence[Any], term: str, doc_id: int) -> bool:
+    """
+    Tells whether doc_id is still indexed under term, checking the segments newest
+    first and stopping at the first one that holds the posting or deleted it. Nothing
+    is merged or copied: only each segment's own list is tested.
+
+    Args:
+        sources (Sequence[Any]): Segments (or the memtable), oldest first.
+        term (str): The term.
+        doc_id (int): The doc id.
+    Returns:
+        bool: True if search_segments would return doc_id under term.
+    """
+    for source in reversed(sources):
+        postings = source.search(term)
+        if postings and doc_id in postings: # a segment's own postings are newer than its own deletes
+            return True
+        docs = source.deletes.get(term)
+        if docs and doc_id in docs:
+            return False
+    return False
+
+def merge_segments(segments: Sequence[Segment], posting_type: type, drop_deletes: bool) -> Segment:
+    """
+    Merges adjacent segments (oldest first) into one. Every term's postings are combined
+    the same way search_segments does it, walking all segments in term order at once.
+
+    Args:
+        segments (Sequence[Segment]): Adjacent segments, oldest first.
+        posting_type (type): The posting list class of the index.
+        drop_deletes (bool): True if there is no older segment left for the deletes to hide.
+    Returns:
+        Segment: The merged segment.
+    """
+    cursors = [0] * len(segments)
+    items = []
+    previous = None
+    for term in heapq.merge(*(segment.terms for segment in segments)):
+        if term == previous:
+            continue
+        previous = term
+        parts = []
+        deleted: Set[int] = set()
+        for k in range(len(segments) - 1, -1, -1): # newest first, like search_segments
+            segment = segments[k]
+            i = cursors[k]
+            if i < len(segment.terms) and segment.terms[i] == term:
+                parts.append((segment.postings[i], set(deleted)))
+                cursors[k] = i + 1
+            docs = segment.deletes.get(term)
+            if docs:
+                deleted |= docs
+        parts.reverse()
+        postings = combine_postings(parts, posting_type)
+        if postings:
+            items.append((term, postings))
+    deletes: Dict[str, Set[int]] = {}
+    if not drop_deletes:
+        for segment in segments:
+            for term, docs in segment.deletes.items():
+                deletes.setdefault(term, set()).update(docs)
+    return Segment(items, deletes)
+
+def _merged_terms(segments: Sequence[Segment], lo: Optional[str], hi: Optional[str]) -> Iterator[str]:
+    # every term in [lo, hi) of any segment, in order and without repeats
+    runs = []
+    for segment in segments:
+        terms = segment.terms
+        start = 0 if lo is None else bisect_left(terms, lo)
+        end = len(terms) if hi is None else bisect_left(terms, hi)
+        runs.append(terms[start:end])
+    previous = None
+    for term in heapq.merge(*runs):
+        if term != previous:
+            previous = term
+            yield term
+
+
+class IndexSnapshot(AbstractIndex):
+    """
+    A read-only, point-in-time view of a SegmentedIndex. It holds on to the segments
+    that existed when it was taken (segments are never changed, only replaced), so
+    later inserts, deletes and merges don't affect its results. The document
+    dictionary is shared with the index.
+
+    Methods:
+        search(key: str) -> Optional[PostingList]:
+            Returns the postings of key as of the snapshot.
+        range(lo: str, hi: str) -> Iterator[Tuple[str, PostingList]]:
+            Yields the (term, postings) pairs with lo <= term < hi.
+    """
+    def __init__(self, segments: Tuple[Segment, ...], documents: Any, posting_type: type):
+        super().__init__(posting_type)
+        self.segments = segments
+        self.documents = documents
+
+    def insert(self, key: Any, value: Any) -> None:
+        raise NotImplementedError("snapshots are read-only")
+
+    def search(self, key: str) -> Optional[Any]:
+        return search_segments(self.segments, key, self.posting_type)
+
+    def range(self, lo: Optional[str] = None, hi: Optional[str] = None) -> Iterator[Tuple[str, Any]]:
+        for term in _merged_terms(self.segments, lo, hi):
+            postings = self.search(term)
+            if postings:
+                yield term, postings
+
+    def __iter__(self) -> Iterator[str]:
+        for term, postings in self.range():
+            yield term
+
+    def get_keys_in_order(self) -> List[str]:
+        return list(self)
+
+
+class SegmentedIndex(AbstractIndex):
+    """
+    A log-structured (LSM-style) index. Inserts and deletes go into a small in-memory
+    memtable; once it holds memtable_size postings it is sorted and frozen into an
+    immutable Segment. A background thread merges segments with a size-tiered policy:
+    as soon as merge_factor adjacent segments fall in the same size tier (sizes within
+    the same power of merge_factor) they are merged into one, so there are only
+    O(log n) segments and each posting is rewritten O(log n) times. Inserting never
+    touches the segments, so ingestion speed doesn't depend on how big the index is.
+
+    A search looks the term up in the memtable and every segment, newest first, and
+    combines the postings. Deletes are recorded with the newest data and hide the
+    matching postings in older segments until a merge drops them for good.
+
+    Segments are never modified: a flush or merge builds the new tuple of segments and
+    swaps it in, so a search (or a snapshot) keeps working on the tuple it started
+    with while a merge runs.
+
+    Methods:
+        flush() -> None:
+            Freezes the memtable into a segment.
+        wait_for_merges() -> None:
+            Blocks until the merger has nothing left to do.
+        snapshot() -> IndexSnapshot:
+            Returns a read-only view of the index as it is now.
+        segment_sizes() -> List[int]:
+            Returns the number of postings in each segment, oldest first.
+        close() -> None:
+            Stops the merger thread.
+    """
+    def __init__(self, posting_type: type = PostingList, memtable_size: int = MEMTABLE_SIZE,
+                 merge_factor: int = MERGE_FACTOR, background: bool = True):
+        super().__init__(posting_type)
+        self.memtable_size = memtable_size
+        self.merge_factor = merge_factor
+        self.background = background # False merges right after each flush instead (deterministic, for tests)
+        self._memtable = _Memtable()
+        self._segments: Tuple[Segment, ...] = () # oldest first
+        self.flushes = 0
+        self.merges = 0
+        self._start()
+
+    def _start(self):
+        self._lock = threading.RLock()
+        self._work = threading.Condition(self._lock)
+        self._merging = False
+        self._closed = False
+        self._merger = None
+        if self.background:
+            self._merger = threading.Thread(target=self._merge_loop, name="segment-merger", daemon=True)
+            self._merger.start()
+
+    def _tier(self, segment: Segment) -> int:
+        # size tier: segments within the same power of merge_factor (in memtables) share a tier
+        return int(math.log(max(segment.size, 1) / self.memtable_size, self.merge_factor)) if segment.size > self.memtable_size else 0
+
+    def _pick_merge(self, segments: Tuple[Segment, ...]) -> Optional[Tuple[int, int]]:
+        # the first run of merge_factor adjacent segments in the same tier, as (start, end), or None
+        run_start = 0
+        for i in range(1, len(segments) + 1):
+            if i == len(segments) or self._tier(segments[i]) != self._tier(segments[run_start]):
+                if i - run_start >= self.merge_factor:
+                    return run_start, run_start + self.merge_factor
+                run_start = i
+        return None
+
+    def _merge_once(self) -> bool:
+        # merges one run of segments if the policy asks for it; returns False if there was nothing to do
+        with self._lock:
+            segments = self._segments
+            picked = self._pick_merge(segments)
+            if picked is None:
+                return False
+            self._merging = True
+        start, end = picked
+        try:
+            merged = merge_segments(segments[start:end], self.posting_type, drop_deletes=(start == 0)) # no lock held here
+        except BaseException:
+            with self._lock:
+                self._merging = False
+                self._work.notify_all()
+            raise
+        with self._lock:
+            current = self._segments # flushes only add newer segments at the end, so start:end are still the same ones
+            self._segments = current[:start] + (merged,) + current[end:]
+            self._merging = False
+            self.merges += 1
+            self._work.notify_all()
+        return True
+
+    def _merge_inline(self):
+        # without a merger thread, the caller does the merging right after adding a segment
+        if not self.background:
+            while self._merge_once():
+                pass
+
+    def _merge_loop(self):
+        while True:
+            with self._work:
+                while not self._closed and self._pick_merge(self._segments) is None:
+                    self._work.wait()
+                if self._closed:
+                    return
+            self._merge_once()
+
+    def flush(self) -> None:
+        """
+        Freezes the memtable into a new segment (if it holds anything) and starts a new one.
+        """
+        with self._lock:
+            memtable = self._memtable
+            if not memtable.postings and not memtable.deletes:
+                return
+            self._memtable = _Memtable()
+            self.flushes += 1
+            # both swaps happen under the lock, so a search sees the postings either in the memtable or in the segment
+            self._segments = self._segments + (memtable.freeze(),) # nothing writes to the old memtable any more, its posting lists can be kept
+            self._work.notify_all()
+        self._merge_inline()
+
+    def insert(self, key: str, value: Any) -> None:
+        with self._lock:
+            memtable = self._memtable
+            postings = memtable.postings.get(key)
+            if postings is None:
+                postings = memtable.postings[key] = self._new_postings()
+            postings.add(value) # a delete recorded earlier still hides older segments' copy, never this one
+            memtable.size += 1
+            full = memtable.size >= self.memtable_size
+        if full:
+            self.flush()
+
+    def bulk_load(self, items: Iterable[Tuple[str, Iterable[Any]]]) -> None:
+        """
+        Adds a sorted run of (term, values) pairs as one new segment, without going
+        through the memtable (which is flushed first, so the run counts as newer).
+
+        Raises:
+            ValueError: If the terms are not in strictly ascending order.
+        """
+        segment_items = []
+        for term, values in items:
+            if segment_items and not segment_items[-1][0] < term:
+                raise ValueError(f"bulk_load expects strictly ascending keys, got {segment_items[-1][0]!r} before {term!r}")
+            postings = self._new_postings()
+            postings.merge(values)
+            segment_items.append((term, postings))
+        self.flush()
+        if segment_items:
+            with self._lock:
+                self._segments = self._segments + (Segment(segment_items, {}),)
+                self._work.notify_all()
+            self._merge_inline()
+
+    def delete(self, key: str, value: Any) -> bool:
+        # hides the posting in every older segment; the memtable's own copy (if any) is removed right away
+        if not contains_posting(self._sources(), key, value):
+            return False
+        with self._lock:
+            memtable = self._memtable
+            postings = memtable.postings.get(key)
+            if postings is not None:
+                postings.remove(value)
+                if not postings:
+                    del memtable.postings[key]
+            memtable.deletes.setdefault(key, set()).add(value)
+            memtable.size += 1
+            full = memtable.size >= self.memtable_size
+        if full:
+            self.flush()
+        return True
+
+    def _sources(self) -> Tuple[Any, ...]:
+        # the segments and the memtable, oldest first
+        with self._lock:
+            return self._segments + (self._memtable,)
+
+    def search(self, key: str) -> Optional[Any]:
+        return search_segments(self._sources(), key, self.posting_type)
+
+    def range(self, lo: Optional[str] = None, hi: Optional[str] = None) -> Iterator[Tuple[str, Any]]:
+        return self.snapshot().range(lo, hi) # a snapshot so a long scan isn't disturbed by inserts
+
+    def snapshot(self) -> IndexSnapshot:
+        """
+        Returns a read-only view of the index as it is now. The segments are shared, only
+        the memtable is copied.
+        """
+        with self._lock:
+            return IndexSnapshot(self._segments + (self._memtable.freeze(copy=True),), self.documents, self.posting_type)
+
+    def wait_for_merges(self) -> None:
+        """
+        Blocks until the merger has merged everything the policy asks for.
+        """
+        if not self.background:
+            return
+        with self._work:
+            while self._merging or self._pick_merge(self._segments) is not None:
+                self._work.wait()
+
+    def segment_sizes(self) -> List[int]:
+        return [segment.size for segment in self._segments]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.snapshot())
+
+    def get_keys_in_order(self) -> List[str]:
+        return list(self)
+
+    def count_keys(self) -> int:
+        return sum(1 for _ in self)
+
+    def get_avg_value_list_len(self):
+        element_lens = [len(postings) for term, postings in self.range()]
+        return (sum(element_lens) / len(element_lens) if element_lens else 0), element_lens
+
+    def close(self) -> None:
+        """
+        Stops the merger thread (after the merge it is running, if any).
+        """
+        with self._work:
+            self._closed = True
+            self._work.notify_all()
+        if self._merger is not None:
+            self._merger.join()
+
+    def __getstate__(self):
+        # locks and threads can't be pickled; the merger is started again on load
+        state = self.__dict__.copy()
+        for name in ("_lock", "_work", "_merging", "_closed", "_merger"):
+            state.pop(name)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._start()
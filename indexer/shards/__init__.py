@@ -0,0 +1 @@
+# shards module __init__ file
@@ -0,0 +1,275 @@
+import heapq
+import zlib
+import multiprocessing
+from itertools import islice
+from typing import *
+from indexer.abstract_index import AbstractIndex
+from indexer.postings.posting_list import PostingList
+from indexer.postings.intersect import intersect
+from indexer.maps.hash_map import HashMapIndex
+
+BATCH_SIZE = 10000 # inserts buffered per shard before they are sent to its worker in one message
+SCAN_FIRST_BATCH = 64   # keys a range scan fetches from each shard at first (a scan is often abandoned early)
+SCAN_MAX_BATCH = 4096   # the batches double up to this size while a scan keeps going
+
+
+def shard_of(term: str, num_shards: int) -> int:
+    # CRC-32 like HashMapIndex, so a term lands on the same shard in every process and every run
+    return zlib.crc32(term.encode("utf-8")) % num_shards
+
+def _insert_many(index: AbstractIndex, items: List[Tuple[Any, Any]]) -> None:
+    for key, value in items:
+        index.insert(key, value)
+
+def _range_batch(index: AbstractIndex, lo: Optional[str], hi: Optional[str], limit: int, with_postings: bool) -> List[Any]:
+    # the first limit (key, postings) pairs, or keys, of the shard's [lo, hi)
+    if with_postings:
+        return list(islice(index.range(lo, hi), limit))
+    return list(islice(index.range_keys(lo, hi), limit))
+
+# what a shard worker can be asked to do: command name -> function of (index, *args)
+SHARD_COMMANDS: Dict[str, Callable] = {
+    "insert_many": _insert_many,
+    "bulk_load": lambda index, items: index.bulk_load(items),
+    "search_many": lambda index, keys: index.search_many(keys),
+    "delete_many": lambda index, items: [index.delete(key, value) for key, value in items],
+    "range_batch": _range_batch,
+    "keys": lambda index: sorted(index.get_keys_in_order()),
+    "count_keys": lambda index: len(index.get_keys_in_order()), # not every index has count_keys()
+    "index": lambda index: index,
+}
+
+def serve_shard(conn: Any, index: AbstractIndex) -> None:
+    """
+    Main loop of a shard worker process: runs the commands sent by the ShardedIndex
+    on the shard's own index and sends back (True, result) or (False, exception).
+
+    Args:
+        conn (Any): The worker's end of the pipe.
+        index (AbstractIndex): The shard's index.
+    Returns:
+        None
+    """
+    while True:
+        command, args = conn.recv()
+        if command == "stop":
+            conn.close()
+            return
+        try:
+            conn.send((True, SHARD_COMMANDS[command](index, *args)))
+        except Exception as error:
+            conn.send((False, error))
+
+
+class ShardedIndex(AbstractIndex):
+    """
+    Splits the term space over num_shards indexes (any AbstractIndex type), each owned
+    by its own worker process, by the CRC-32 of the term. The coordinator (this object)
+    keeps the document dictionary and talks to the workers over pipes.
+
+    Every request is sent to all the shards involved before any answer is read, so the
+    shards work at the same time: a bulk load builds every shard in parallel, and a
+    batch of lookups (search_many, search_all, query plans) costs about as much as the
+    slowest shard's part of it. Range scans stream: every shard sends its part in
+    batches (small at first, doubling while the scan goes on) that are merged in key
+    order, so a scan that stops early only costs a few keys per shard. Single inserts are buffered per shard and sent BATCH_SIZE
+    at a time; any read sends the buffered inserts first, so reads always see them.
+
+    A lone search is one round trip to one worker, which is slower than searching a
+    local index; the speedup comes from batches and from spreading the build over cores.
+
+    Methods:
+        shard_of(term: str) -> int:
+            Returns the shard that owns a term.
+        shard_sizes() -> List[int]:
+            Returns the number of terms on each shard.
+        close() -> None:
+            Stops the worker processes.
+    """
+    def __init__(self, num_shards: int = 4, index_type: type = HashMapIndex, posting_type: type = PostingList,
+                 batch_size: int = BATCH_SIZE, **index_kwargs):
+        super().__init__(posting_type)
+        self.num_shards = num_shards
+        self.index_type = index_type
+        self.batch_size = batch_size
+        self._start([index_type(posting_type=posting_type, **index_kwargs) for _ in range(num_shards)])
+
+    def _start(self, shards: List[AbstractIndex]):
+        # starts one worker process per shard index
+        self._conns = []
+        self._workers = []
+        for shard in shards:
+            conn, worker_conn = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target=serve_shard, args=(worker_conn, shard), daemon=True)
+            worker.start()
+            worker_conn.close() # only the worker uses its end
+            self._conns.append(conn)
+            self._workers.append(worker)
+        self._pending: List[List[Tuple[Any, Any]]] = [[] for _ in shards]
+
+    def shard_of(self, term: str) -> int:
+        return shard_of(term, self.num_shards)
+
+    def _broadcast(self, requests: Dict[int, Tuple[str, tuple]]) -> Dict[int, Any]:
+        # sends every shard its request, then collects the answers, so the shards run at the same time
+        for shard, (command, args) in requests.items():
+            self._conns[shard].send((command, args))
+        results = {}
+        failure = None
+        for shard in requests:
+            ok, result = self._conns[shard].recv() # every answer is read even after a failure, to keep the pipes in step
+            if ok:
+                results[shard] = result
+            elif failure is None:
+                failure = result
+        if failure is not None:
+            raise failure
+        return results
+
+    def _send_pending(self, shards: Iterable[int]) -> None:
+        # sends the buffered inserts of the given shards
+        requests = {}
+        for shard in shards:
+            if self._pending[shard]:
+                requests[shard] = ("insert_many", (self._pending[shard],))
+                self._pending[shard] = []
+        if requests:
+            self._broadcast(requests)
+
+    def insert(self, key: str, value: Any) -> None:
+        shard = self.shard_of(key)
+        self._pending[shard].append((key, value))
+        if len(self._pending[shard]) >= self.batch_size:
+            self._send_pending([shard])
+
+    def bulk_load(self, items: Iterable[Tuple[str, Iterable[Any]]]) -> None:
+        """
+        Splits a sorted run by shard (each part stays sorted) and bulk loads every shard in parallel.
+        """
+        parts: List[List[Tuple[str, List[Any]]]] = [[] for _ in range(self.num_shards)]
+        for key, values in items:
+            parts[self.shard_of(key)].append((key, list(values)))
+        self._send_pending(range(self.num_shards))
+        self._broadcast({shard: ("bulk_load", (part,)) for shard, part in enumerate(parts) if part})
+
+    def search(self, key: str) -> Optional[Any]:
+        return self.search_many([key])[0]
+
+    def search_many(self, keys: Iterable[str]) -> List[Optional[Any]]:
+        # groups the keys by shard and asks all the owning shards at once
+        keys = list(keys)
+        by_shard: Dict[int, List[str]] = {}
+        for key in dict.fromkeys(keys):
+            by_shard.setdefault(self.shard_of(key), []).append(key)
+        self._send_pending(by_shard)
+        results = self._broadcast({shard: ("search_many", (shard_keys,)) for shard, shard_keys in by_shard.items()})
+        found = {}
+        for shard, shard_keys in by_shard.items():
+            found.update(zip(shard_keys, results[shard]))
+        return [found[key] for key in keys]
+
+    def search_all(self, keys: Iterable[str]) -> List[Any]:
+        # one parallel round of lookups instead of one lookup per word, then the intersection runs in the coordinator
+        postings_lists = self.search_many(dict.fromkeys(keys))
+        if not postings_lists or not all(postings_lists):
+            return []
+        return intersect(postings_lists)
+
+    def delete(self, key: str, value: Any) -> bool:
+        shard = self.shard_of(key)
+        self._send_pending([shard])
+        return self._broadcast({shard: ("delete_many", ([(key, value)],))})[shard][0]
+
+    def remove_document(self, doc: Any) -> int:
+        # the deletes for every shard go out in one parallel round instead of one round trip per word
+        doc_id = self._document_id(doc)
+        if doc_id is None:
+            return 0
+        by_shard: Dict[int, List[Tuple[str, int]]] = {}
+        for term in self.documents.terms_of(doc_id):
+            by_shard.setdefault(self.shard_of(term), []).append((term, doc_id))
+        self._send_pending(by_shard)
+        results = self._broadcast({shard: ("delete_many", (items,)) for shard, items in by_shard.items()})
+        self.documents.remove(doc_id)
+        return sum(sum(removed) for removed in results.values())
+
+    def range(self, lo: Optional[str] = None, hi: Optional[str] = None) -> Iterator[Tuple[str, Any]]:
+        return self._scan(lo, hi, True)
+
+    def range_keys(self, lo: Optional[str] = None, hi: Optional[str] = None) -> Iterator[str]:
+        # keys only, so a scan that just looks at the keys (fuzzy lookups) doesn't ship any postings
+        return self._scan(lo, hi, False)
+
+    def _scan(self, lo: Optional[str], hi: Optional[str], with_postings: bool) -> Iterator[Any]:
+        # the first batch of every shard is fetched in one parallel round, later batches as each shard's runs out
+        self._send_pending(range(self.num_shards))
+        first = self._broadcast({shard: ("range_batch", (lo, hi, SCAN_FIRST_BATCH, with_postings)) for shard in range(self.num_shards)})
+        streams = [self._shard_scan(shard, first[shard], hi, with_postings) for shard in range(self.num_shards)]
+        return heapq.merge(*streams, key=(lambda item: item[0]) if with_postings else None)
+
+    def _shard_scan(self, shard: int, batch: List[Any], hi: Optional[str], with_postings: bool) -> Iterator[Any]:
+        # one shard's part of a scan: each batch starts just after the last key of the one before
+        limit = SCAN_FIRST_BATCH
+        while True:
+            yield from batch
+            if len(batch) < limit:
+                return
+            last = batch[-1][0] if with_postings else batch[-1]
+            limit = min(2 * limit, SCAN_MAX_BATCH)
+            batch = self._broadcast({shard: ("range_batch", (last + "\0", hi, limit, with_postings))})[shard] # last + "\0" is the next possible key
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.get_keys_in_order())
+
+    def get_keys_in_order(self) -> List[str]:
+        self._send_pending(range(self.num_shards))
+        results = self._broadcast({shard: ("keys", ()) for shard in range(self.num_shards)})
+        return list(heapq.merge(*results.values()))
+
+    def count_keys(self) -> int:
+        return sum(self.shard_sizes())
+
+    def shard_sizes(self) -> List[int]:
+        """
+        Returns the number of terms on each shard (to check the terms are spread evenly).
+        """
+        self._send_pending(range(self.num_shards))
+        results = self._broadcast({shard: ("count_keys", ()) for shard in range(self.num_shards)})
+        return [results[shard] for shard in range(self.num_shards)]
+
+    def get_avg_value_list_len(self):
+        element_lens = [len(postings) for postings in self.search_many(self.get_keys_in_order())]
+        return (sum(element_lens) / len(element_lens) if element_lens else 0), element_lens
+
+    def close(self) -> None:
+        """
+        Stops the worker processes (the shard indexes are lost, pickle the ShardedIndex first to keep them).
+        """
+        self._send_pending(range(self.num_shards))
+        for conn, worker in zip(self._conns, self._workers):
+            conn.send(("stop", ()))
+            worker.join()
+            conn.close()
+        self._conns = []
+        self._workers = []
+
+    def __enter__(self) -> "ShardedIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __getstate__(self):
+        # the pipes and processes can't be pickled, so the shard indexes are fetched from the workers instead
+        self._send_pending(range(self.num_shards))
+        shards = self._broadcast({shard: ("index", ()) for shard in range(self.num_shards)})
+        state = self.__dict__.copy()
+        for name in ("_conns", "_workers", "_pending"):
+            state.pop(name)
+        state["_shards"] = [shards[shard] for shard in range(self.num_shards)]
+        return state
+
+    def __setstate__(self, state):
+        shards = state.pop("_shards")
+        self.__dict__.update(state)
+        self._start(shards)
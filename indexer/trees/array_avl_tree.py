@@ -0,0 +1,392 @@
+from array import array
+from typing import Optional, Any, List, Generator, Iterable, Iterator, Tuple
+
+from indexer.abstract_index import AbstractIndex
+from indexer.postings.posting_list import PostingList
+
+NIL = -1 # "no child" in the child arrays
+
+
+class ArrayAVLTreeIndex(AbstractIndex):
+    """
+    An AVL tree kept as a struct of arrays instead of linked node objects. Node n is
+    position n in every array:
+
+        _keys[n]      the key
+        _left[n]      the position of the left child (NIL if none)
+        _right[n]     the position of the right child (NIL if none)
+        _heights[n]   the height of the subtree rooted at n
+        _postings[n]  the posting list of the key
+
+    The child indexes and heights are packed machine integers in array.array, so a
+    node costs a few bytes in them plus its key and posting list, instead of a full
+    Python object per node. Searches only touch _keys and the child arrays.
+
+    Only the tree structure is packed. The keys are still a list of str objects, and the
+    postings are still one posting list object per node, not offsets into a shared
+    array('I') pool. The tree has to hold any posting_type (compressed, frequency or
+    positional lists don't fit a pool of bare doc ids), and search returns the live list
+    that insert and delete change in place, so a pool would mean copying on every search.
+    Most of the memory left is therefore keys and posting lists, and the saving over
+    AVLTreeIndex is about the per-node object overhead (roughly a fifth on 100k keys).
+
+    Balancing is the same as AVLTreeIndex: insert walks down, hangs the new node, then
+    walks back up updating heights and rotating the first unbalanced node. Positions
+    freed by delete are kept on a free list and reused by later inserts.
+
+    Methods:
+        insert(key: Any, value: Any) -> None:
+            Adds value to the posting list of key, adding key if needed.
+        search(key: Any) -> Optional[PostingList]:
+            Returns the posting list of key, or None if key isn't indexed.
+        delete(key: Any, value: Any) -> bool:
+            Removes value from key's posting list, and key (rebalancing) once the list is empty.
+        bulk_load(items: Iterable[Tuple[Any, Iterable[Any]]]) -> None:
+            Builds a perfectly balanced tree from a sorted stream of (key, values) pairs.
+        range(lo: Any, hi: Any) -> Iterator[Tuple[Any, PostingList]]:
+            Lazily yields the (key, values) pairs with lo <= key < hi in order.
+        count_nodes() -> int:
+            Counts the nodes in the tree.
+        tree_height() -> int:
+            Returns the height of the tree.
+        get_keys_in_order() -> List[Any]:
+            Returns the keys in ascending order.
+        get_leaf_keys() -> List[Any]:
+            Returns the keys of the leaves, left to right.
+        get_balance_factors() -> List[Tuple[Any, int]]:
+            Returns (key, balance factor) for every node, in key order.
+        get_avg_value_list_len() -> float:
+            Calculates the average length of the posting lists.
+    """
+
+    def __init__(self, posting_type: type = PostingList):
+        super().__init__(posting_type)
+        self.root: int = NIL
+        self._keys: List[Any] = []
+        self._left = array('i')
+        self._right = array('i')
+        self._heights = array('B') # an AVL tree of 2**64 nodes is under 100 high
+        self._postings: List[PostingList] = []
+        self._free: List[int] = [] # positions of deleted nodes
+
+    def _new_node(self, key: Any) -> int:
+        """
+        Stores a childless node for key (in a freed position if there is one) and returns its position.
+        """
+        if self._free:
+            n = self._free.pop()
+            self._keys[n] = key
+            self._left[n] = NIL
+            self._right[n] = NIL
+            self._heights[n] = 1
+            self._postings[n] = self._new_postings()
+            return n
+        self._keys.append(key)
+        self._left.append(NIL)
+        self._right.append(NIL)
+        self._heights.append(1)
+        self._postings.append(self._new_postings())
+        return len(self._keys) - 1
+
+    def _height(self, n: int) -> int:
+        return self._heights[n] if n != NIL else 0
+
+    def _update_height(self, n: int) -> None:
+        self._heights[n] = 1 + max(self._height(self._left[n]), self._height(self._right[n]))
+
+    def _rotate_right(self, y: int) -> int:
+        # the left child of y becomes the root of the subtree
+        left, right = self._left, self._right
+        x = left[y]
+        left[y] = right[x]
+        right[x] = y
+        self._update_height(y)
+        self._update_height(x)
+        return x
+
+    def _rotate_left(self, x: int) -> int:
+        # the right child of x becomes the root of the subtree
+        left, right = self._left, self._right
+        y = right[x]
+        right[x] = left[y]
+        left[y] = x
+        self._update_height(x)
+        self._update_height(y)
+        return y
+
+    def _replace_child(self, parent: int, old: int, new: int) -> None:
+        if parent == NIL:
+            self.root = new
+        elif self._left[parent] == old:
+            self._left[parent] = new
+        else:
+            self._right[parent] = new
+
+    def insert(self, key: Any, value: Any) -> None:
+        """
+        Adds value to the posting list of key, adding key to the tree (and rebalancing) if it's new.
+
+        Parameters:
+            key (Any): The key to be inserted.
+            value (Any): The value associated with the key.
+
+        Returns:
+            None
+        """
+        keys, left, right = self._keys, self._left, self._right
+        path = []
+        n = self.root
+        while n != NIL:
+            if key < keys[n]:
+                path.append(n)
+                n = left[n]
+            elif key > keys[n]:
+                path.append(n)
+                n = right[n]
+            else:
+                self._postings[n].add(value)
+                return
+        n = self._new_node(key)
+        self._postings[n].add(value)
+        if not path:
+            self.root = n
+            return
+        if key < keys[path[-1]]:
+            left[path[-1]] = n
+        else:
+            right[path[-1]] = n
+
+        for i in range(len(path) - 1, -1, -1):
+            current = path[i]
+            old_height = self._heights[current]
+            self._update_height(current)
+            balance_factor = self._height(left[current]) - self._height(right[current])
+            if balance_factor >= 2:
+                if key > keys[left[current]]: # LR
+                    left[current] = self._rotate_left(left[current])
+                subtree = self._rotate_right(current)
+            elif balance_factor <= -2:
+                if key < keys[right[current]]: # RL
+                    right[current] = self._rotate_right(right[current])
+                subtree = self._rotate_left(current)
+            else:
+                if self._heights[current] == old_height:
+                    return
+                continue
+            self._replace_child(path[i - 1] if i > 0 else NIL, current, subtree)
+            return
+
+    def _rebalance(self, path: List[int]) -> None:
+        # after a removal: update heights from the bottom of path up to the root, rotating wherever needed
+        left, right = self._left, self._right
+        for i in range(len(path) - 1, -1, -1):
+            current = path[i]
+            self._update_height(current)
+            balance_factor = self._height(left[current]) - self._height(right[current])
+            if balance_factor >= 2:
+                if self._height(left[left[current]]) < self._height(right[left[current]]): # LR
+                    left[current] = self._rotate_left(left[current])
+                subtree = self._rotate_right(current)
+            elif balance_factor <= -2:
+                if self._height(right[right[current]]) < self._height(left[right[current]]): # RL
+                    right[current] = self._rotate_right(right[current])
+                subtree = self._rotate_left(current)
+            else:
+                continue
+            self._replace_child(path[i - 1] if i > 0 else NIL, current, subtree)
+
+    def delete(self, key: Any, value: Any) -> bool:
+        """
+        Removes value from the posting list of key. Once the list is empty the node is
+        removed like in AVLTreeIndex (a node with two children takes over its in-order
+        successor, which is removed instead), the tree is rebalanced up to the root, and
+        the freed position goes on the free list.
+
+        Parameters:
+            key (Any): The key (word).
+            value (Any): The value (doc id) to remove.
+
+        Returns:
+            bool: True if value was stored under key.
+        """
+        keys, left, right = self._keys, self._left, self._right
+        path = []
+        n = self.root
+        while n != NIL and keys[n] != key:
+            path.append(n)
+            n = left[n] if key < keys[n] else right[n]
+        if n == NIL or not self._postings[n].remove(value):
+            return False
+        if len(self._postings[n]) > 0:
+            return True
+
+        if left[n] != NIL and right[n] != NIL:
+            path.append(n)
+            successor = right[n]
+            while left[successor] != NIL:
+                path.append(successor)
+                successor = left[successor]
+            keys[n] = keys[successor]
+            self._postings[n] = self._postings[successor]
+            n, child = successor, right[successor]
+        else:
+            child = left[n] if left[n] != NIL else right[n]
+        self._replace_child(path[-1] if path else NIL, n, child)
+        keys[n] = None
+        self._postings[n] = None
+        left[n] = right[n] = NIL
+        self._heights[n] = 0
+        self._free.append(n)
+        self._rebalance(path)
+        return True
+
+    def bulk_load(self, items: Iterable[Tuple[Any, Iterable[Any]]]) -> None:
+        """
+        Builds a perfectly balanced tree from (key, values) pairs sorted by key. The nodes
+        are stored in key order, so the middle of every slice is its subtree root and the
+        height of a slice of n nodes is n.bit_length(). A tree that already has nodes
+        falls back to inserting the values one at a time.
+
+        Parameters:
+            items (Iterable[Tuple[Any, Iterable[Any]]]): (key, values) pairs in strictly ascending key order.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the keys are not in strictly ascending order.
+        """
+        if self.root != NIL:
+            super().bulk_load(items)
+            return
+        if self._free: # everything was deleted, start again from empty arrays
+            self._keys, self._postings, self._free = [], [], []
+            self._left, self._right, self._heights = array('i'), array('i'), array('B')
+        items = list(items)
+        for i in range(1, len(items)):
+            if not items[i - 1][0] < items[i][0]:
+                raise ValueError(f"bulk_load expects strictly ascending keys, got {items[i - 1][0]!r} before {items[i][0]!r}")
+        for key, values in items:
+            self._postings[self._new_node(key)].merge(values)
+
+        def mid_of(lo, hi):
+            return (lo + hi) // 2 if lo < hi else NIL
+
+        self.root = mid_of(0, len(self._keys))
+        stack = [(0, len(self._keys))] # slices still to wire up
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            self._left[mid] = mid_of(lo, mid)
+            self._right[mid] = mid_of(mid + 1, hi)
+            self._heights[mid] = (hi - lo).bit_length()
+            stack.append((lo, mid))
+            stack.append((mid + 1, hi))
+
+    def search(self, key: Any) -> Optional[PostingList]:
+        """
+        Returns the posting list of key, or None if key isn't indexed.
+
+        Parameters:
+            key (Any): The key to search for.
+
+        Returns:
+            Optional[PostingList]: The values associated with key.
+        """
+        keys, left, right = self._keys, self._left, self._right
+        n = self.root
+        while n != NIL:
+            node_key = keys[n]
+            if key < node_key:
+                n = left[n]
+            elif key > node_key:
+                n = right[n]
+            else:
+                return self._postings[n]
+        return None
+
+    def _inorder(self, lo: Optional[Any] = None) -> Generator[int, None, None]:
+        """
+        Yields the positions of the nodes with key >= lo in key order, keeping the nodes
+        still to be visited on an explicit stack.
+        """
+        keys, left, right = self._keys, self._left, self._right
+        stack = []
+        n = self.root
+        while n != NIL: # seek to lo
+            if lo is None or keys[n] >= lo:
+                stack.append(n)
+                n = left[n]
+            else:
+                n = right[n]
+        while stack:
+            n = stack.pop()
+            yield n
+            n = right[n]
+            while n != NIL:
+                stack.append(n)
+                n = left[n]
+
+    def range(self, lo: Optional[Any] = None, hi: Optional[Any] = None) -> Iterator[Tuple[Any, PostingList]]:
+        """
+        Lazily yields the (key, values) pairs with lo <= key < hi in ascending order.
+
+        Parameters:
+            lo (Optional[Any]): The first key to include (None starts at the smallest key).
+            hi (Optional[Any]): The key to stop before (None runs to the largest key).
+
+        Returns:
+            Iterator[Tuple[Any, PostingList]]: The matching (key, values) pairs.
+        """
+        for n in self._inorder(lo):
+            key = self._keys[n]
+            if hi is not None and key >= hi:
+                return
+            yield key, self._postings[n]
+
+    def __iter__(self) -> Generator[Any, None, None]:
+        for n in self._inorder():
+            yield self._keys[n]
+
+    def get_keys_in_order(self) -> List[Any]:
+        """
+        Returns a list of the keys in ascending order.
+        """
+        return list(self)
+
+    def count_nodes(self) -> int:
+        """
+        Counts the nodes in the tree.
+        """
+        return len(self._keys) - len(self._free)
+
+    def tree_height(self) -> int:
+        """
+        Returns the height of the tree (0 when it's empty).
+        """
+        return self._height(self.root)
+
+    def get_leaf_keys(self) -> List[Any]:
+        """
+        Returns the keys of the leaf nodes, left to right.
+        """
+        left, right = self._left, self._right
+        return [self._keys[n] for n in self._inorder() if left[n] == NIL and right[n] == NIL]
+
+    def get_balance_factors(self) -> List[Tuple[Any, int]]:
+        """
+        Returns (key, balance factor) for every node, in key order.
+        """
+        return [(self._keys[n], self._height(self._left[n]) - self._height(self._right[n])) for n in self._inorder()]
+
+    def get_avg_value_list_len(self) -> float:
+        """
+        Calculates the average length of the posting lists in the tree.
+
+        Returns:
+            float: The average posting list length (0 for an empty tree).
+        """
+        lengths = [len(postings) for postings in self._postings if postings is not None]
+        return sum(lengths) / len(lengths) if lengths else 0
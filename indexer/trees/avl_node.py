@@ -14,8 +14,10 @@ class AVLNode(BSTNode):
         __init__(key: Any): Initializes a new instance of the AVLNode class 
         with the given key.
     """
-    def __init__(self, key: Any):
-        super().__init__(key)
+    __slots__ = ("height",) # the BSTNode slots are inherited
+
+    def __init__(self, key: Any, values: Optional[Any] = None):
+        super().__init__(key, values)
         self.left: Optional['AVLNode'] = None
         self.right: Optional['AVLNode'] = None
         self.height: int = 1
@@ -1,8 +1,8 @@
-import string
-from typing import List, Optional, Tuple, Any
+from typing import List, Optional, Tuple, Any, Iterable
 
 from indexer.trees.bst_index import BinarySearchTreeIndex
 from indexer.trees.avl_node import AVLNode
+from indexer.postings.posting_list import PostingList
 
 class AVLTreeIndex(BinarySearchTreeIndex):
     """
@@ -17,8 +17,8 @@ class AVLTreeIndex(BinarySearchTreeIndex):
             Inserts a new node with key and value into the AVL Tree
     """
     
-    def __init(self):
-       super().__init__()
+    def __init__(self, posting_type: type = PostingList):
+       super().__init__(posting_type)
        self.root: Optional[AVLNode] = None
 
     
@@ -37,6 +37,24 @@ class AVLTreeIndex(BinarySearchTreeIndex):
         return node.height
     
 
+    def _new_node(self, key: Any) -> AVLNode:
+        """
+        Creates an AVLNode for the given key with an empty posting list.
+        """
+        return AVLNode(key, self._new_postings())
+
+
+    def _build_balanced(self, items: List[Tuple[Any, Iterable[Any]]], lo: int, hi: int) -> Optional[AVLNode]:
+        """
+        Builds a perfectly balanced subtree like the BST version and fills in the
+        heights on the way back up, so the result is already a valid AVL tree.
+        """
+        node = super()._build_balanced(items, lo, hi)
+        if node:
+            node.height = 1 + max(self._height(node.left), self._height(node.right))
+        return node
+
+
     def _rotate_right(self, y: AVLNode) -> AVLNode:
         """
         Performs a right rotation on the AVL tree. For when too many nodes are inserted left.
@@ -86,53 +104,42 @@ class AVLTreeIndex(BinarySearchTreeIndex):
         return current
 
 
-    def _insert_recursive(self, current: Optional[AVLNode], key: Any, value: Any) -> AVLNode:
+    def _rebalance(self, path: List[AVLNode]) -> None:
         """
-        Recursively inserts a new node with the given key and value into the AVL tree.
-        Args:
-            current (Optional[AVLNode]): The current node being considered during the recursive insertion.
-            key (Any): The key of the new node.
-            value (Any): The value of the new node.
+        Walks back up from a removed node (path is root first) updating heights. Unlike
+        an insert, a rotation after a removal can leave the subtree one shorter, so the
+        walk goes all the way to the root and may rotate at several levels.
+
+        Parameters:
+            path (List[AVLNode]): The nodes from the root down to the parent of the removed node.
+
         Returns:
-            AVLNode: The updated AVL tree with the new node inserted.
+            None
         """
+        for i in range(len(path) - 1, -1, -1):
+            current = path[i]
+            current.height = 1 + max(self._height(current.left), self._height(current.right))
+            balance_factor = self._height(current.left) - self._height(current.right)
+            if balance_factor >= 2:
+                if self._height(current.left.left) < self._height(current.left.right): #LR
+                    current.left = self._rotate_left(current.left)
+                subtree = self._rotate_right(current) #LL
+            elif balance_factor <= -2:
+                if self._height(current.right.right) < self._height(current.right.left): #RL
+                    current.right = self._rotate_right(current.right)
+                subtree = self._rotate_left(current) #RR
+            else:
+                continue
+            self._replace_child(path[i - 1] if i > 0 else None, current, subtree)
 
-        #normal binary tree to insert the node
-        if not current:
-            node = AVLNode(key)
-            node.add_value(value)
-            return node
-        current = super()._insert_recursive(current, key, value)
-        
-        current.height = 1 + max(self._height(current.left), self._height(current.right)) #update height of tree @ current node
-        balance_factor = self._height(current.left) - self._height(current.right)  #find balance factor @ current node
-
-        #determine if any rotations of the tree with the newly added node are needed based on the above calculated balance factor:
-        #1. too many nodes inserted to the left (LL and LR cases):
-        if balance_factor >= 2:    
-            if key < current.left.key: #LL
-                return self._rotate_right(current)
-            elif key > current.left.key: #LR 
-                current.left = self._rotate_left(current.left)
-                return self._rotate_right(current) 
-            else: current.add_value(value)
-
-        #2. too many nodes inserted to the right (RR and RL cases):
-        elif balance_factor <= -2:
-            if key > current.right.key: #RR
-                return self._rotate_left(current)
-            elif key < current.right.key: #RL
-                current.right = self._rotate_right(current.right)
-                return self._rotate_left(current)
-            else: current.add_value(value)
-        else:
-            return current
-        
 
     def insert(self, key: Any, value: Any) -> None:
         """
         Inserts a key-value pair into the AVL tree. If the key exists, the
          value will be appended to the list of values in the node. 
+        The new node is hung in place like in a BST, then the nodes passed on the way
+        down are walked back up (no recursion) to update their heights and rotate the
+        first one that became unbalanced.
 
         Parameters:
             key (Any): The key to be inserted.
@@ -141,33 +148,49 @@ class AVLTreeIndex(BinarySearchTreeIndex):
         Returns:
             None
         """
-        if self.root is None:
-            self.root = AVLNode(key)
-            self.root.add_value(value)
-        else:
-            super().insert(key, value)
+        path, node = self._descend(key)
+        if node is not None: # key already indexed, the shape doesn't change
+            node.add_value(value)
+            return
+        node = self._new_node(key)
+        node.add_value(value)
+        self._attach(path[-1] if path else None, node)
+
+        for i in range(len(path) - 1, -1, -1):
+            current = path[i]
+            old_height = current.height
+            current.height = 1 + max(self._height(current.left), self._height(current.right)) #update height of tree @ current node
+            balance_factor = self._height(current.left) - self._height(current.right)  #find balance factor @ current node
+
+            #determine if any rotations of the tree with the newly added node are needed based on the above calculated balance factor:
+            #1. too many nodes inserted to the left (LL and LR cases):
+            if balance_factor >= 2:
+                if key > current.left.key: #LR
+                    current.left = self._rotate_left(current.left)
+                subtree = self._rotate_right(current) #LL
+            #2. too many nodes inserted to the right (RR and RL cases):
+            elif balance_factor <= -2:
+                if key < current.right.key: #RL
+                    current.right = self._rotate_right(current.right)
+                subtree = self._rotate_left(current) #RR
+            else:
+                if current.height == old_height:
+                    return # nothing above this node changes height
+                continue
+            # a rotation brings the subtree back to the height it had before the insert, so the ancestors are fine
+            self._replace_child(path[i - 1] if i > 0 else None, current, subtree)
+            return
 
 
     def _inorder_traversal(self, current: Optional[AVLNode], result: List[Any]) -> None:
-         if current is None:
-             return
-        
-         self._inorder_traversal(current.left, result)
-         result.append(current.key)
-         self._inorder_traversal(current.right, result)
+         result.extend(node.key for node in self._inorder_traversal_generator(current))
          
 
     def get_balance_factors(self, current: Optional[AVLNode]) -> List[Tuple[Any, int]]:
-
-        if current is None:
-            return []
-        
-        left_factors = self.get_balance_factors(current.left)
-        balance_factor = self._height(current.left) - self._height(current.right)
-        current_factor = [(current.key, balance_factor)]
-        right_factors = self.get_balance_factors(current.right)
-        
-        return left_factors + current_factor + right_factors
+        """
+        Returns the (key, balance factor) of every node under current, in key order.
+        """
+        return [(node.key, self._height(node.left) - self._height(node.right)) for node in self._inorder_traversal_generator(current)]
         
     
 
@@ -0,0 +1,316 @@
+from bisect import bisect_left, bisect_right
+from typing import Optional, Any, List, Generator, Iterable, Iterator, Tuple
+
+from indexer.abstract_index import AbstractIndex
+from indexer.postings.posting_list import PostingList
+from indexer.trees.page_store import MemoryPageStore
+
+
+class LeafPage:
+    """
+    A B+-tree leaf: the keys in ascending order, their posting lists in the same
+    order, and the page id of the next leaf (None for the last one).
+    """
+    def __init__(self, keys: Optional[List[Any]] = None, values: Optional[List[Any]] = None, next_leaf: Optional[int] = None):
+        self.keys: List[Any] = keys if keys is not None else []
+        self.values: List[Any] = values if values is not None else []
+        self.next_leaf: Optional[int] = next_leaf
+
+
+class InternalPage:
+    """
+    A B+-tree branch: children[i] holds the keys below keys[i], and the last child
+    the keys from keys[-1] on. Children are page ids.
+    """
+    def __init__(self, keys: List[Any], children: List[int]):
+        self.keys: List[Any] = keys
+        self.children: List[int] = children
+
+
+class BPlusTreeIndex(AbstractIndex):
+    """
+    A B+-tree implementation of an index. Every node is a page holding up to `fanout`
+    keys in one sorted list, so a lookup does a binary search inside a handful of pages
+    instead of following a pointer per comparison like the BST/AVL (a 260k word
+    vocabulary is 3-4 pages deep at the default fanout). The posting lists live only
+    in the leaves, and the leaves are linked left to right, so range and prefix scans
+    just walk along the leaves.
+
+    Pages are kept in a page store and referred to by page id. The default
+    MemoryPageStore keeps them in a list; a FilePageStore keeps them in a file, so the
+    same tree can live on disk.
+
+    Methods:
+        insert(key: Any, value: Any) -> None:
+            Adds value to the posting list of key, adding key if needed.
+        search(key: Any) -> Optional[PostingList]:
+            Returns the posting list of key, or None if key isn't indexed.
+        delete(key: Any, value: Any) -> bool:
+            Removes value from key's posting list, and key once the list is empty.
+        bulk_load(items: Iterable[Tuple[Any, Iterable[Any]]]) -> None:
+            Builds the tree bottom up from a sorted stream of (key, values) pairs.
+        range(lo: Any, hi: Any) -> Iterator[Tuple[Any, PostingList]]:
+            Lazily yields the (key, values) pairs with lo <= key < hi in order.
+        get_keys_in_order() -> List[Any]:
+            Returns the indexed keys in ascending order.
+        tree_height() -> int:
+            Returns the number of page levels.
+        count_pages() -> int:
+            Counts the pages in the tree.
+        get_avg_value_list_len() -> float:
+            Calculates the average length of the posting lists.
+    """
+
+    def __init__(self, fanout: int = 64, store: Optional[Any] = None, posting_type: type = PostingList):
+        super().__init__(posting_type)
+        if fanout < 3:
+            raise ValueError(f"fanout must be at least 3, got {fanout}")
+        self.fanout: int = fanout
+        self.store = store if store is not None else MemoryPageStore()
+        if self.store.root_id is None: # a FilePageStore that already holds a tree keeps its root
+            self.store.root_id = self.store.allocate(LeafPage())
+
+    def _find_leaf(self, key: Any) -> Tuple[int, LeafPage, List[Tuple[int, InternalPage, int]]]:
+        """
+        Walks down from the root to the leaf that holds (or would hold) key.
+        Args:
+            key (Any): The key to look for.
+        Returns:
+            Tuple[int, LeafPage, List[Tuple[int, InternalPage, int]]]: The leaf's page id, the leaf, and the
+            (page id, page, child position) of every branch on the way down.
+        """
+        path = []
+        page_id = self.store.root_id
+        page = self.store.read(page_id)
+        while isinstance(page, InternalPage):
+            i = bisect_right(page.keys, key)
+            path.append((page_id, page, i))
+            page_id = page.children[i]
+            page = self.store.read(page_id)
+        return page_id, page, path
+
+    def insert(self, key: Any, value: Any) -> None:
+        """
+        Adds value to the posting list of key, adding key to the tree if it's new. A leaf
+        that overflows is split in half and the first key of the new right half goes up
+        into the parent, which may split in turn; a split root grows the tree by a level.
+
+        Parameters:
+            key (Any): The key (word).
+            value (Any): The value (doc id) to add.
+
+        Returns:
+            None
+        """
+        store = self.store
+        leaf_id, leaf, path = self._find_leaf(key)
+        i = bisect_left(leaf.keys, key)
+        if i < len(leaf.keys) and leaf.keys[i] == key:
+            leaf.values[i].add(value)
+            store.write(leaf_id, leaf)
+            return
+        postings = self._new_postings()
+        postings.add(value)
+        leaf.keys.insert(i, key)
+        leaf.values.insert(i, postings)
+        if len(leaf.keys) <= self.fanout:
+            store.write(leaf_id, leaf)
+            return
+
+        mid = len(leaf.keys) // 2
+        right = LeafPage(leaf.keys[mid:], leaf.values[mid:], leaf.next_leaf)
+        del leaf.keys[mid:]
+        del leaf.values[mid:]
+        right_id = store.allocate(right)
+        leaf.next_leaf = right_id
+        store.write(leaf_id, leaf)
+        separator = right.keys[0]
+
+        while path: # push the separator up until a branch has room for it
+            page_id, page, i = path.pop()
+            page.keys.insert(i, separator)
+            page.children.insert(i + 1, right_id)
+            if len(page.keys) <= self.fanout:
+                store.write(page_id, page)
+                return
+            mid = len(page.keys) // 2
+            separator = page.keys[mid]
+            right = InternalPage(page.keys[mid + 1:], page.children[mid + 1:])
+            del page.keys[mid:]
+            del page.children[mid + 1:]
+            right_id = store.allocate(right)
+            store.write(page_id, page)
+
+        store.root_id = store.allocate(InternalPage([separator], [store.root_id, right_id]))
+
+    def bulk_load(self, items: Iterable[Tuple[Any, Iterable[Any]]]) -> None:
+        """
+        Builds the tree from a stream of (key, values) pairs sorted by key. An empty tree
+        is built bottom up: the leaves are filled and linked in one pass, then every level
+        of branches is built from the first keys of the level below. A tree that already
+        holds keys falls back to inserting the values one at a time.
+
+        Parameters:
+            items (Iterable[Tuple[Any, Iterable[Any]]]): (key, values) pairs in strictly ascending key order.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the keys are not in strictly ascending order.
+        """
+        store = self.store
+        root = store.read(store.root_id)
+        if isinstance(root, InternalPage) or root.keys:
+            super().bulk_load(items)
+            return
+
+        level = [] # (first key, page id) of every page in the level being built
+        leaf = root
+        leaf_id = store.root_id
+        previous = None
+        for key, values in items:
+            if previous is not None and not previous < key:
+                raise ValueError(f"bulk_load expects strictly ascending keys, got {previous!r} before {key!r}")
+            previous = key
+            if len(leaf.keys) == self.fanout:
+                next_leaf = LeafPage()
+                leaf.next_leaf = store.allocate(next_leaf)
+                store.write(leaf_id, leaf)
+                level.append((leaf.keys[0], leaf_id))
+                leaf, leaf_id = next_leaf, leaf.next_leaf
+            postings = self._new_postings()
+            postings.merge(values)
+            leaf.keys.append(key)
+            leaf.values.append(postings)
+        store.write(leaf_id, leaf)
+        level.append((leaf.keys[0] if leaf.keys else None, leaf_id))
+
+        while len(level) > 1:
+            # split the level into as few groups of at most fanout + 1 children as possible, evened out so the
+            # last group never ends up with a single child
+            groups = -(-len(level) // (self.fanout + 1))
+            parents = []
+            for g in range(groups):
+                group = level[g * len(level) // groups:(g + 1) * len(level) // groups]
+                page = InternalPage([first for first, page_id in group[1:]], [page_id for first, page_id in group])
+                parents.append((group[0][0], store.allocate(page)))
+            level = parents
+        store.root_id = level[0][1]
+
+    def delete(self, key: Any, value: Any) -> bool:
+        """
+        Removes value from the posting list of key, and key from its leaf once the list
+        is empty. Leaves are allowed to run low (even empty) rather than being merged
+        with their neighbours: the separators above them stay valid and range scans step
+        over empty leaves, and deletions are rare next to inserts in this index.
+
+        Parameters:
+            key (Any): The key (word).
+            value (Any): The value (doc id) to remove.
+
+        Returns:
+            bool: True if value was stored under key.
+        """
+        leaf_id, leaf, path = self._find_leaf(key)
+        i = bisect_left(leaf.keys, key)
+        if i == len(leaf.keys) or leaf.keys[i] != key or not leaf.values[i].remove(value):
+            return False
+        if not leaf.values[i]:
+            del leaf.keys[i]
+            del leaf.values[i]
+        self.store.write(leaf_id, leaf)
+        return True
+
+    def search(self, key: Any) -> Optional[PostingList]:
+        """
+        Returns the posting list of key, or None if key isn't indexed.
+
+        Parameters:
+            key (Any): The key to search for.
+
+        Returns:
+            Optional[PostingList]: The values associated with key.
+        """
+        store = self.store
+        page = store.read(store.root_id)
+        while isinstance(page, InternalPage):
+            page = store.read(page.children[bisect_right(page.keys, key)])
+        i = bisect_left(page.keys, key)
+        if i < len(page.keys) and page.keys[i] == key:
+            return page.values[i]
+        return None
+
+    def range(self, lo: Optional[Any] = None, hi: Optional[Any] = None) -> Iterator[Tuple[Any, PostingList]]:
+        """
+        Lazily yields the (key, values) pairs with lo <= key < hi in ascending order: one
+        walk down to the leaf for lo, then along the leaf links.
+
+        Parameters:
+            lo (Optional[Any]): The first key to include (None starts at the smallest key).
+            hi (Optional[Any]): The key to stop before (None runs to the largest key).
+
+        Returns:
+            Iterator[Tuple[Any, PostingList]]: The matching (key, values) pairs.
+        """
+        store = self.store
+        page = store.read(store.root_id)
+        while isinstance(page, InternalPage):
+            page = store.read(page.children[0 if lo is None else bisect_right(page.keys, lo)])
+        i = 0 if lo is None else bisect_left(page.keys, lo)
+        while True:
+            for j in range(i, len(page.keys)):
+                if hi is not None and page.keys[j] >= hi:
+                    return
+                yield page.keys[j], page.values[j]
+            if page.next_leaf is None:
+                return
+            page = store.read(page.next_leaf)
+            i = 0
+
+    def __iter__(self) -> Generator[Any, None, None]:
+        for key, values in self.range():
+            yield key
+
+    def get_keys_in_order(self) -> List[Any]:
+        """
+        Returns a list of the indexed keys in ascending order.
+
+        Returns:
+            List[Any]: The keys in ascending order.
+        """
+        return list(self)
+
+    def tree_height(self) -> int:
+        """
+        Returns the number of levels of pages (1 for a tree that is a single leaf).
+        """
+        height = 1
+        page = self.store.read(self.store.root_id)
+        while isinstance(page, InternalPage):
+            page = self.store.read(page.children[0])
+            height += 1
+        return height
+
+    def count_pages(self) -> int:
+        """
+        Counts the pages reachable from the root.
+        """
+        count = 0
+        stack = [self.store.root_id]
+        while stack:
+            page = self.store.read(stack.pop())
+            count += 1
+            if isinstance(page, InternalPage):
+                stack.extend(page.children)
+        return count
+
+    def get_avg_value_list_len(self) -> float:
+        """
+        Calculates the average length of the posting lists in the tree.
+
+        Returns:
+            float: The average posting list length (0 for an empty tree).
+        """
+        lengths = [len(values) for key, values in self.range()]
+        return sum(lengths) / len(lengths) if lengths else 0
@@ -1,8 +1,10 @@
-from typing import Optional, Any, List, Generator
+from typing import Optional, Any, List, Generator, Iterable, Iterator, Tuple
 from collections import deque
+from bisect import bisect_left
 
 from indexer.abstract_index import AbstractIndex
 from indexer.trees.bst_node import BSTNode
+from indexer.postings.posting_list import PostingList
 
 class BinarySearchTreeIndex(AbstractIndex):
     """
@@ -15,6 +17,14 @@ class BinarySearchTreeIndex(AbstractIndex):
             Inserts a new node with the given key and value into the binary search tree.
         search(key: Any) -> List[Any]:
             Searches for nodes with the given key in the binary search tree and returns their values.
+        search_many(keys: Iterable[Any]) -> List[Any]:
+            Searches for a batch of keys in a single traversal of the tree.
+        delete(key: Any, value: Any) -> bool:
+            Removes value from key's list, and the node once its list is empty.
+        range(lo: Any, hi: Any) -> Iterator[Tuple[Any, Any]]:
+            Lazily yields the (key, values) pairs with lo <= key < hi in order.
+        prefix(prefix: str) -> Iterator[Tuple[Any, Any]]:
+            Lazily yields the (key, values) pairs whose key starts with prefix.
         count_nodes() -> int:
             Counts the number of nodes in the binary search tree.
         tree_height() -> int:
@@ -25,119 +35,210 @@ class BinarySearchTreeIndex(AbstractIndex):
             Returns a list of keys of leaf nodes in the binary search tree.
         get_avg_value_list_len() -> float:
             Calculates the average length of value lists in the binary search tree.
+        bulk_load(items: Iterable[Tuple[Any, Iterable[Any]]]) -> None:
+            Builds a perfectly balanced tree from a sorted stream of (key, values) pairs.
     """
     
-    def __init__(self):
-        super().__init__()
+    def __init__(self, posting_type: type = PostingList):
+        super().__init__(posting_type)
         self.root: Optional[BSTNode] = None
     
-    def _insert_recursive(self, current_node: Optional[BSTNode], key: Any, value: Any) -> BSTNode:
+    def _new_node(self, key: Any) -> BSTNode:
         """
-        Recursively inserts a new node with the given key and value into the binary search tree.
-        If key is found, value is added to key's associated list. 
-        If key is not found, it is added and value is appended as its first doc. 
+        Creates a node of the type this tree is built from, with an empty posting list.
         Args:
-            current_node (Optional[BSTNode]): The current node being evaluated.
             key (Any): The key of the new node.
-            value (Any): The value of the new node.
         Returns:
-            BSTNode: The root node of the modified binary search tree.
-        """
-        if not current_node:
-            node = BSTNode(key)
-            node.add_value(value)
-            return node
-        elif key < current_node.key:
-            current_node.left = self._insert_recursive(current_node.left, key, value)
-        elif key > current_node.key:
-            current_node.right = self._insert_recursive(current_node.right, key, value)
-        elif key == current_node.key:
-            current_node.add_value(value)
-        return current_node
-
-    def _search_recursive(self, node: Optional[BSTNode], key: Any) -> List[Any]:
-        """
-        Recursively searches for a key in the binary search tree. Returns the list of docs
-        in which the key is found. 
+            BSTNode: A new node with no values.
+        """
+        return BSTNode(key, self._new_postings())
+
+    def _build_balanced(self, items: List[Tuple[Any, Iterable[Any]]], lo: int, hi: int) -> Optional[BSTNode]:
+        """
+        Builds a perfectly balanced subtree from items[lo:hi], which must be sorted by key.
+        The middle item becomes the subtree root, so every item is visited exactly once.
         Args:
-            node (Optional[BSTNode]): The current node being checked.
-            key (Any): The key to search for.
+            items (List[Tuple[Any, Iterable[Any]]]): Sorted (key, values) pairs.
+            lo (int): First index of the slice (inclusive).
+            hi (int): Last index of the slice (exclusive).
         Returns:
-            List[Any]: A list of values associated with the key.
-        Raises:
-            KeyError: If the key is not found in the tree.
+            Optional[BSTNode]: The root of the subtree, or None for an empty slice.
         """
-        
-        if node is None:
-            #raise KeyError(f"Key {key} not found in the tree.")
+        if lo >= hi:
             return None
-        if key < node.key:
-            return self._search_recursive(node.left, key)
-        elif key > node.key:
-            return self._search_recursive(node.right, key)
+        mid = (lo + hi) // 2
+        key, values = items[mid]
+        node = self._new_node(key)
+        node.values.merge(values)
+        node.left = self._build_balanced(items, lo, mid)
+        node.right = self._build_balanced(items, mid + 1, hi)
+        return node
+
+    def _descend(self, key: Any) -> Tuple[List[BSTNode], Optional[BSTNode]]:
+        """
+        Walks down from the root towards key without recursion.
+        Args:
+            key (Any): The key to look for.
+        Returns:
+            Tuple[List[BSTNode], Optional[BSTNode]]: The nodes passed on the way down (root first), and the node
+            holding key (None if key isn't in the tree, in which case key belongs under the last node passed).
+        """
+        path: List[BSTNode] = []
+        node = self.root
+        while node is not None:
+            if key < node.key:
+                path.append(node)
+                node = node.left
+            elif key > node.key:
+                path.append(node)
+                node = node.right
+            else:
+                return path, node
+        return path, None
+
+    def _attach(self, parent: Optional[BSTNode], node: BSTNode) -> None:
+        """
+        Hangs a new node under parent on the side its key belongs (or makes it the root).
+        """
+        if parent is None:
+            self.root = node
+        elif node.key < parent.key:
+            parent.left = node
+        else:
+            parent.right = node
+
+    def _replace_child(self, parent: Optional[BSTNode], old: BSTNode, new: Optional[BSTNode]) -> None:
+        """
+        Puts new where old hung under parent (or makes it the root).
+        """
+        if parent is None:
+            self.root = new
+        elif parent.left is old:
+            parent.left = new
         else:
-            return node.values
+            parent.right = new
+
+    def _unlink(self, path: List[BSTNode], node: BSTNode) -> List[BSTNode]:
+        """
+        Takes node out of the tree. A node with two children takes over the key and
+        values of its in-order successor (the smallest key on its right), and the
+        successor, which has no left child, is unlinked instead.
+        Args:
+            path (List[BSTNode]): The nodes from the root down to node's parent, as returned by _descend.
+        Returns:
+            List[BSTNode]: The nodes from the root down to the parent of the node that was actually unlinked.
+        """
+        if node.left is not None and node.right is not None:
+            path.append(node)
+            successor = node.right
+            while successor.left is not None:
+                path.append(successor)
+                successor = successor.left
+            node.key, node.values = successor.key, successor.values
+            node, child = successor, successor.right
+        else:
+            child = node.left if node.left is not None else node.right
+        self._replace_child(path[-1] if path else None, node, child)
+        return path
+
+    def _rebalance(self, path: List[BSTNode]) -> None:
+        """
+        Called with the nodes above a removed node, root first. A plain BST doesn't rebalance.
+        """
+
+    def _search(self, key: Any) -> List[Any]:
+        """
+        Searches for a key with a loop down from the root. Returns the list of docs
+        in which the key is found.
+        Args:
+            key (Any): The key to search for.
+        Returns:
+            List[Any]: A list of values associated with the key, or None if the key is not in the tree.
+        """
+        node = self.root
+        while node is not None:
+            if key < node.key:
+                node = node.left
+            elif key > node.key:
+                node = node.right
+            else:
+                return node.values
+        return None
         
     def _inorder_traversal_generator(self, node: Optional[BSTNode]) -> Generator[BSTNode, None, None]:
         """
         Generates an inorder traversal of the binary search tree starting from the given node. Used 
-        with the __iter__ dunder function. 
+        with the __iter__ dunder function. The nodes still to be visited are kept on an explicit
+        stack (the left spine of whatever is left), so each node costs O(1) amortized and the
+        depth of the tree never touches the recursion limit.
         Args:
             node (Optional[BSTNode]): The starting node for the traversal.
         Yields:
             Generator[BSTNode, None, None]: The nodes in the binary search tree in inorder traversal order.
         """
-        
-        if node:
-            yield from self._inorder_traversal_generator(node.left)
+        stack: List[BSTNode] = []
+        while stack or node is not None:
+            while node is not None: # everything on the left comes first
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
             yield node
-            yield from self._inorder_traversal_generator(node.right)
+            node = node.right
     
     def _count_nodes(self, node: Optional[BSTNode]) -> int:
         """
-        Recursively counts the number of nodes in the binary search tree.
+        Counts the number of nodes in the binary search tree with an explicit stack.
         Parameters:
         - node (Optional[BSTNode]): The root node of the binary search tree.
         Returns:
         - int: The number of nodes in the binary search tree.
         """
-        
-        if node is None:
-            return 0
-        return 1 + self._count_nodes(node.left) + self._count_nodes(node.right)
+        count = 0
+        stack = [node] if node is not None else []
+        while stack:
+            node = stack.pop()
+            count += 1
+            if node.left is not None:
+                stack.append(node.left)
+            if node.right is not None:
+                stack.append(node.right)
+        return count
     
     def _tree_height(self, node: Optional[BSTNode]) -> int:
         """
-        Calculate the height of the binary search tree rooted at the given node.
+        Calculate the height of the binary search tree rooted at the given node by
+        counting its levels breadth first.
         Args:
             node (Optional[BSTNode]): The root node of the binary search tree.
         Returns:
             int: The height of the binary search tree.
         """
-        
-        if node is None:
-            return 0
-        left_height = self._tree_height(node.left)
-        right_height = self._tree_height(node.right)
-        return 1 + max(left_height, right_height)
+        height = 0
+        level = [node] if node is not None else []
+        while level:
+            height += 1
+            level = [child for current in level for child in (current.left, current.right) if child is not None]
+        return height
     
     def _get_leaf_keys(self, node: Optional[BSTNode], leaves: List[Any]) -> None:
         """
-        Recursively traverses the binary search tree and appends the keys of the leaf nodes to the 'leaves' list.
+        Traverses the binary search tree left to right with an explicit stack and appends the keys of the leaf nodes to the 'leaves' list.
         Args:
-            node (Optional[BSTNode]): The current node being traversed.
+            node (Optional[BSTNode]): The root of the subtree to traverse.
             leaves (List[Any]): The list to which the keys of the leaf nodes will be appended.
         Returns:
             None
         """
-        
-        if node is None:
-            return
-        if node.left is None and node.right is None:
-            leaves.append(node.key)
-        else:
-            self._get_leaf_keys(node.left, leaves)
-            self._get_leaf_keys(node.right, leaves)
+        stack = [node] if node is not None else []
+        while stack:
+            node = stack.pop()
+            if node.left is None and node.right is None:
+                leaves.append(node.key)
+                continue
+            if node.right is not None: # pushed first so the left side comes off the stack first
+                stack.append(node.right)
+            if node.left is not None:
+                stack.append(node.left)
             
     def __iter__(self) -> Generator[BSTNode, None, None]:
         """
@@ -147,7 +248,7 @@ class BinarySearchTreeIndex(AbstractIndex):
             BSTNode: The next node in the inorder traversal.
 
         """
-        yield from self._inorder_traversal_generator(self.root)
+        return self._inorder_traversal_generator(self.root)
     
     def insert(self, key: Any, value: Any) -> None:
         """
@@ -160,7 +261,11 @@ class BinarySearchTreeIndex(AbstractIndex):
         Returns:
             None
         """
-        self.root = self._insert_recursive(self.root, key, value)
+        path, node = self._descend(key)
+        if node is None:
+            node = self._new_node(key)
+            self._attach(path[-1] if path else None, node)
+        node.add_value(value)
 
     def search(self, key: Any) -> List[Any]:
         """
@@ -172,8 +277,112 @@ class BinarySearchTreeIndex(AbstractIndex):
         Returns:
             List[Any]: A list of values associated with the key. If the key is not found, an empty list is returned.
         """
-        return self._search_recursive(self.root, key)
+        return self._search(key)
     
+    def bulk_load(self, items: Iterable[Tuple[Any, Iterable[Any]]]) -> None:
+        """
+        Builds the tree from a stream of (key, values) pairs sorted by key in O(n).
+        If the tree already has nodes, the pairs are inserted one at a time instead.
+
+        Parameters:
+            items (Iterable[Tuple[Any, Iterable[Any]]]): (key, values) pairs in ascending key order.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the keys are not in strictly ascending order.
+        """
+        if self.root is not None:
+            super().bulk_load(items)
+            return
+        items = list(items)
+        for i in range(1, len(items)):
+            if not items[i - 1][0] < items[i][0]:
+                raise ValueError(f"bulk_load expects strictly ascending keys, got {items[i - 1][0]!r} before {items[i][0]!r}")
+        self.root = self._build_balanced(items, 0, len(items))
+
+    def delete(self, key: Any, value: Any) -> bool:
+        """
+        Removes value from the list of the node with the given key. Once the list is
+        empty the node itself is taken out of the tree.
+
+        Parameters:
+            key (Any): The key of the node.
+            value (Any): The value to remove.
+
+        Returns:
+            bool: True if value was stored under key.
+        """
+        path, node = self._descend(key)
+        if node is None or not node.values.remove(value):
+            return False
+        if len(node.values) == 0:
+            self._rebalance(self._unlink(path, node))
+        return True
+
+    def search_many(self, keys: Iterable[Any]) -> List[Any]:
+        """
+        Searches for a batch of keys in one traversal. The keys are sorted, and every node
+        splits the part of the batch that reached it into the keys smaller than its own
+        (sent left) and the keys larger than it (sent right), so each node is visited at
+        most once no matter how many keys pass through it.
+
+        Parameters:
+            keys (Iterable[Any]): The keys to search for.
+
+        Returns:
+            List[Any]: The values for each key (None if it isn't in the tree), in the order the keys were given.
+        """
+        keys = list(keys)
+        batch = sorted(set(keys))
+        found = {}
+        stack = [(self.root, 0, len(batch))] # (subtree, start, end) of the sorted batch that belongs in that subtree
+        while stack:
+            node, lo, hi = stack.pop()
+            if node is None or lo >= hi:
+                continue
+            i = bisect_left(batch, node.key, lo, hi)
+            if i < hi and batch[i] == node.key:
+                found[node.key] = node.values
+                stack.append((node.right, i + 1, hi))
+            else:
+                stack.append((node.right, i, hi))
+            stack.append((node.left, lo, i))
+        return [found.get(key) for key in keys]
+
+    def range(self, lo: Optional[Any] = None, hi: Optional[Any] = None) -> Iterator[Tuple[Any, Any]]:
+        """
+        Lazily yields the (key, values) pairs with lo <= key < hi in ascending order.
+        The first key is found by walking down from the root, keeping on a stack the
+        nodes where the walk went left (the ones still to be yielded), so the seek takes
+        one root-to-leaf path and every further key costs O(1) amortized.
+
+        Parameters:
+            lo (Optional[Any]): The first key to include (None starts at the smallest key).
+            hi (Optional[Any]): The key to stop before (None runs to the largest key).
+
+        Returns:
+            Iterator[Tuple[Any, Any]]: The matching (key, values) pairs.
+        """
+        stack = []
+        node = self.root
+        while node is not None: # seek to lo
+            if lo is None or node.key >= lo:
+                stack.append(node)
+                node = node.left
+            else:
+                node = node.right
+        while stack:
+            node = stack.pop()
+            if hi is not None and node.key >= hi:
+                return
+            yield node.key, node.values
+            node = node.right # everything in here is bigger than lo already, so just go down its left side
+            while node is not None:
+                stack.append(node)
+                node = node.left
+
     def count_nodes(self) -> int:
         """
         Counts the number of nodes in the binary search tree.
@@ -1,4 +1,5 @@
 from typing import List, Optional, Any
+from indexer.postings.posting_list import PostingList
 
 
 class BSTNode:
@@ -6,7 +7,7 @@ class BSTNode:
     Binary Search Tree Node.
     Attributes:
         key: The key value of the node.
-        values: A list of values associated with the key.
+        values: The posting list of document ids associated with the key.
         left: The left child node.
         right: The right child node.
     Methods:
@@ -15,15 +16,18 @@ class BSTNode:
         get_values_count() -> int:
             Returns the number of values associated with the key.
     """
-    def __init__(self, key: Any):
+    __slots__ = ("key", "values", "left", "right") # no per-node __dict__, which matters with ~260k nodes
+
+    def __init__(self, key: Any, values: Optional[PostingList] = None):
         self.key: Any = key
-        self.values: List[Any] = []
+        self.values: PostingList = values if values is not None else PostingList()
         self.left: Optional['BSTNode'] = None
         self.right: Optional['BSTNode'] = None
         
     def add_value(self, value: Any) -> None:
         """
-        Adds a value to the node.
+        Adds a value to the node. The posting list keeps values sorted and
+        ignores ones it already holds.
 
         Parameters:
             value (Any): The value to be added.
@@ -31,7 +35,7 @@ class BSTNode:
         Returns:
             None
         """
-        self.values.append(value)
+        self.values.add(value)
 
         
     def get_values_count(self):
@@ -0,0 +1,192 @@
+import os
+import pickle
+from typing import Any, Dict, List, Optional
+
+COMPACT_RATIO = 0.5          # a FilePageStore is rewritten once more than half of its file is old page copies
+COMPACT_MIN_BYTES = 1 << 20  # ... and the file is at least 1 MiB, so small files aren't rewritten over and over
+
+class MemoryPageStore:
+    """
+    Keeps the pages of a paged structure (the B+-tree) in a Python list; a page id is
+    its position in the list. read() hands back the stored page itself, so writes are
+    only needed to put a new page object in a slot.
+
+    Attributes:
+        root_id (Optional[int]): The page id of the structure's root, None before one is allocated.
+    """
+    def __init__(self):
+        self.pages: List[Any] = []
+        self.root_id: Optional[int] = None
+
+    def allocate(self, page: Any) -> int:
+        """
+        Stores a new page and returns its id.
+        """
+        self.pages.append(page)
+        return len(self.pages) - 1
+
+    def read(self, page_id: int) -> Any:
+        """
+        Returns the page with the given id.
+        """
+        return self.pages[page_id]
+
+    def write(self, page_id: int, page: Any) -> None:
+        """
+        Stores page under page_id (after it was changed).
+        """
+        self.pages[page_id] = page
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+
+class FilePageStore:
+    """
+    Keeps the pages of a paged structure in a file. The file is a log of pickled
+    (page id, page) records: writing a page appends a new copy and the in-memory offset
+    table points at the newest one, so nothing already written is ever overwritten.
+    Reopening the file replays the log to rebuild the offset table and the root id.
+
+    Rewriting a page leaves its old copy behind as dead bytes. Once they make up more
+    than compact_ratio of the file (and the file is at least min_compact_bytes), the
+    newest copy of every page is copied to a fresh file that replaces the log, so the
+    file stays proportional to the data rather than to the number of writes. close()
+    compacts too.
+
+    Pages are unpickled on every read, so callers have to write() a page back after
+    changing it (the B+-tree always does).
+
+    Attributes:
+        path (str): The file the pages live in.
+        root_id (Optional[int]): The page id of the structure's root, None before one is allocated.
+    """
+    ROOT = -1 # page id under which root id changes are logged
+
+    def __init__(self, path: str, compact_ratio: float = COMPACT_RATIO, min_compact_bytes: int = COMPACT_MIN_BYTES):
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self.min_compact_bytes = min_compact_bytes
+        self._offsets: Dict[int, int] = {}
+        self._sizes: Dict[int, int] = {} # page id (or ROOT) -> length of its newest record
+        self._root_id: Optional[int] = None
+        self._end = 0  # length of the file
+        self._live = 0 # bytes taken by the newest record of every page and of the root id
+        self._file = open(path, "a+b")
+        self._replay()
+
+    def _replay(self) -> None:
+        # reads the whole log once, the last record for every page id wins
+        self._file.seek(0)
+        while True:
+            offset = self._file.tell()
+            try:
+                page_id, page = pickle.load(self._file)
+            except EOFError:
+                break
+            if page_id == self.ROOT:
+                self._root_id = page
+            else:
+                self._offsets[page_id] = offset
+            self._sizes[page_id] = self._file.tell() - offset
+        self._end = self._file.tell()
+        self._live = sum(self._sizes.values())
+
+    def _append(self, page_id: int, page: Any) -> int:
+        self._file.seek(0, os.SEEK_END)
+        offset = self._file.tell()
+        pickle.dump((page_id, page), self._file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._end = self._file.tell()
+        self._live += self._end - offset - self._sizes.get(page_id, 0) # the previous copy is dead now
+        self._sizes[page_id] = self._end - offset
+        return offset
+
+    def dead_bytes(self) -> int:
+        """
+        Returns the number of bytes taken by page copies that have been replaced.
+        """
+        return self._end - self._live
+
+    def _maybe_compact(self) -> None:
+        if self._end >= self.min_compact_bytes and self.dead_bytes() > self._end * self.compact_ratio:
+            self.compact()
+
+    def compact(self) -> None:
+        """
+        Rewrites the file with only the newest copy of every page (and the root id). The
+        records are copied as raw bytes, nothing is unpickled.
+        """
+        if not self.dead_bytes():
+            return
+        temp_path = self.path + ".compact"
+        offsets: Dict[int, int] = {}
+        with open(temp_path, "wb") as out:
+            if self._root_id is not None:
+                pickle.dump((self.ROOT, self._root_id), out, protocol=pickle.HIGHEST_PROTOCOL)
+                self._sizes[self.ROOT] = out.tell()
+            for page_id in sorted(self._offsets):
+                self._file.seek(self._offsets[page_id])
+                offsets[page_id] = out.tell()
+                out.write(self._file.read(self._sizes[page_id]))
+            out.flush()
+            os.fsync(out.fileno())
+        self._file.close()
+        os.replace(temp_path, self.path) # the old log stays complete until the new one has replaced it
+        self._file = open(self.path, "a+b")
+        self._offsets = offsets
+        self._end = self._live = self._file.seek(0, os.SEEK_END)
+
+    @property
+    def root_id(self) -> Optional[int]:
+        return self._root_id
+
+    @root_id.setter
+    def root_id(self, page_id: int) -> None:
+        self._append(self.ROOT, page_id)
+        self._root_id = page_id
+
+    def allocate(self, page: Any) -> int:
+        """
+        Stores a new page and returns its id.
+        """
+        page_id = len(self._offsets)
+        self.write(page_id, page)
+        return page_id
+
+    def read(self, page_id: int) -> Any:
+        """
+        Loads the newest copy of the page with the given id.
+        """
+        self._file.seek(self._offsets[page_id])
+        return pickle.load(self._file)[1]
+
+    def write(self, page_id: int, page: Any) -> None:
+        """
+        Appends a new copy of page to the file (compacting it if too much of it is dead).
+        """
+        self._offsets[page_id] = self._append(page_id, page)
+        self._maybe_compact()
+
+    def flush(self) -> None:
+        """
+        Pushes buffered writes to the file.
+        """
+        self._file.flush()
+
+    def close(self) -> None:
+        """
+        Compacts, flushes and closes the file.
+        """
+        self.compact()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # the open file can't be pickled, the pages are already on disk so the path (and settings) are enough
+        self.flush()
+        return {"path": self.path, "compact_ratio": self.compact_ratio, "min_compact_bytes": self.min_compact_bytes}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state["path"], state.get("compact_ratio", COMPACT_RATIO), state.get("min_compact_bytes", COMPACT_MIN_BYTES))
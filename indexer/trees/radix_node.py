@@ -0,0 +1,30 @@
+from typing import Dict, Optional, Any
+from indexer.postings.posting_list import PostingList
+
+
+class RadixNode:
+    """
+    Radix Tree (compressed trie) Node.
+    Attributes:
+        label: The part of the key on the edge leading into this node (empty for the root).
+        values: The posting list of the key that ends at this node, or None if no key ends here.
+        children: The child nodes, by the first character of their label.
+    Methods:
+        get_values_count() -> int:
+            Returns the number of values associated with the key ending here.
+    """
+    __slots__ = ("label", "values", "children")
+
+    def __init__(self, label: str, values: Optional[PostingList] = None):
+        self.label: str = label
+        self.values: Optional[PostingList] = values
+        self.children: Dict[str, 'RadixNode'] = {}
+
+    def get_values_count(self) -> int:
+        """
+        Returns the number of values stored in the node (0 if no key ends here).
+
+        Returns:
+            int: The number of values stored in the node.
+        """
+        return len(self.values) if self.values is not None else 0
@@ -0,0 +1,261 @@
+from typing import Optional, Any, List, Generator, Iterable, Iterator, Tuple
+
+from indexer.abstract_index import AbstractIndex
+from indexer.trees.radix_node import RadixNode
+from indexer.postings.posting_list import PostingList
+
+
+class RadixTreeIndex(AbstractIndex):
+    """
+    A radix tree (compressed trie) implementation of an index. Every edge is labelled
+    with a run of characters and chains of single-child nodes are merged into one edge,
+    so words that share a prefix share its nodes. A lookup follows one edge per branch
+    point and compares each character of the key once, instead of comparing whole
+    strings at every level like the BST/AVL or hashing the whole string.
+
+    Methods:
+        insert(key: str, value: Any) -> None:
+            Adds value to the posting list of key, adding key if needed.
+        search(key: str) -> Optional[PostingList]:
+            Returns the posting list of key, or None if key isn't indexed.
+        delete(key: str, value: Any) -> bool:
+            Removes value from key's posting list, and key once the list is empty.
+        get_keys_in_order() -> List[str]:
+            Returns the indexed keys in ascending order.
+        range(lo: str, hi: str) -> Iterator[Tuple[str, PostingList]]:
+            Lazily yields the (key, values) pairs with lo <= key < hi in order.
+        prefix(prefix: str) -> Iterator[Tuple[str, PostingList]]:
+            Lazily yields the (key, values) pairs whose key starts with prefix.
+        count_nodes() -> int:
+            Counts the nodes in the tree (branch points included).
+        get_avg_value_list_len() -> float:
+            Calculates the average length of the posting lists.
+    """
+
+    def __init__(self, posting_type: type = PostingList):
+        super().__init__(posting_type)
+        self.root: RadixNode = RadixNode("")
+        self.num_keys: int = 0
+
+    def _terminal(self, key: str) -> RadixNode:
+        """
+        Finds the node where key ends, creating it (and splitting an edge if key ends or
+        branches off in the middle of one) if needed, and makes sure it has a posting list.
+        Args:
+            key (str): The key.
+        Returns:
+            RadixNode: The node for key.
+        """
+        node = self.root
+        rest = key
+        while rest:
+            child = node.children.get(rest[0])
+            if child is None:
+                child = RadixNode(rest)
+                node.children[rest[0]] = child
+                node = child
+                break
+            label = child.label
+            common = 1 # the first characters match, that's how the child was found
+            while common < len(label) and common < len(rest) and label[common] == rest[common]:
+                common += 1
+            if common < len(label):
+                # key leaves the edge part way along, so the edge gets split at that point
+                middle = RadixNode(label[:common])
+                child.label = label[common:]
+                middle.children[child.label[0]] = child
+                node.children[rest[0]] = middle
+                child = middle
+            node = child
+            rest = rest[common:]
+        if node.values is None:
+            node.values = self._new_postings()
+            self.num_keys += 1
+        return node
+
+    def insert(self, key: str, value: Any) -> None:
+        """
+        Adds value to the posting list of key, adding key to the tree if it's new.
+
+        Parameters:
+            key (str): The key (word).
+            value (Any): The value (doc id) to add.
+
+        Returns:
+            None
+        """
+        self._terminal(key).values.add(value)
+
+    def bulk_load(self, items: Iterable[Tuple[str, Iterable[Any]]]) -> None:
+        """
+        Loads (key, values) pairs, adding each key's values in one merge instead of one
+        insert per value.
+        """
+        for key, values in items:
+            self._terminal(key).values.merge(values)
+
+    def search(self, key: str) -> Optional[PostingList]:
+        """
+        Returns the posting list of key, or None if key isn't indexed.
+
+        Parameters:
+            key (str): The key to search for.
+
+        Returns:
+            Optional[PostingList]: The values associated with key.
+        """
+        node = self.root
+        rest = key
+        while rest:
+            node = node.children.get(rest[0])
+            if node is None or not rest.startswith(node.label):
+                return None
+            rest = rest[len(node.label):]
+        return node.values
+
+    def delete(self, key: str, value: Any) -> bool:
+        """
+        Removes value from the posting list of key. Once the list is empty key is
+        removed: a node left with no key and no children is cut off, and a node left with
+        no key and a single child is merged into that child, so the edges stay compressed.
+
+        Parameters:
+            key (str): The key (word).
+            value (Any): The value (doc id) to remove.
+
+        Returns:
+            bool: True if value was stored under key.
+        """
+        path = [] # the nodes above the key's node, root first
+        node = self.root
+        rest = key
+        while rest:
+            path.append(node)
+            node = node.children.get(rest[0])
+            if node is None or not rest.startswith(node.label):
+                return False
+            rest = rest[len(node.label):]
+        if node.values is None or not node.values.remove(value):
+            return False
+        if len(node.values) > 0:
+            return True
+        node.values = None
+        self.num_keys -= 1
+        while path and node.values is None and len(node.children) <= 1:
+            parent = path.pop()
+            if not node.children:
+                del parent.children[node.label[0]]
+                node = parent # the parent may now be an empty branch point as well
+                continue
+            (child,) = node.children.values()
+            child.label = node.label + child.label
+            parent.children[child.label[0]] = child
+            break
+        return True
+
+    def _walk(self, node: RadixNode, path: str, lo: Optional[str] = None, hi: Optional[str] = None) -> Generator[Tuple[str, PostingList], None, None]:
+        """
+        Yields the (key, values) pairs below node (whose key so far is path) with
+        lo <= key < hi, in ascending order. Children are visited in character order, so
+        the walk meets the keys sorted; whole subtrees below lo are skipped and the walk
+        stops at the first key that reaches hi.
+        """
+        stack = [(node, path)]
+        while stack:
+            node, path = stack.pop()
+            if hi is not None and path >= hi:
+                return # every key still to come starts at or after path
+            if lo is not None and path < lo[:len(path)]:
+                continue # every key in this subtree starts with path, so they're all below lo
+            if node.values is not None and (lo is None or path >= lo):
+                yield path, node.values
+            for char in sorted(node.children, reverse=True): # pushed backwards so the smallest comes off first
+                child = node.children[char]
+                stack.append((child, path + child.label))
+
+    def range(self, lo: Optional[str] = None, hi: Optional[str] = None) -> Iterator[Tuple[str, PostingList]]:
+        """
+        Lazily yields the (key, values) pairs with lo <= key < hi in ascending order.
+
+        Parameters:
+            lo (Optional[str]): The first key to include (None starts at the smallest key).
+            hi (Optional[str]): The key to stop before (None runs to the largest key).
+
+        Returns:
+            Iterator[Tuple[str, PostingList]]: The matching (key, values) pairs.
+        """
+        return self._walk(self.root, "", lo, hi)
+
+    def prefix(self, prefix: str) -> Iterator[Tuple[str, PostingList]]:
+        """
+        Lazily yields the (key, values) pairs whose key starts with prefix, by walking
+        down to the subtree for prefix and listing only that subtree.
+
+        Parameters:
+            prefix (str): The prefix to match.
+
+        Returns:
+            Iterator[Tuple[str, PostingList]]: The matching (key, values) pairs.
+        """
+        node = self.root
+        path = ""
+        rest = prefix
+        while rest:
+            node = node.children.get(rest[0])
+            if node is None:
+                return iter(())
+            label = node.label
+            if len(rest) <= len(label):
+                if not label.startswith(rest):
+                    return iter(())
+                rest = "" # prefix ends part way along this edge, every key below it matches
+            elif rest.startswith(label):
+                rest = rest[len(label):]
+            else:
+                return iter(())
+            path += label
+        return self._walk(node, path)
+
+    def __iter__(self) -> Generator[str, None, None]:
+        for key, values in self._walk(self.root, ""):
+            yield key
+
+    def get_keys_in_order(self) -> List[str]:
+        """
+        Returns a list of the indexed keys in ascending order.
+
+        Returns:
+            List[str]: The keys in ascending order.
+        """
+        return list(self)
+
+    def count_keys(self) -> int:
+        """
+        Returns the number of indexed keys.
+        """
+        return self.num_keys
+
+    def count_nodes(self) -> int:
+        """
+        Counts the nodes in the tree, including the root and the branch points that hold no key.
+
+        Returns:
+            int: The number of nodes.
+        """
+        count = 0
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            count += 1
+            stack.extend(node.children.values())
+        return count
+
+    def get_avg_value_list_len(self) -> float:
+        """
+        Calculates the average length of the posting lists in the tree.
+
+        Returns:
+            float: The average posting list length (0 for an empty tree).
+        """
+        total = sum(len(values) for key, values in self._walk(self.root, ""))
+        return total / self.num_keys if self.num_keys else 0
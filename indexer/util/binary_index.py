@@ -0,0 +1,339 @@
+import os
+import sys
+import mmap
+import struct
+from array import array
+from typing import *
+from indexer.abstract_index import AbstractIndex
+from indexer.postings.document_dictionary import DocumentDictionary
+from indexer.postings.posting_list import PostingList
+from indexer.postings.compressed import CompressedPostingList, vbyte_encode, vbyte_decode
+from indexer.postings.frequency import FrequencyPostingList
+from indexer.postings.positional import PositionalPostingList, encode_positions, decode_positions
+
+# On-disk layout (version 1, every number little-endian):
+#
+#   header           MAGIC, version, posting kind, number of terms / documents / removed documents,
+#                    then the byte offset of each of the sections below
+#   term offsets     num_terms + 1 uint64: term i is terms[offsets[i]:offsets[i + 1]]
+#   terms            the UTF-8 terms, sorted, back to back (UTF-8 byte order is code point order)
+#   posting offsets  num_terms + 1 uint64: the postings of term i are postings[offsets[i]:offsets[i + 1]]
+#   postings         per term: VByte doc count, then per doc the VByte gap from the previous doc id,
+#                    followed by the tf (frequency kind) or the position count and VByte position gaps (positional kind)
+#   name offsets     num_docs + 1 uint64, same scheme as the term offsets
+#   names            the UTF-8 document names in id order
+#   lengths          num_docs uint32 document lengths
+#   removed          num_removed uint32 ids of removed documents
+#
+# Every section starts on an 8 byte boundary so the tables can be read in place.
+MAGIC = b"IXBF"
+VERSION = 1
+HEADER = struct.Struct("<4sHBxIII8Q")
+
+# posting kinds stored in the header (the subclasses are checked first, they are PostingLists too)
+KIND_PLAIN, KIND_COMPRESSED, KIND_FREQUENCY, KIND_POSITIONAL = range(4)
+POSTING_TYPES = {KIND_PLAIN: PostingList, KIND_COMPRESSED: CompressedPostingList,
+                 KIND_FREQUENCY: FrequencyPostingList, KIND_POSITIONAL: PositionalPostingList}
+
+
+def posting_kind(posting_type: type) -> int:
+    # the kind stored in the header for an index's posting_type
+    if issubclass(posting_type, PositionalPostingList):
+        return KIND_POSITIONAL
+    if issubclass(posting_type, FrequencyPostingList):
+        return KIND_FREQUENCY
+    if issubclass(posting_type, CompressedPostingList):
+        return KIND_COMPRESSED
+    return KIND_PLAIN
+
+def encode_postings(postings: Any, kind: int, out: bytearray) -> None:
+    # appends one term's postings to out (see the layout above)
+    doc_ids = list(postings)
+    vbyte_encode(len(doc_ids), out)
+    previous = 0
+    for i, doc_id in enumerate(doc_ids):
+        vbyte_encode(doc_id - previous, out)
+        previous = doc_id
+        if kind == KIND_FREQUENCY:
+            vbyte_encode(postings.tf_at(i), out)
+        elif kind == KIND_POSITIONAL:
+            positions = postings.positions_at(i)
+            vbyte_encode(len(positions), out)
+            out.extend(encode_positions(positions))
+
+def decode_postings(data: Any, pos: int, kind: int) -> Any:
+    # reads the postings starting at data[pos] back into a posting list of the stored kind
+    count, pos = vbyte_decode(data, pos)
+    values = []
+    doc_id = 0
+    for _ in range(count):
+        gap, pos = vbyte_decode(data, pos)
+        doc_id += gap
+        if kind == KIND_FREQUENCY:
+            tf, pos = vbyte_decode(data, pos)
+            values.append((doc_id, tf))
+        elif kind == KIND_POSITIONAL:
+            num_positions, pos = vbyte_decode(data, pos)
+            start = pos
+            for _ in range(num_positions): # skip over the positions to find where they end
+                _, pos = vbyte_decode(data, pos)
+            values.append((doc_id, decode_positions(data, start, pos)))
+        else:
+            values.append(doc_id)
+    return POSTING_TYPES[kind](values)
+
+def _table(typecode: str, values: Iterable[int]) -> bytes:
+    # a little-endian table of integers
+    table = array(typecode, values)
+    if sys.byteorder != "little":
+        table.byteswap()
+    return table.tobytes()
+
+def _pad(f: BinaryIO) -> int:
+    # moves the file position to the next 8 byte boundary and returns it
+    pos = f.tell()
+    if pos % 8:
+        f.write(b"\0" * (8 - pos % 8))
+    return f.tell()
+
+
+def read_header(data: Any, path: str) -> Tuple:
+    """
+    Unpacks and checks the header at the start of data (the file's first HEADER.size bytes or more).
+
+    Args:
+        data (Any): A bytes-like object holding the header.
+        path (str): The file name, for the error message.
+    Returns:
+        Tuple: (magic, version, kind, num_terms, num_docs, num_removed, then the 8 section offsets).
+    Raises:
+        ValueError: If data isn't a binary index or was written by an unknown version.
+    """
+    if len(data) < HEADER.size or bytes(data[:len(MAGIC)]) != MAGIC:
+        raise ValueError(f"{path} is not a binary index")
+    header = HEADER.unpack_from(data, 0)
+    if header[1] != VERSION:
+        raise ValueError(f"unsupported binary index version {header[1]} in {path}")
+    return header
+
+def read_table(data: Any, typecode: str, count: int) -> Any:
+    """
+    Reads a table of count little-endian integers from the start of data. On little-endian
+    machines this is a memoryview over data (nothing is copied); otherwise the table is
+    copied and byte swapped.
+    """
+    view = memoryview(data)[:count * array(typecode).itemsize]
+    if sys.byteorder == "little":
+        return view.cast(typecode)
+    table = array(typecode, view.tobytes())
+    table.byteswap()
+    return table
+
+def read_documents(name_offsets: Sequence[int], name_data: Any, lengths: Sequence[int], removed: Iterable[int]) -> DocumentDictionary:
+    """
+    Rebuilds the document dictionary from the name, length and removed sections.
+    """
+    documents = DocumentDictionary()
+    for doc_id in range(len(lengths)):
+        documents.add(str(name_data[name_offsets[doc_id]:name_offsets[doc_id + 1]], "utf-8"))
+        documents.set_length(doc_id, lengths[doc_id])
+    for doc_id in removed:
+        documents.remove(doc_id)
+    return documents
+
+
+def save_binary_index(index: AbstractIndex, path: str) -> None:
+    """
+    Writes any index in the binary format read by MmapIndex. Postings are
+    stored in term order, so the terms come out sorted whatever structure the index
+    uses. The file is written under a temporary name and renamed when complete.
+
+    Args:
+        index (AbstractIndex): The index to save.
+        path (str): Where to write it.
+    Returns:
+        None
+    """
+    terms = sorted(index.get_keys_in_order()) # already sorted for most indexes, sorting again is then linear
+    kind = posting_kind(index.posting_type)
+    documents = index.documents
+    names = [documents.name_of(doc_id) for doc_id in range(len(documents))]
+    removed = [doc_id for doc_id in range(len(documents)) if documents.is_removed(doc_id)]
+
+    term_offsets = [0]
+    term_data = bytearray()
+    for term in terms:
+        term_data.extend(term.encode("utf-8"))
+        term_offsets.append(len(term_data))
+    posting_offsets = [0]
+    posting_data = bytearray()
+    for postings in index.search_many(terms):
+        encode_postings(postings, kind, posting_data)
+        posting_offsets.append(len(posting_data))
+    name_offsets = [0]
+    name_data = bytearray()
+    for name in names:
+        name_data.extend(name.encode("utf-8"))
+        name_offsets.append(len(name_data))
+
+    sections = [_table('Q', term_offsets), bytes(term_data), _table('Q', posting_offsets), bytes(posting_data),
+                _table('Q', name_offsets), bytes(name_data),
+                _table('I', (documents.length_of(doc_id) for doc_id in range(len(names)))), _table('I', removed)]
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(b"\0" * HEADER.size) # filled in once the section offsets are known
+        offsets = []
+        for section in sections:
+            offsets.append(_pad(f))
+            f.write(section)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, kind, len(terms), len(names), len(removed), *offsets))
+    os.replace(tmp_path, path)
+    print(f"Index saved to {path}")
+
+def is_binary_index(path: str) -> bool:
+    """
+    Returns True if path starts with the binary index magic bytes (rather than being a pickle).
+    """
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class MmapIndex(AbstractIndex):
+    """
+    A read-only index answered straight from a file written by save_binary_index. The
+    file is memory-mapped, so opening it only reads the header and the document
+    dictionary; a search binary searches the sorted terms through the offsets table and
+    decodes just that term's postings. Only the pages a query touches are ever read
+    from disk, so startup is near-instant and resident memory follows the queries
+    rather than the size of the index.
+
+    search returns a fresh posting list of the index's posting_type (nothing decoded is
+    kept), so it can be used with the query planner, phrase queries and ranking like
+    any other index.
+
+    Methods:
+        search(key: str) -> Optional[PostingList]:
+            Returns the postings of key, or None if it isn't indexed.
+        range(lo: str, hi: str) -> Iterator[Tuple[str, PostingList]]:
+            Yields the (term, postings) pairs with lo <= term < hi.
+        range_keys(lo: str, hi: str) -> Iterator[str]:
+            Yields the terms with lo <= term < hi without decoding any postings.
+        close() -> None:
+            Unmaps the file.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._open()
+
+    def _open(self):
+        with open(self.path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            header = read_header(self._mm, self.path)
+        except ValueError:
+            self._mm.close()
+            raise
+        kind, num_terms, num_docs, num_removed = header[2:6]
+        term_offsets, terms, posting_offsets, postings, name_offsets, names, lengths, removed = header[6:]
+        super().__init__(POSTING_TYPES[kind])
+        self._kind = kind
+        self._num_terms = num_terms
+        self._view = memoryview(self._mm)
+        self._term_offsets = read_table(self._view[term_offsets:], 'Q', num_terms + 1)
+        self._terms = terms
+        self._posting_offsets = read_table(self._view[posting_offsets:], 'Q', num_terms + 1)
+        self._postings = postings
+        # the document dictionary is small next to the postings and is needed to show any result, so it is read eagerly
+        self.documents = read_documents(read_table(self._view[name_offsets:], 'Q', num_docs + 1), self._view[names:],
+                                        read_table(self._view[lengths:], 'I', num_docs),
+                                        read_table(self._view[removed:], 'I', num_removed))
+
+    def _term(self, i: int) -> bytes:
+        # the i-th term (still UTF-8 encoded)
+        start = self._terms
+        return self._mm[start + self._term_offsets[i]:start + self._term_offsets[i + 1]]
+
+    def _lower_bound(self, key: bytes) -> int:
+        # index of the first term >= key
+        lo, hi = 0, self._num_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _postings_at(self, i: int) -> Any:
+        return decode_postings(self._view, self._postings + self._posting_offsets[i], self._kind)
+
+    def insert(self, key: Any, value: Any) -> None:
+        raise NotImplementedError("MmapIndex is read-only, rebuild the index and save it again")
+
+    def search(self, key: str) -> Optional[Any]:
+        encoded = key.encode("utf-8")
+        i = self._lower_bound(encoded)
+        if i < self._num_terms and self._term(i) == encoded:
+            return self._postings_at(i)
+        return None
+
+    def range(self, lo: Optional[str] = None, hi: Optional[str] = None) -> Iterator[Tuple[str, Any]]:
+        # binary search for the first term >= lo, then walk the terms in order until hi
+        i = 0 if lo is None else self._lower_bound(lo.encode("utf-8"))
+        hi = None if hi is None else hi.encode("utf-8")
+        while i < self._num_terms:
+            term = self._term(i)
+            if hi is not None and term >= hi:
+                return
+            yield term.decode("utf-8"), self._postings_at(i)
+            i += 1
+
+    def range_keys(self, lo: Optional[str] = None, hi: Optional[str] = None) -> Iterator[str]:
+        # only the term pages are touched, no posting list is decoded
+        i = 0 if lo is None else self._lower_bound(lo.encode("utf-8"))
+        end = self._num_terms if hi is None else self._lower_bound(hi.encode("utf-8"))
+        while i < end:
+            yield self._term(i).decode("utf-8")
+            i += 1
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self._num_terms):
+            yield self._term(i).decode("utf-8")
+
+    def get_keys_in_order(self) -> List[str]:
+        return list(self)
+
+    def count_keys(self) -> int:
+        return self._num_terms
+
+    def get_avg_value_list_len(self):
+        element_lens = []
+        for i in range(self._num_terms):
+            count, _ = vbyte_decode(self._view, self._postings + self._posting_offsets[i])
+            element_lens.append(count)
+        return (sum(element_lens) / len(element_lens) if element_lens else 0), element_lens
+
+    def close(self) -> None:
+        """
+        Unmaps the file. The views into the mapping are released first, since an mmap
+        can't be closed while they exist.
+        """
+        for table in (self._term_offsets, self._posting_offsets):
+            if isinstance(table, memoryview):
+                table.release()
+        self._view.release()
+        self._mm.close()
+
+    def __enter__(self) -> "MmapIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __getstate__(self):
+        return {"path": self.path} # the mapping can't be pickled, the file is mapped again on load
+
+    def __setstate__(self, state):
+        self.path = state["path"]
+        self._open()
@@ -0,0 +1,228 @@
+import os
+import json
+from urllib.parse import urlparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial as bind
+from itertools import islice
+from typing import *
+from indexer.abstract_index import AbstractIndex, document_postings
+from indexer.util.corpus_readers import Record, find_json_files, read_corpus
+from indexer.postings.positional import PositionalPostingList
+from indexer.postings.frequency import FrequencyPostingList
+
+
+# turns a string into list of tokens
+# will be used to turn title & author names into processed text
+def tokenize(text: str): #-> List[str]:
+    if not text:
+        return [] # gives us an empty list if no text is provided
+    text = text.lower() # converts the text to lowercase
+    tokens = text.split() # splits the text by whitespace so each word is a token
+    cleaned_tokens = [''.join(char for char in token if char.isalnum()) for token in tokens] # keeps only alphanumeric characters from each token
+    return [token for token in cleaned_tokens if token] # filters out empty tokens (which could happen if there were non-alphanumeric-only inputs)
+
+# parses a json file
+def process_file(json_data: Dict[str, Any]) -> Dict[str, Any]:
+    title = json_data.get("title")
+    full_url = json_data.get("url")
+    domain_url = None
+    if full_url:
+        domain_url = urlparse(full_url).netloc # source: ChatGPT, this made it easier to get the domain by identifying the network location
+    author = json_data.get("author")
+    preprocessed_text = json_data.get("preprocessed_text") or []
+    # tokenize title and add to preprocessed_text
+    title_tokens = tokenize(title)
+    preprocessed_text.extend(title_tokens)
+    # tokenize author last name (if present) and add to preprocessed_text
+    if author:
+        author_tokens = tokenize(author)
+        preprocessed_text.extend(author_tokens)
+
+    return {
+        "title": title,
+        "url": domain_url,
+        "author": author,
+        "preprocessed_text": preprocessed_text
+    }
+
+# registers every file with the index's document dictionary and pairs it with its integer doc id. documents are
+# named by file name, or by their path relative to root when one is given (so same-named files in different folders stay apart)
+def assign_doc_ids(file_paths: List[str], index: AbstractIndex, root: Optional[str] = None) -> List[Tuple[int, str]]:
+    if root is not None:
+        return [(index.documents.add(os.path.relpath(file_path, root)), file_path) for file_path in file_paths]
+    return [(index.documents.add(os.path.basename(file_path)), file_path) for file_path in file_paths]
+
+# positions are only kept when the index was made with positional posting lists
+def is_positional(index: AbstractIndex) -> bool:
+    return issubclass(index.posting_type, PositionalPostingList)
+
+# term frequencies are only kept when the index was made with frequency posting lists
+def keeps_frequencies(index: AbstractIndex) -> bool:
+    return issubclass(index.posting_type, FrequencyPostingList)
+
+# the build_partial_index options that match the index's posting lists
+def posting_options(index: AbstractIndex) -> Dict[str, bool]:
+    return {"positional": is_positional(index), "frequencies": keeps_frequencies(index)}
+
+# stores the document lengths reported by build_partial_index and every document's words (the forward index
+# remove_document uses), then passes the partial indexes on
+def record_documents(results: Iterable[Tuple[Dict[str, List[Any]], List[Tuple[int, int]]]], index: AbstractIndex) -> Iterator[Dict[str, List[Any]]]:
+    documents = index.documents
+    for partial, lengths in results:
+        terms: Dict[int, List[str]] = {doc_id: [] for doc_id, length in lengths}
+        for word, docs in partial.items():
+            for doc in docs:
+                terms[doc[0] if isinstance(doc, tuple) else doc].append(word)
+        for doc_id, length in lengths:
+            documents.set_length(doc_id, length)
+            documents.record_terms(doc_id, terms[doc_id])
+        yield partial
+
+# crawls through files in the path, extracts metadata, and indexes them into the particular index structure.
+# path can also be a JSON Lines file or a .zip / .tar.gz archive, which are streamed instead of unpacked
+def index_files(path: str, index: AbstractIndex) -> None:
+    if path is not None:
+        print(f"path = {path}") # as long as the directory actually exists this should print, just a sanity check
+    if os.path.isdir(path):
+        index_file_list(find_json_files(path), index)
+    else:
+        index_records(read_corpus(path), index)
+
+# indexes the given files: gathers every word's doc ids first and then hands the index one sorted run, which it can
+# build in ~linear time (or merge into what it already holds). workers > 1 parses the files in a process pool.
+def index_file_list(file_paths: List[str], index: AbstractIndex, workers: Optional[int] = 1, chunk_size: int = 512, root: Optional[str] = None) -> None:
+    files = assign_doc_ids(file_paths, index, root) # ids are handed out up front so every worker knows them
+    if workers == 1:
+        inverted = merge_partial_indexes(record_documents([build_partial_index(files, **posting_options(index))], index))
+    else:
+        chunks = [files[i:i + chunk_size] for i in range(0, len(files), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            worker = bind(build_partial_index, **posting_options(index))
+            inverted = merge_partial_indexes(record_documents(pool.map(worker, chunks), index)) # map keeps results in chunk order
+    index.bulk_load(sorted(inverted.items()))
+
+# indexes a stream of (name, parsed JSON) articles from read_corpus. The stream is cut into chunks as it is read, so
+# only the chunks being parsed are in memory at once (workers > 1 keeps at most two chunks per worker in flight)
+def index_records(records: Iterable[Record], index: AbstractIndex, workers: Optional[int] = 1, chunk_size: int = 512) -> None:
+    records = iter(records)
+    def chunks():
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                return
+            yield [(index.documents.add(name), json_data) for name, json_data in chunk] # ids handed out in stream order
+    worker = bind(build_partial_index_from_records, **posting_options(index))
+    if workers == 1:
+        inverted = merge_partial_indexes(record_documents(map(worker, chunks()), index))
+    else:
+        window = 2 * (workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            inverted = merge_partial_indexes(record_documents(_map_in_order(pool, worker, chunks(), window), index))
+    index.bulk_load(sorted(inverted.items()))
+
+# like pool.map, but only submits up to window tasks ahead of the results being consumed (pool.map submits everything at once)
+def _map_in_order(pool: ProcessPoolExecutor, fn: Callable, items: Iterable[Any], window: int) -> Iterator[Any]:
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def build_partial_index(files: List[Tuple[int, str]], positional: bool = False, frequencies: bool = False) -> Tuple[Dict[str, List[Any]], List[Tuple[int, int]]]:
+    """
+    Worker task for parallel ingestion. Parses and tokenizes one chunk of files and
+    returns a partial inverted index mapping each word to the ids (in chunk order)
+    of the files that contain it, along with the length of every parsed file.
+
+    Args:
+        files (List[Tuple[int, str]]): (doc id, file path) pairs for this chunk.
+        positional (bool): Store (doc id, token offsets) pairs instead of bare doc ids.
+        frequencies (bool): Store (doc id, term frequency) pairs instead of bare doc ids.
+    Returns:
+        Tuple[Dict[str, List[Any]], List[Tuple[int, int]]]: The partial inverted index
+        for the chunk and (doc id, number of tokens) for each file.
+    """
+    partial: Dict[str, List[Any]] = {}
+    lengths: List[Tuple[int, int]] = []
+    for doc_id, file_path in files:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            try:
+                metadata = process_file(json.load(f))
+            except json.JSONDecodeError:
+                print(f"Error decoding JSON in file: {file_path}")
+                continue
+        add_to_partial(partial, lengths, doc_id, metadata["preprocessed_text"], positional, frequencies)
+    return partial, lengths
+
+
+def build_partial_index_from_records(records: List[Tuple[int, Dict[str, Any]]], positional: bool = False, frequencies: bool = False) -> Tuple[Dict[str, List[Any]], List[Tuple[int, int]]]:
+    """
+    Same as build_partial_index, for articles that were already read and parsed as
+    JSON (by one of the streaming corpus readers).
+
+    Args:
+        records (List[Tuple[int, Dict[str, Any]]]): (doc id, parsed JSON) pairs for this chunk.
+        positional (bool): Store (doc id, token offsets) pairs instead of bare doc ids.
+        frequencies (bool): Store (doc id, term frequency) pairs instead of bare doc ids.
+    Returns:
+        Tuple[Dict[str, List[Any]], List[Tuple[int, int]]]: The partial inverted index
+        for the chunk and (doc id, number of tokens) for each article.
+    """
+    partial: Dict[str, List[Any]] = {}
+    lengths: List[Tuple[int, int]] = []
+    for doc_id, json_data in records:
+        add_to_partial(partial, lengths, doc_id, process_file(json_data)["preprocessed_text"], positional, frequencies)
+    return partial, lengths
+
+# adds one parsed document's words (and its length) to a partial index
+def add_to_partial(partial: Dict[str, List[Any]], lengths: List[Tuple[int, int]], doc_id: int, words: List[str], positional: bool, frequencies: bool) -> None:
+    lengths.append((doc_id, len(words)))
+    for word, value in document_postings(doc_id, words, positional, frequencies).items():
+        partial.setdefault(word, []).append(value)
+
+def merge_partial_indexes(partials: Iterable[Dict[str, List[Any]]]) -> Dict[str, List[Any]]:
+    """
+    Merges partial inverted indexes into one. Partials must be given in chunk order;
+    each word's doc ids are concatenated in that order, so the merged postings
+    are the same no matter how many workers produced them.
+
+    Args:
+        partials (Iterable[Dict[str, List[Any]]]): Partial indexes in chunk order.
+    Returns:
+        Dict[str, List[Any]]: The merged inverted index.
+    """
+    merged: Dict[str, List[Any]] = {}
+    for partial in partials:
+        for word, docs in partial.items():
+            if word in merged:
+                merged[word].extend(docs)
+            else:
+                merged[word] = docs
+    return merged
+
+
+def index_files_parallel(path: str, index: AbstractIndex, workers: Optional[int] = None, chunk_size: int = 512) -> None:
+    """
+    Parallel version of index_files. The corpus is split into fixed-size chunks of
+    files that are parsed and tokenized by a process pool. The partial indexes are
+    merged in chunk order and bulk loaded into the given index as one sorted run, so the
+    result does not depend on the number of workers.
+
+    Args:
+        path (str): Root folder of the dataset.
+        index (AbstractIndex): The index structure to fill.
+        workers (Optional[int]): Number of worker processes (defaults to the CPU count).
+        chunk_size (int): Number of files handed to a worker at a time.
+    Returns:
+        None
+    """
+    if path is not None:
+        print(f"path = {path}")
+    if os.path.isdir(path):
+        index_file_list(find_json_files(path), index, workers=workers, chunk_size=chunk_size)
+    else:
+        index_records(read_corpus(path), index, workers=workers, chunk_size=chunk_size)
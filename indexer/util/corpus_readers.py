@@ -0,0 +1,110 @@
+import os
+import io
+import posixpath
+import gzip
+import json
+import tarfile
+import zipfile
+from typing import *
+
+BUFFER_SIZE = 1 << 20 # 1 MiB reads, so a packed corpus is read in a few large sequential chunks instead of one small read per article
+TAR_BUFFER_SIZE = 1 << 16 # tarfile's stream mode copies its whole buffer on every small read, so its own buffer stays small
+
+# every reader yields (document name, parsed JSON) pairs in a fixed order, ready for process_file
+Record = Tuple[str, Dict[str, Any]]
+
+
+# lists every .json file under path in a fixed (sorted) order so parallel runs always split the corpus the same way
+def find_json_files(path: str) -> List[str]:
+    file_paths = []
+    for root, subs, files in os.walk(path): # recursively go through the directory
+        for file in files:
+            if file.endswith('.json'):  # only for the .json files just in case, also just sanity check
+                file_paths.append(os.path.join(root, file)) # does: /top_folder/wtv_sub_folder(s) += /filename.json
+    file_paths.sort()
+    return file_paths
+
+# the articles of an unpacked corpus, one .json file each (the layout index_files has always read)
+def read_directory(path: str) -> Iterator[Record]:
+    for file_path in find_json_files(path):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            try:
+                yield os.path.basename(file_path), json.load(f)
+            except json.JSONDecodeError:
+                print(f"Error decoding JSON in file: {file_path}")
+
+# JSON Lines: one article per line. Articles are named <file name>:<line number> since a line has no file name of its own
+def read_jsonl(path: str) -> Iterator[Record]:
+    base = os.path.basename(path)
+    with open(path, 'r', encoding='utf-8', buffering=BUFFER_SIZE) as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield f"{base}:{line_no}", json.loads(line)
+            except json.JSONDecodeError:
+                print(f"Error decoding JSON on line {line_no} of {path}")
+
+# archive members are named by their path inside the archive (a/x.json and b/x.json are different documents),
+# without a leading ./ or / so the same archive always gives the same names
+def member_name(path: str) -> str:
+    return posixpath.normpath(path).lstrip('/')
+
+# a .zip of .json articles, read member by member without extracting anything to disk
+def read_zip(path: str) -> Iterator[Record]:
+    with open(path, 'rb', buffering=BUFFER_SIZE) as raw, zipfile.ZipFile(raw) as archive:
+        members = [info for info in archive.infolist() if not info.is_dir() and info.filename.endswith('.json')]
+        members.sort(key=lambda info: info.header_offset) # archive order, so the file is read front to back
+        for info in members:
+            with archive.open(info) as f:
+                try:
+                    yield member_name(info.filename), json.load(f)
+                except json.JSONDecodeError:
+                    print(f"Error decoding JSON in {path}: {info.filename}")
+
+# a .tar.gz (or plain .tar) of .json articles, decompressed as one stream: tar can only be read in order anyway.
+# the decompression happens in BUFFER_SIZE chunks below tarfile, which then only splits the stream into members
+def read_tar(path: str) -> Iterator[Record]:
+    with open(path, 'rb', buffering=BUFFER_SIZE) as raw:
+        stream = io.BufferedReader(gzip.GzipFile(fileobj=raw), BUFFER_SIZE) if path.endswith(('.gz', '.tgz')) else raw
+        with tarfile.open(fileobj=stream, mode="r|", bufsize=TAR_BUFFER_SIZE) as archive:
+            for member in archive:
+                if not member.isfile() or not member.name.endswith('.json'):
+                    continue
+                f = archive.extractfile(member)
+                try:
+                    yield member_name(member.name), json.load(f)
+                except json.JSONDecodeError:
+                    print(f"Error decoding JSON in {path}: {member.name}")
+
+READERS: Dict[str, Callable[[str], Iterator[Record]]] = {
+    '.jsonl': read_jsonl,
+    '.ndjson': read_jsonl,
+    '.zip': read_zip,
+    '.tar.gz': read_tar,
+    '.tgz': read_tar,
+    '.tar': read_tar,
+}
+
+
+def read_corpus(path: str) -> Iterator[Record]:
+    """
+    Streams the articles of a corpus as (document name, parsed JSON) pairs, picking the
+    reader from the path: a directory of .json files, a JSON Lines file, or a .zip /
+    .tar.gz / .tar archive of .json files. Archives are read sequentially in large
+    buffered chunks and never extracted to disk. Other formats can be supported by
+    adding a reader to READERS.
+
+    Args:
+        path (str): The corpus directory or file.
+    Returns:
+        Iterator[Record]: The articles, in a fixed order.
+    Raises:
+        ValueError: If there is no reader for the path.
+    """
+    if os.path.isdir(path):
+        return read_directory(path)
+    for suffix, reader in READERS.items():
+        if path.endswith(suffix):
+            return reader(path)
+    raise ValueError(f"don't know how to read a corpus from {path} (expected a directory or one of {', '.join(READERS)})")
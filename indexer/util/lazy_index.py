@@ -0,0 +1,158 @@
+from array import array
+from bisect import bisect_left
+from typing import *
+from indexer.abstract_index import AbstractIndex
+from indexer.query.cache import QueryCache, _MISSING
+from indexer.util.binary_index import HEADER, POSTING_TYPES, read_header, read_table, read_documents, decode_postings
+
+
+class LazyIndex(AbstractIndex):
+    """
+    A read-only handle on a file written by save_binary_index that only loads the term
+    dictionary when it is opened. A term's postings are read from the file the first
+    time it is searched and kept in a bounded LRU cache (a QueryCache, limited by both
+    the number of posting lists and the total number of postings), so repeated
+    searches for hot terms don't touch the file again.
+
+    Unlike MmapIndex, the terms are binary searched in memory and only postings are
+    read from disk, with plain file reads. Open time and resident memory therefore
+    follow the size of the dictionary plus the queried working set, not the size of
+    the postings.
+
+    Methods:
+        search(key: str) -> Optional[PostingList]:
+            Returns the postings of key, or None if it isn't indexed.
+        search_many(keys: Iterable[str]) -> List[Optional[PostingList]]:
+            Looks up a batch of keys, reading the uncached postings in file order.
+        range(lo: str, hi: str) -> Iterator[Tuple[str, PostingList]]:
+            Yields the (term, postings) pairs with lo <= term < hi (read without filling the cache).
+        range_keys(lo: str, hi: str) -> Iterator[str]:
+            Yields the terms with lo <= term < hi without reading any postings.
+        close() -> None:
+            Closes the file.
+    """
+    def __init__(self, path: str, max_terms: int = 10000, max_postings: int = 5000000):
+        self.path = path
+        self.max_terms = max_terms
+        self.max_postings = max_postings
+        self._open()
+
+    def _open(self):
+        self._file = open(self.path, 'rb')
+        try:
+            header = read_header(self._file.read(HEADER.size), self.path)
+        except ValueError:
+            self._file.close()
+            raise
+        kind, num_terms, num_docs, num_removed = header[2:6]
+        term_offsets, terms, posting_offsets, postings, name_offsets, names, lengths, removed = header[6:]
+        super().__init__(POSTING_TYPES[kind])
+        self._kind = kind
+        self._postings = postings
+        self._posting_offsets = array('Q', read_table(self._read(posting_offsets, (num_terms + 1) * 8), 'Q', num_terms + 1))
+        offsets = read_table(self._read(term_offsets, (num_terms + 1) * 8), 'Q', num_terms + 1)
+        term_data = self._read(terms, offsets[num_terms])
+        self._terms: List[str] = [str(term_data[offsets[i]:offsets[i + 1]], "utf-8") for i in range(num_terms)]
+        name_table = read_table(self._read(name_offsets, (num_docs + 1) * 8), 'Q', num_docs + 1)
+        self.documents = read_documents(name_table, self._read(names, name_table[num_docs]),
+                                        read_table(self._read(lengths, num_docs * 4), 'I', num_docs),
+                                        read_table(self._read(removed, num_removed * 4), 'I', num_removed))
+        self.cache = QueryCache(max_entries=self.max_terms, max_postings=self.max_postings)
+
+    def _read(self, offset: int, size: int) -> bytes:
+        self._file.seek(offset)
+        return self._file.read(size)
+
+    def _position(self, key: str) -> int:
+        # index of key in the term dictionary, or -1 if it isn't indexed
+        i = bisect_left(self._terms, key)
+        return i if i < len(self._terms) and self._terms[i] == key else -1
+
+    def _read_postings(self, i: int) -> Any:
+        # reads and decodes the postings of the i-th term
+        start, end = self._posting_offsets[i], self._posting_offsets[i + 1]
+        return decode_postings(self._read(self._postings + start, end - start), 0, self._kind)
+
+    def _load(self, i: int) -> Any:
+        # reads the postings of the i-th term and caches them
+        postings = self._read_postings(i)
+        self.cache.put(self._terms[i], postings, (self._terms[i],))
+        return postings
+
+    def insert(self, key: Any, value: Any) -> None:
+        raise NotImplementedError("LazyIndex is read-only, rebuild the index and save it again")
+
+    def search(self, key: str) -> Optional[Any]:
+        i = self._position(key)
+        if i < 0:
+            return None # answered from the dictionary, nothing is read
+        postings = self.cache.get(key)
+        if postings is _MISSING:
+            postings = self._load(i)
+        return postings
+
+    def search_many(self, keys: Iterable[str]) -> List[Optional[Any]]:
+        # cached postings are returned as they are, the rest are read in file order so the reads move forward only
+        keys = list(keys)
+        found = {}
+        misses = []
+        for key in dict.fromkeys(keys):
+            i = self._position(key)
+            if i < 0:
+                found[key] = None
+                continue
+            postings = self.cache.get(key)
+            if postings is _MISSING:
+                misses.append(i)
+            else:
+                found[key] = postings
+        for i in sorted(misses):
+            found[self._terms[i]] = self._load(i)
+        return [found[key] for key in keys]
+
+    def _span(self, lo: Optional[str], hi: Optional[str]) -> range:
+        # positions of the terms in [lo, hi), found by binary search in the dictionary
+        terms = self._terms
+        return range(0 if lo is None else bisect_left(terms, lo), len(terms) if hi is None else bisect_left(terms, hi))
+
+    def range(self, lo: Optional[str] = None, hi: Optional[str] = None) -> Iterator[Tuple[str, Any]]:
+        # a scan reads every posting list in its range once, so what it reads is not cached (it would push out the hot terms)
+        terms = self._terms
+        for i in self._span(lo, hi):
+            postings = self.cache.get(terms[i])
+            yield terms[i], (self._read_postings(i) if postings is _MISSING else postings)
+
+    def range_keys(self, lo: Optional[str] = None, hi: Optional[str] = None) -> Iterator[str]:
+        # straight from the dictionary, nothing is read from the file
+        terms = self._terms
+        for i in self._span(lo, hi):
+            yield terms[i]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._terms)
+
+    def get_keys_in_order(self) -> List[str]:
+        return self._terms
+
+    def count_keys(self) -> int:
+        return len(self._terms)
+
+    def close(self) -> None:
+        """
+        Closes the file (the cached postings stay usable).
+        """
+        self._file.close()
+
+    def __enter__(self) -> "LazyIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __getstate__(self):
+        # the open file can't be pickled, the handle is opened again (with an empty cache) on load
+        return {"path": self.path, "max_terms": self.max_terms, "max_postings": self.max_postings}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
@@ -0,0 +1,179 @@
+import os
+import json
+import hashlib
+from typing import *
+from indexer.abstract_index import AbstractIndex
+from indexer.util.corpus import find_json_files, index_file_list
+
+MANIFEST_VERSION = 2 # 2: documents are named by relative path instead of file name
+
+
+# the manifest is kept next to the pickle it describes: index.pkl -> index.pkl.manifest.json
+def manifest_path(pickle_path: str) -> str:
+    return pickle_path + ".manifest.json"
+
+# hash of the file's bytes, only needed when the size or mtime say the file may have changed
+def content_hash(file_path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """
+    Records every file that went into an index (its size, mtime and a hash of its
+    content), keyed by the file's path relative to the dataset root. Comparing it with
+    what is on disk tells which files are new, which changed and which were removed,
+    so a saved index can be brought up to date without parsing the whole corpus again.
+
+    A file whose size and mtime match its entry is taken as unchanged without being
+    read. Otherwise its content is hashed, so a file that was only touched (same bytes,
+    new mtime) is not re-indexed.
+
+    Methods:
+        load(path: str) -> Manifest:
+            Reads a manifest written by save (an empty one if the file doesn't exist).
+        save(path: str) -> None:
+            Writes the manifest as JSON.
+        diff(root: str, file_paths: List[str]) -> Tuple[List[str], List[str], List[str]]:
+            Splits the files into new, changed and removed ones.
+        record(root: str, file_path: str) -> None:
+            Stores the current fingerprint of a file.
+        forget(rel_path: str) -> None:
+            Drops a removed file.
+    """
+    def __init__(self, files: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.files: Dict[str, Dict[str, Any]] = files or {} # relative path -> {"size", "mtime_ns", "hash"}
+
+    @classmethod
+    def load(cls, path: str) -> "Manifest":
+        """
+        Reads a manifest from disk.
+
+        Parameters:
+            path (str): The manifest file.
+
+        Returns:
+            Manifest: The stored manifest, or an empty one if the file doesn't exist.
+
+        Raises:
+            ValueError: If the file was written by an unknown manifest version.
+        """
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"unsupported manifest version {data.get('version')!r} in {path}, rebuild the index without it")
+        return cls(data["files"])
+
+    def save(self, path: str) -> None:
+        """
+        Writes the manifest as JSON. The file is written under a temporary name and
+        then renamed, so a crash never leaves half a manifest behind.
+        """
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": MANIFEST_VERSION, "files": self.files}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+        print(f"Manifest saved to {path}")
+
+    def _changed(self, root: str, file_path: str) -> bool:
+        # True if file_path differs from its entry (a file without an entry counts as changed)
+        entry = self.files.get(os.path.relpath(file_path, root))
+        if entry is None:
+            return True
+        stat = os.stat(file_path)
+        if stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]:
+            return False # cheap check first, the content is only read when this fails
+        if stat.st_size != entry["size"] or content_hash(file_path) != entry["hash"]:
+            return True
+        entry["mtime_ns"] = stat.st_mtime_ns # only touched, remember the new mtime so it isn't hashed again next run
+        return False
+
+    def diff(self, root: str, file_paths: List[str]) -> Tuple[List[str], List[str], List[str]]:
+        """
+        Compares the manifest with the files currently in the dataset.
+
+        Parameters:
+            root (str): Root folder of the dataset.
+            file_paths (List[str]): The files found under root.
+
+        Returns:
+            Tuple[List[str], List[str], List[str]]: The new files and the changed files (as
+            paths under root), and the removed files (as paths relative to root).
+        """
+        added, changed = [], []
+        present = set()
+        for file_path in file_paths:
+            rel_path = os.path.relpath(file_path, root)
+            present.add(rel_path)
+            if rel_path not in self.files:
+                added.append(file_path)
+            elif self._changed(root, file_path):
+                changed.append(file_path)
+        removed = sorted(rel_path for rel_path in self.files if rel_path not in present)
+        return added, changed, removed
+
+    def record(self, root: str, file_path: str) -> None:
+        """
+        Stores the current size, mtime and content hash of a file.
+        """
+        stat = os.stat(file_path)
+        self.files[os.path.relpath(file_path, root)] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "hash": content_hash(file_path),
+        }
+
+    def forget(self, rel_path: str) -> None:
+        """
+        Drops the entry of a file that was removed from the dataset.
+        """
+        self.files.pop(rel_path, None)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+
+def index_files_incremental(path: str, index: AbstractIndex, manifest: Manifest, workers: Optional[int] = 1) -> Tuple[int, int, int]:
+    """
+    Brings an index built from path up to date. Documents whose files were removed or
+    changed are taken out of the index (using the words recorded for them at ingestion),
+    then only the new and changed files are parsed and merged in. The manifest is
+    updated to match, so it should be saved together with the index afterwards.
+
+    Documents are named by their path relative to path, the same key the manifest uses,
+    so files with the same name in different folders are separate documents and
+    removing one never touches the other.
+
+    Args:
+        path (str): Root folder of the dataset.
+        index (AbstractIndex): The index to update (empty for a first build).
+        manifest (Manifest): The manifest of the files already in the index.
+        workers (Optional[int]): Number of worker processes used to parse the files.
+    Returns:
+        Tuple[int, int, int]: The number of new, changed and removed files.
+    """
+    if not os.path.isdir(path):
+        raise ValueError(f"incremental indexing needs a dataset directory, got {path}") # an archive has no per-file mtimes to compare
+    added, changed, removed = manifest.diff(path, find_json_files(path))
+    print(f"path = {path}: {len(added)} new, {len(changed)} changed, {len(removed)} removed")
+
+    for rel_path in removed:
+        if rel_path in index.documents:
+            index.remove_document(rel_path)
+        manifest.forget(rel_path)
+    for file_path in changed:
+        rel_path = os.path.relpath(file_path, path)
+        if rel_path in index.documents:
+            index.remove_document(rel_path) # the new version is indexed again below
+
+    to_index = sorted(added + changed) # same order as find_json_files
+    for file_path in to_index:
+        manifest.record(path, file_path) # fingerprinted before parsing, so an edit made while indexing shows up next run
+    if to_index:
+        index_file_list(to_index, index, workers=workers, root=path)
+    return len(added), len(changed), len(removed)
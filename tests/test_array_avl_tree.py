@@ -0,0 +1,61 @@
+"""
+This module contains unit tests for the array-backed AVL tree and the slotted tree nodes.
+
+The following tests are included:
+- `test_matches_linked_avl`: Tests that the array layout gives the same results and shape as AVLTreeIndex.
+- `test_bulk_load`: Tests building a balanced tree from a sorted run, then inserting into it.
+- `test_range_and_leaves`: Tests range scans and leaf keys.
+- `test_nodes_have_slots`: Tests that tree nodes carry no per-instance __dict__.
+"""
+import pickle
+import random
+import pytest
+from indexer.trees.array_avl_tree import ArrayAVLTreeIndex
+from indexer.trees.avl_tree import AVLTreeIndex
+from indexer.trees.bst_node import BSTNode
+from indexer.trees.avl_node import AVLNode
+from indexer.trees.radix_node import RadixNode
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_matches_linked_avl(seed):
+  rng = random.Random(seed)
+  linked, packed = AVLTreeIndex(), ArrayAVLTreeIndex()
+  for i in range(4000):
+    key = f"w{rng.randrange(1500)}"
+    linked.insert(key, i)
+    packed.insert(key, i)
+
+  assert packed.get_keys_in_order() == linked.get_keys_in_order()
+  assert packed.tree_height() == linked.tree_height()
+  assert packed.count_nodes() == linked.count_nodes()
+  assert packed.get_balance_factors() == linked.get_balance_factors(linked.root)
+  assert all(packed.search(node.key) == node.values for node in linked)
+  assert packed.search("nope") is None
+  assert pickle.loads(pickle.dumps(packed)).get_keys_in_order() == packed.get_keys_in_order()
+
+def test_bulk_load():
+  packed = ArrayAVLTreeIndex()
+  packed.bulk_load((f"k{i:04d}", [i]) for i in range(1000))
+
+  assert packed.tree_height() == 10
+  assert all(abs(factor) <= 1 for _, factor in packed.get_balance_factors())
+  for i in range(1000):
+    packed.insert(f"k{i:04d}x", i)
+  assert all(abs(factor) <= 1 for _, factor in packed.get_balance_factors())
+  assert packed.search("k0500") == [500] and packed.search("k0500x") == [500]
+  with pytest.raises(ValueError):
+    ArrayAVLTreeIndex().bulk_load([("b", [1]), ("a", [2])])
+
+def test_range_and_leaves():
+  packed = ArrayAVLTreeIndex()
+  for key in "dbfaceg":
+    packed.insert(key, 1)
+
+  assert [key for key, _ in packed.range("b", "f")] == ["b", "c", "d", "e"]
+  assert [key for key, _ in packed.prefix("g")] == ["g"]
+  assert packed.get_leaf_keys() == ["a", "c", "e", "g"]
+
+@pytest.mark.parametrize("node", [BSTNode("a"), AVLNode("a"), RadixNode("a")])
+def test_nodes_have_slots(node):
+  assert not hasattr(node, "__dict__")
+  assert pickle.loads(pickle.dumps(node)).values == node.values
@@ -0,0 +1,124 @@
+"""
+This module contains unit tests for the memory-mapped binary index format in indexer.util.binary_index.
+
+The following tests are included:
+- `test_round_trip_matches_source`: Tests that every term's postings read back equal to the source index, for every index type.
+- `test_posting_kinds_round_trip`: Tests that frequencies and positions survive the round trip.
+- `test_missing_term_returns_none`: Tests that unknown terms (before, between and after the stored ones) return None.
+- `test_range_and_prefix`: Tests range and prefix scans over the mapped terms.
+- `test_range_keys_decodes_nothing`: Tests that key scans (and fuzzy lookups) never decode postings.
+- `test_documents_round_trip`: Tests that document names, lengths and removed documents are restored.
+- `test_rejects_other_files`: Tests that a pickle is not mistaken for a binary index.
+- `test_query_planner_runs_on_mmap_index`: Tests that boolean queries run against a mapped index.
+"""
+import pickle
+import pytest
+from indexer.util.binary_index import MmapIndex, save_binary_index, is_binary_index
+from indexer.util.pickle_utils import save_index_to_pickle
+from indexer.trees.bst_index import BinarySearchTreeIndex
+from indexer.trees.avl_tree import AVLTreeIndex
+from indexer.maps.hash_map import HashMapIndex
+from indexer.arrays.array import SortedArrayIndex
+from indexer.trees.radix_tree import RadixTreeIndex
+from indexer.postings.compressed import CompressedPostingList
+from indexer.postings.frequency import FrequencyPostingList
+from indexer.postings.positional import PositionalPostingList
+from indexer.query.planner import boolean_search
+from indexer.query.fuzzy import fuzzy_terms
+
+DOCS = {
+  "a.json": ["stock", "market", "rally", "stock"],
+  "b.json": ["bank", "market", "crédit"],
+  "c.json": ["stock", "bank", "bond"],
+}
+
+def build(index_type, posting_type=None):
+  index = index_type() if posting_type is None else index_type(posting_type=posting_type)
+  for name, terms in DOCS.items():
+    doc_id = index.documents.add(name)
+    index.documents.set_length(doc_id, len(terms))
+    for position, term in enumerate(terms):
+      if posting_type is PositionalPostingList:
+        index.insert(term, (doc_id, [position]))
+      elif posting_type is FrequencyPostingList:
+        index.insert(term, (doc_id, terms.count(term)))
+      else:
+        index.insert(term, doc_id)
+  return index
+
+@pytest.fixture
+def path(tmp_path):
+  return str(tmp_path / "index.idx")
+
+@pytest.mark.parametrize("index_type", [BinarySearchTreeIndex, AVLTreeIndex, HashMapIndex, SortedArrayIndex, RadixTreeIndex])
+def test_round_trip_matches_source(index_type, path):
+  index = build(index_type)
+  save_binary_index(index, path)
+  with MmapIndex(path) as mapped:
+    assert mapped.get_keys_in_order() == sorted(index.get_keys_in_order())
+    for term in index.get_keys_in_order():
+      assert list(mapped.search(term)) == list(index.search(term))
+
+@pytest.mark.parametrize("posting_type", [CompressedPostingList, FrequencyPostingList, PositionalPostingList])
+def test_posting_kinds_round_trip(posting_type, path):
+  index = build(HashMapIndex, posting_type)
+  save_binary_index(index, path)
+  with MmapIndex(path) as mapped:
+    assert mapped.posting_type is posting_type
+    postings = mapped.search("stock")
+    assert isinstance(postings, posting_type)
+    assert list(postings) == [0, 2]
+    if posting_type is FrequencyPostingList:
+      assert [postings.tf_at(0), postings.tf_at(1)] == [2, 1]
+    if posting_type is PositionalPostingList:
+      assert postings.positions_of(0) == [0, 3]
+
+@pytest.mark.parametrize("term", ["aaa", "bc", "zzz", "stocks"])
+def test_missing_term_returns_none(term, path):
+  save_binary_index(build(SortedArrayIndex), path)
+  with MmapIndex(path) as mapped:
+    assert mapped.search(term) is None
+
+def test_range_and_prefix(path):
+  save_binary_index(build(BinarySearchTreeIndex), path)
+  with MmapIndex(path) as mapped:
+    assert [term for term, docs in mapped.range("bank", "market")] == ["bank", "bond", "crédit"]
+    assert [(term, list(docs)) for term, docs in mapped.prefix("st")] == [("stock", [0, 2])]
+    assert mapped.search_many(["bond", "nope"])[1] is None
+
+def test_range_keys_decodes_nothing(path, monkeypatch):
+  save_binary_index(build(AVLTreeIndex), path)
+  with MmapIndex(path) as mapped:
+    monkeypatch.setattr(mapped, "_postings_at", lambda i: pytest.fail("postings were decoded"))
+    assert list(mapped.range_keys("bank", "market")) == ["bank", "bond", "crédit"]
+    assert list(mapped.range_keys("s")) == ["stock"]
+    assert list(mapped.range_keys(hi="bond")) == ["bank"]
+    assert fuzzy_terms(mapped, "bonk", 1) == [("bank", 1), ("bond", 1)]
+
+def test_documents_round_trip(path):
+  index = build(SortedArrayIndex)
+  index.documents.remove(1)
+  save_binary_index(index, path)
+  with MmapIndex(path) as mapped:
+    assert mapped.documents.resolve([0, 2]) == ["a.json", "c.json"]
+    assert mapped.documents.length_of(0) == 4
+    assert mapped.documents.is_removed(1)
+    assert mapped.documents.count() == 2
+
+def test_rejects_other_files(path, tmp_path):
+  pickle_path = str(tmp_path / "index.pkl")
+  save_index_to_pickle(build(HashMapIndex), pickle_path)
+  assert not is_binary_index(pickle_path)
+  with pytest.raises(ValueError):
+    MmapIndex(pickle_path)
+  save_binary_index(build(HashMapIndex), path)
+  assert is_binary_index(path)
+
+def test_query_planner_runs_on_mmap_index(path):
+  save_binary_index(build(AVLTreeIndex), path)
+  mapped = MmapIndex(path)
+  assert list(boolean_search(mapped, "stock AND NOT bank")) == [0]
+  reopened = pickle.loads(pickle.dumps(mapped)) # pickles as its path
+  assert list(reopened.search("market")) == [0, 1]
+  reopened.close()
+  mapped.close()
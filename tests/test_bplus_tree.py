@@ -0,0 +1,130 @@
+"""
+This module contains unit tests for the B+-tree index and its page stores.
+
+The following tests are included:
+- `test_insert_and_search`: Tests random inserts (with many splits) against a dictionary.
+- `test_leaves_are_linked`: Tests that walking the leaf links gives every key in order.
+- `test_height_is_logarithmic`: Tests the tree height for a given fanout.
+- `test_bulk_load`: Tests building a tree bottom up for many sizes and fanouts.
+- `test_range_and_prefix`: Tests range and prefix scans against the sorted key list.
+- `test_file_page_store`: Tests a tree kept in a file, reopened and pickled.
+- `test_file_page_store_compacts`: Tests that rewriting pages doesn't grow the file without bound.
+"""
+import os
+import pickle
+import random
+import pytest
+from indexer.trees.bplus_tree import BPlusTreeIndex, InternalPage
+from indexer.trees.page_store import FilePageStore
+
+def random_words(n, seed):
+  rng = random.Random(seed)
+  return ["".join(rng.choice("abcdefgh") for _ in range(rng.randint(1, 7))) for _ in range(n)]
+
+def check_structure(tree):
+  # every page except the root holds between 1 and fanout keys, and all leaves are at the same depth
+  depths = set()
+  stack = [(tree.store.root_id, 1)]
+  while stack:
+    page_id, depth = stack.pop()
+    page = tree.store.read(page_id)
+    assert len(page.keys) <= tree.fanout
+    if isinstance(page, InternalPage):
+      assert len(page.children) == len(page.keys) + 1 and page.keys == sorted(page.keys)
+      stack.extend((child, depth + 1) for child in page.children)
+    else:
+      depths.add(depth)
+  assert len(depths) == 1
+
+@pytest.mark.parametrize("fanout", [3, 4, 16])
+def test_insert_and_search(fanout):
+  tree = BPlusTreeIndex(fanout=fanout)
+  expected = {}
+  for i, word in enumerate(random_words(3000, fanout)):
+    tree.insert(word, i)
+    expected.setdefault(word, []).append(i)
+
+  check_structure(tree)
+  assert tree.get_keys_in_order() == sorted(expected)
+  assert all(tree.search(word) == docs for word, docs in expected.items())
+  assert tree.search("zzz") is None and tree.search("") is None
+
+def test_leaves_are_linked():
+  tree = BPlusTreeIndex(fanout=4)
+  for word in random_words(500, 1):
+    tree.insert(word, 0)
+  page = tree.store.read(tree.store.root_id)
+  while isinstance(page, InternalPage):
+    page = tree.store.read(page.children[0])
+  keys = list(page.keys)
+  while page.next_leaf is not None:
+    page = tree.store.read(page.next_leaf)
+    keys.extend(page.keys)
+
+  assert keys == tree.get_keys_in_order()
+
+def test_height_is_logarithmic():
+  tree = BPlusTreeIndex(fanout=10)
+  for i in range(10000):
+    tree.insert(f"{i:05d}", i)
+
+  assert 4 <= tree.tree_height() <= 5
+
+@pytest.mark.parametrize("n", [0, 1, 3, 4, 5, 20, 17, 1000])
+@pytest.mark.parametrize("fanout", [3, 4, 64])
+def test_bulk_load(n, fanout):
+  tree = BPlusTreeIndex(fanout=fanout)
+  items = [(f"k{i:04d}", [i, i + 1]) for i in range(n)]
+  tree.bulk_load(items)
+
+  check_structure(tree)
+  assert tree.get_keys_in_order() == [key for key, _ in items]
+  assert all(tree.search(key) == values for key, values in items)
+  tree.insert("k0000a", 7) # still a working tree afterwards
+  assert tree.search("k0000a") == [7]
+  check_structure(tree)
+
+def test_range_and_prefix():
+  words = sorted(set(random_words(800, 5)))
+  tree = BPlusTreeIndex(fanout=5)
+  tree.bulk_load((word, [i]) for i, word in enumerate(words))
+
+  assert [key for key, _ in tree.range("bc", "d")] == [word for word in words if "bc" <= word < "d"]
+  assert [key for key, _ in tree.prefix("ab")] == [word for word in words if word.startswith("ab")]
+  assert list(tree.range("zz")) == []
+
+def test_file_page_store(tmp_path):
+  path = str(tmp_path / "tree.pages")
+  tree = BPlusTreeIndex(fanout=4, store=FilePageStore(path))
+  for i, word in enumerate(random_words(300, 9)):
+    tree.insert(word, i)
+  keys = tree.get_keys_in_order()
+  first = tree.search(keys[0])
+  tree.store.close()
+
+  reopened = BPlusTreeIndex(fanout=4, store=FilePageStore(path))
+  assert reopened.get_keys_in_order() == keys
+  assert reopened.search(keys[0]) == first
+  reopened.insert("new", 1)
+
+  copy = pickle.loads(pickle.dumps(reopened))
+  assert copy.search("new") == [1]
+  check_structure(copy)
+
+def test_file_page_store_compacts(tmp_path):
+  path = str(tmp_path / "tree.pages")
+  store = FilePageStore(path, min_compact_bytes=4096)
+  tree = BPlusTreeIndex(fanout=8, store=store)
+  for i in range(5000): # the same few leaves are rewritten on every insert
+    tree.insert(f"w{i % 20}", i)
+  live = store._live
+
+  assert os.path.getsize(path) <= 2 * live + 4096
+  assert store.dead_bytes() <= os.path.getsize(path) * store.compact_ratio
+  postings = tree.search("w3")
+  store.close()
+  assert os.path.getsize(path) <= live and not os.path.exists(path + ".compact")
+
+  reopened = BPlusTreeIndex(fanout=8, store=FilePageStore(path))
+  assert reopened.search("w3") == postings and len(postings) == 250
+  check_structure(reopened)
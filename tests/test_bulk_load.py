@@ -0,0 +1,54 @@
+"""
+This module contains unit tests for the bulk_load constructors of every index.
+
+The following tests are included:
+- `test_bulk_load_search`: Tests that every index answers searches after a bulk load.
+- `test_bulk_load_bst_is_balanced`: Tests that a sorted run builds a perfectly balanced BST.
+- `test_bulk_load_avl_heights`: Tests that bulk loaded AVL nodes have valid heights.
+- `test_bulk_load_array_merges_existing`: Tests merging a sorted run into a non-empty array.
+- `test_bulk_load_rejects_unsorted`: Tests that unsorted input raises ValueError.
+"""
+import pytest
+from indexer.trees.bst_index import BinarySearchTreeIndex
+from indexer.trees.avl_tree import AVLTreeIndex
+from indexer.maps.hash_map import HashMapIndex
+from indexer.arrays.array import SortedArrayIndex
+
+ITEMS = [(key, [i, i + 100]) for i, key in enumerate("abcdefghijklmno")]
+
+@pytest.mark.parametrize("index_type", [BinarySearchTreeIndex, AVLTreeIndex, HashMapIndex, SortedArrayIndex])
+def test_bulk_load_search(index_type):
+  index = index_type()
+  index.bulk_load(ITEMS)
+
+  for key, values in ITEMS:
+    assert index.search(key) == values
+  assert index.get_keys_in_order() == [key for key, _ in ITEMS]
+
+def test_bulk_load_bst_is_balanced():
+  bst = BinarySearchTreeIndex()
+  bst.bulk_load(ITEMS)
+
+  assert bst.count_nodes() == 15
+  assert bst.tree_height() == 4
+
+def test_bulk_load_avl_heights():
+  avl = AVLTreeIndex()
+  avl.bulk_load(ITEMS)
+
+  assert avl.root.height == avl.tree_height()
+  assert all(abs(factor) <= 1 for _, factor in avl.get_balance_factors(avl.root))
+
+def test_bulk_load_array_merges_existing():
+  array = SortedArrayIndex()
+  array.insert('b', 1)
+  array.insert('z', 2)
+  array.bulk_load([('a', [3]), ('b', [4]), ('c', [5])])
+
+  assert array.get_keys_in_order() == ['a', 'b', 'c', 'z']
+  assert array.search('b') == [1, 4]
+
+@pytest.mark.parametrize("index_type", [BinarySearchTreeIndex, SortedArrayIndex])
+def test_bulk_load_rejects_unsorted(index_type):
+  with pytest.raises(ValueError):
+    index_type().bulk_load([('b', [1]), ('a', [2])])
@@ -0,0 +1,64 @@
+"""
+This module contains unit tests for the query cache in indexer.query.cache.
+
+The following tests are included:
+- `test_lru_eviction`: Tests that the least recently used entry is evicted first.
+- `test_size_aware_eviction`: Tests that the cache stays under its postings budget.
+- `test_cached_index_hits_and_misses`: Tests the hit/miss counters for single and multi-word lookups.
+- `test_insert_invalidates_affected_entries`: Tests that an insert drops only the entries using that word.
+"""
+import pytest
+from indexer.query.cache import QueryCache, CachedIndex, _MISSING
+from indexer.arrays.array import SortedArrayIndex
+from indexer.maps.hash_map import HashMapIndex
+
+@pytest.fixture
+def cached():
+  index = HashMapIndex()
+  index.bulk_load([('bank', [1, 2, 3]), ('rate', [2, 3]), ('stock', [3, 4])])
+  return CachedIndex(index)
+
+def test_lru_eviction():
+  cache = QueryCache(max_entries=2)
+  cache.put('a', [1], ['a'])
+  cache.put('b', [2], ['b'])
+  cache.get('a')
+  cache.put('c', [3], ['c'])
+
+  assert cache.get('b') is _MISSING
+  assert cache.get('a') == [1]
+  assert cache.evictions == 1
+
+def test_size_aware_eviction():
+  cache = QueryCache(max_postings=5)
+  cache.put('a', [1, 2, 3], ['a'])
+  cache.put('b', [1, 2, 3], ['b'])
+  cache.put('huge', list(range(10)), ['huge'])
+
+  assert len(cache) == 1 and cache.total_postings == 3
+  assert cache.get('b') == [1, 2, 3]
+
+def test_cached_index_hits_and_misses(cached):
+  assert cached.search('bank') == [1, 2, 3]
+  assert cached.search('bank') == [1, 2, 3]
+  assert cached.search('missing') is None
+  assert cached.search('missing') is None
+  assert cached.search_all(['rate', 'bank']) == [2, 3]
+  assert cached.search_all(['bank', 'rate']) == [2, 3]
+
+  stats = cached.cache.stats()
+  assert stats['hits'] == 4 and stats['misses'] == 4
+  assert cached.get_keys_in_order() == ['bank', 'rate', 'stock']
+
+def test_insert_invalidates_affected_entries(cached):
+  cached.search_all(['bank', 'stock'])
+  cached.search_all(['rate', 'stock'])
+  cached.search('missing')
+  cached.insert('bank', 4)
+  cached.insert('missing', 7)
+
+  assert cached.search_all(['bank', 'stock']) == [3, 4]
+  assert cached.search('missing') == [7]
+  hits = cached.cache.hits
+  assert cached.search_all(['rate', 'stock']) == [3]
+  assert cached.cache.hits == hits + 1
@@ -0,0 +1,49 @@
+"""
+This module contains unit tests for the corpus ingestion helpers in indexer.util.corpus.
+
+The following tests are included:
+- `test_process_file_adds_title_and_author`: Tests that title and author tokens are added to the text.
+- `test_merge_partial_indexes_keeps_chunk_order`: Tests that merged postings follow chunk order.
+- `test_parallel_matches_sequential`: Tests that parallel ingestion builds the same index as index_files.
+"""
+import json
+import pytest
+from indexer.util.corpus import process_file, merge_partial_indexes, index_files, index_files_parallel
+from indexer.trees.bst_index import BinarySearchTreeIndex
+
+ARTICLES = {
+  "news_0001.json": {"title": "Stocks Rally", "url": "https://www.reuters.com/a", "author": "Jane Doe", "preprocessed_text": ["stock", "market"]},
+  "news_0002.json": {"title": "Bank News", "url": "https://cnn.com/b", "author": "", "preprocessed_text": ["bank", "market"]},
+  "news_0003.json": {"title": "Rally Ends", "url": "https://cnn.com/c", "author": "John Roe", "preprocessed_text": ["stock", "bank"]},
+}
+
+@pytest.fixture
+def corpus(tmp_path):
+  sub = tmp_path / "2018_01"
+  sub.mkdir()
+  for name, article in ARTICLES.items():
+    (sub / name).write_text(json.dumps(article))
+  return str(tmp_path)
+
+def test_process_file_adds_title_and_author():
+  metadata = process_file(dict(ARTICLES["news_0001.json"], preprocessed_text=["stock"]))
+
+  assert metadata["url"] == "www.reuters.com"
+  assert metadata["preprocessed_text"] == ["stock", "stocks", "rally", "jane", "doe"]
+
+def test_merge_partial_indexes_keeps_chunk_order():
+  merged = merge_partial_indexes([{"a": [1], "b": [1]}, {"a": [2, 3]}])
+
+  assert merged == {"a": [1, 2, 3], "b": [1]}
+
+def test_parallel_matches_sequential(corpus):
+  sequential = BinarySearchTreeIndex()
+  parallel = BinarySearchTreeIndex()
+  index_files(corpus, sequential)
+  index_files_parallel(corpus, parallel, workers=2, chunk_size=1)
+
+  assert parallel.get_keys_in_order() == sequential.get_keys_in_order()
+  for key in sequential.get_keys_in_order():
+    assert sorted(parallel.search(key)) == sorted(sequential.search(key))
+  assert parallel.search("market") == [0, 1]
+  assert parallel.documents.resolve(parallel.search("market")) == ["news_0001.json", "news_0002.json"]
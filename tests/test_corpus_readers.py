@@ -0,0 +1,92 @@
+"""
+This module contains unit tests for the streaming corpus readers in indexer.util.corpus_readers.
+
+The following tests are included:
+- `test_readers_yield_every_article`: Tests that the directory, zip and tar.gz readers yield the same articles.
+- `test_jsonl_names_by_line`: Tests that JSON Lines articles are named by line and blank or broken lines are skipped.
+- `test_archive_members_named_by_path`: Tests that same-named members in different archive folders stay separate documents.
+- `test_archive_matches_directory_index`: Tests that indexing an archive gives the same index as the unpacked directory.
+- `test_parallel_archive_matches_sequential`: Tests that archives indexed with worker processes match a sequential build.
+- `test_unknown_format_raises`: Tests that an unsupported path raises a ValueError.
+"""
+import os
+import json
+import tarfile
+import zipfile
+import pytest
+from indexer.util.corpus_readers import read_corpus
+from indexer.util.corpus import index_files, index_files_parallel
+from indexer.postings.frequency import FrequencyPostingList
+from indexer.maps.hash_map import HashMapIndex
+
+ARTICLES = {
+  "news_0001.json": {"title": "Stocks Rally", "url": "https://www.reuters.com/a", "author": "Jane Doe", "preprocessed_text": ["stock", "market"]},
+  "news_0002.json": {"title": "Bank News", "url": "https://cnn.com/b", "author": "", "preprocessed_text": ["bank", "market"]},
+  "news_0003.json": {"title": "Rally Ends", "url": "https://cnn.com/c", "author": "John Roe", "preprocessed_text": ["stock", "bank"]},
+}
+
+@pytest.fixture
+def corpora(tmp_path):
+  folder = tmp_path / "data" / "2018_01"
+  folder.mkdir(parents=True)
+  for name, article in ARTICLES.items():
+    (folder / name).write_text(json.dumps(article))
+  with zipfile.ZipFile(tmp_path / "data.zip", "w", zipfile.ZIP_DEFLATED) as archive:
+    for name, article in ARTICLES.items():
+      archive.writestr(f"2018_01/{name}", json.dumps(article))
+  with tarfile.open(tmp_path / "data.tar.gz", "w:gz") as archive:
+    archive.add(tmp_path / "data", arcname="data")
+  return {"dir": str(tmp_path / "data"), "zip": str(tmp_path / "data.zip"), "tar": str(tmp_path / "data.tar.gz")}
+
+def by_file_name(records):
+  # archives name articles by their path inside the archive, a directory by file name
+  return {os.path.basename(name): article for name, article in records}
+
+@pytest.mark.parametrize("kind", ["dir", "zip", "tar"])
+def test_readers_yield_every_article(corpora, kind):
+  assert by_file_name(read_corpus(corpora[kind])) == ARTICLES
+
+def test_archive_members_named_by_path(corpora, tmp_path):
+  assert sorted(name for name, article in read_corpus(corpora["zip"])) == [f"2018_01/{name}" for name in ARTICLES]
+  assert sorted(name for name, article in read_corpus(corpora["tar"])) == [f"data/2018_01/{name}" for name in ARTICLES]
+
+  with zipfile.ZipFile(tmp_path / "clash.zip", "w") as archive:
+    archive.writestr("a/x.json", json.dumps(ARTICLES["news_0001.json"]))
+    archive.writestr("./b/x.json", json.dumps(ARTICLES["news_0002.json"]))
+  index = HashMapIndex()
+  index_files(str(tmp_path / "clash.zip"), index)
+  assert index.documents.count() == 2
+  assert index.documents.resolve(index.search("market")) == ["a/x.json", "b/x.json"]
+  assert index.documents.resolve(index.search("bank")) == ["b/x.json"]
+
+def test_jsonl_names_by_line(tmp_path):
+  path = tmp_path / "news.jsonl"
+  lines = [json.dumps(ARTICLES["news_0001.json"]), "", "{broken", json.dumps(ARTICLES["news_0002.json"])]
+  path.write_text("\n".join(lines) + "\n")
+  records = list(read_corpus(str(path)))
+  assert [name for name, article in records] == ["news.jsonl:1", "news.jsonl:4"]
+  assert records[1][1] == ARTICLES["news_0002.json"]
+
+@pytest.mark.parametrize("kind", ["zip", "tar"])
+def test_archive_matches_directory_index(corpora, kind):
+  unpacked = HashMapIndex(posting_type=FrequencyPostingList)
+  packed = HashMapIndex(posting_type=FrequencyPostingList)
+  index_files(corpora["dir"], unpacked)
+  index_files(corpora[kind], packed)
+  assert packed.get_keys_in_order() == unpacked.get_keys_in_order()
+  for word in unpacked.get_keys_in_order():
+    assert [os.path.basename(name) for name in packed.documents.resolve(packed.search(word))] == unpacked.documents.resolve(unpacked.search(word))
+  assert packed.documents.average_length() == unpacked.documents.average_length()
+  assert packed.documents.terms_of(0) == unpacked.documents.terms_of(0)
+
+def test_parallel_archive_matches_sequential(corpora):
+  sequential = HashMapIndex()
+  parallel = HashMapIndex()
+  index_files(corpora["tar"], sequential)
+  index_files_parallel(corpora["tar"], parallel, workers=2, chunk_size=1)
+  for word in sequential.get_keys_in_order():
+    assert parallel.search(word) == sequential.search(word)
+
+def test_unknown_format_raises(tmp_path):
+  with pytest.raises(ValueError):
+    list(read_corpus(str(tmp_path / "corpus.rar")))
@@ -0,0 +1,188 @@
+"""
+This module contains unit tests for deleting postings, terms and whole documents.
+
+The following tests are included:
+- `test_posting_list_remove`: Tests removing ids from every kind of posting list.
+- `test_random_deletes_match_model`: Tests random inserts and deletes on every index against a dictionary.
+- `test_avl_stays_balanced`: Tests that AVL deletions keep every balance factor within 1.
+- `test_hash_tombstones`: Tests tombstone reuse, compaction and pickling.
+- `test_hash_delete_during_resize`: Tests that a deleted key doesn't come back from a half-migrated table.
+- `test_hash_counters_match_table`: Tests that the occupied and tombstone counters stay exact through resizes.
+- `test_remove_and_update_document`: Tests removing and re-indexing a document through the forward index.
+- `test_update_document_keeps_positions_and_tfs`: Tests that re-indexed documents get their positions and term frequencies back.
+- `test_remove_unknown_document`: Tests that unknown or already removed documents don't touch the index.
+- `test_ingestion_records_terms`: Tests that index_files fills the forward index.
+"""
+import json
+import pickle
+import random
+import pytest
+from indexer.postings.posting_list import PostingList
+from indexer.postings.compressed import CompressedPostingList
+from indexer.postings.frequency import FrequencyPostingList
+from indexer.postings.positional import PositionalPostingList
+from indexer.trees.bst_index import BinarySearchTreeIndex
+from indexer.trees.avl_tree import AVLTreeIndex
+from indexer.trees.array_avl_tree import ArrayAVLTreeIndex
+from indexer.trees.radix_tree import RadixTreeIndex
+from indexer.trees.bplus_tree import BPlusTreeIndex
+from indexer.maps.hash_map import HashMapIndex, TOMBSTONE
+from indexer.arrays.array import SortedArrayIndex
+from indexer.query.cache import CachedIndex
+from indexer.query.planner import boolean_search
+from indexer.query.phrase import phrase_search
+from indexer.query.ranking import BM25Ranker
+from indexer.util.corpus import index_files
+
+INDEX_TYPES = [BinarySearchTreeIndex, AVLTreeIndex, ArrayAVLTreeIndex, RadixTreeIndex, HashMapIndex, SortedArrayIndex,
+               lambda: BPlusTreeIndex(fanout=4), lambda: CachedIndex(SortedArrayIndex())]
+
+@pytest.mark.parametrize("posting_type", [PostingList, CompressedPostingList, FrequencyPostingList, PositionalPostingList])
+def test_posting_list_remove(posting_type):
+  postings = posting_type()
+  for doc_id in [1, 5, 9, 300, 301]:
+    postings.add(doc_id)
+
+  assert postings.remove(9) and postings.remove(1)
+  assert not postings.remove(9) and not postings.remove(2)
+  assert postings == [5, 300, 301]
+
+def test_positional_remove_keeps_offsets():
+  postings = PositionalPostingList([(1, [0, 4]), (2, [3]), (3, [1, 2, 200])])
+  postings.remove(2)
+
+  assert postings.positions_of(1) == [0, 4]
+  assert postings.positions_of(3) == [1, 2, 200]
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_random_deletes_match_model(index_type):
+  rng = random.Random(5)
+  index = index_type()
+  model = {}
+  for step in range(4000):
+    key = f"w{rng.randrange(300)}"
+    doc = rng.randrange(6)
+    if rng.random() < 0.55:
+      index.insert(key, doc)
+      model.setdefault(key, set()).add(doc)
+    else:
+      assert index.delete(key, doc) == (doc in model.get(key, ()))
+      model.get(key, set()).discard(doc)
+      if key in model and not model[key]:
+        del model[key]
+
+  assert index.get_keys_in_order() == sorted(model)
+  for key in ["w%d" % i for i in range(300)]:
+    result = index.search(key)
+    assert sorted(result or []) == sorted(model.get(key, ()))
+
+def test_avl_stays_balanced():
+  avl = AVLTreeIndex()
+  keys = list(range(2000))
+  random.Random(2).shuffle(keys)
+  for key in keys:
+    avl.insert(key, 0)
+  for key in keys[:1500]:
+    assert avl.delete(key, 0)
+
+  assert avl.get_keys_in_order() == sorted(keys[1500:])
+  assert all(abs(factor) <= 1 for _, factor in avl.get_balance_factors(avl.root))
+  assert all(node.height == avl._tree_height(node) for node in avl)
+
+def test_hash_tombstones():
+  hash_map = HashMapIndex(expected_keys=64)
+  for i in range(40):
+    hash_map.insert(f"k{i}", i)
+  for i in range(10):
+    hash_map.delete(f"k{i}", i)
+
+  assert hash_map.num_tombstones == 10 and hash_map.count_keys() == 30
+  copy = pickle.loads(pickle.dumps(hash_map))
+  assert sum(1 for slot in copy.buckets if slot is TOMBSTONE) == 10
+  assert copy.search("k20") == [20] and copy.search("k5") is None
+
+  for i in range(10, 39):
+    hash_map.delete(f"k{i}", i)
+  assert hash_map.num_tombstones <= hash_map.bucket_size * 0.25
+  assert hash_map.get_keys_in_order() == ["k39"]
+
+def test_hash_delete_during_resize():
+  hash_map = HashMapIndex(expected_keys=100)
+  i = 0
+  while hash_map._old_buckets is None:
+    hash_map.insert(f"k{i}", i)
+    i += 1
+  hash_map.insert("extra", 1) # moves the first slots of the old table over
+  assert hash_map._old_buckets is not None
+  moved = next(term for term, _ in hash_map._entries() if hash_map._probe(hash_map._old_buckets, term)[0] < hash_map._migrate_pos)
+
+  assert hash_map.delete(moved, int(moved[1:]))
+  assert hash_map.search(moved) is None
+
+def test_hash_counters_match_table():
+  for trial in range(200):
+    rng = random.Random(trial)
+    hash_map = HashMapIndex(expected_keys=8)
+    for step in range(300):
+      key = f"k{rng.randrange(60)}"
+      if rng.random() < 0.6:
+        hash_map.insert(key, 0)
+      else:
+        hash_map.delete(key, 0)
+      assert hash_map.num_tombstones == sum(1 for slot in hash_map.buckets if slot is TOMBSTONE)
+      assert hash_map.num_occupied == sum(1 for slot in hash_map.buckets if slot is not None and slot is not TOMBSTONE)
+
+def test_remove_and_update_document():
+  index = CachedIndex(AVLTreeIndex())
+  index.add_document("a.json", ["stock", "market", "stock"])
+  index.add_document("b.json", ["bank", "market"])
+  assert index.search("market") == [0, 1]
+
+  assert index.remove_document("a.json") == 2
+  assert index.search("stock") is None and index.search("market") == [1]
+  assert boolean_search(index, "NOT bank") == []
+  assert index.documents.count() == 1 and index.documents.average_length() == 2
+
+  assert index.update_document("b.json", ["bond"]) == 1
+  assert index.search("bank") is None and index.search("bond") == [1]
+  assert index.update_document("a.json", ["stock"]) == 0
+  assert index.search("stock") == [0]
+
+def test_update_document_keeps_positions_and_tfs():
+  positional = HashMapIndex(posting_type=PositionalPostingList)
+  positional.add_document("a.json", ["old", "news"])
+  doc_id = positional.update_document("a.json", ["new", "york", "times", "new"])
+  assert positional.search("new").positions_of(doc_id) == [0, 3]
+  assert phrase_search(positional, ["new", "york"]) == [doc_id]
+
+  frequencies = SortedArrayIndex(posting_type=FrequencyPostingList)
+  frequencies.add_document("a.json", ["bank"])
+  frequencies.add_document("b.json", ["bank", "stock"])
+  frequencies.update_document("a.json", ["bank", "bank", "bank"])
+  assert frequencies.search("bank").tf_at(0) == 3
+  scorer = BM25Ranker(frequencies)
+  assert [doc_id for doc_id, _ in scorer.top_k(["bank"], 2)] == [0, 1]
+
+def test_remove_unknown_document():
+  index = AVLTreeIndex()
+  index.add_document("a.json", ["stock"])
+  with pytest.raises(ValueError):
+    index.remove_document("missing.json")
+  with pytest.raises(ValueError):
+    index.remove_document(7)
+
+  assert index.remove_document(0) == 1
+  assert index.remove_document("a.json") == 0
+  index.documents.remove(0)
+  index.documents.remove(42)
+  assert index.documents.count() == 0 and len(index.documents) == 1
+
+def test_ingestion_records_terms(tmp_path):
+  for name, words in [("x.json", ["red", "blue"]), ("y.json", ["blue"])]:
+    (tmp_path / name).write_text(json.dumps({"title": "", "preprocessed_text": words}))
+  index = SortedArrayIndex()
+  index_files(str(tmp_path), index)
+
+  assert sorted(index.documents.terms_of(index.documents.get_id("x.json"))) == ["blue", "red"]
+  index.remove_document("x.json")
+  assert index.get_keys_in_order() == ["blue"]
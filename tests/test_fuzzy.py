@@ -0,0 +1,80 @@
+"""
+This module contains unit tests for fuzzy (typo-tolerant) term lookup.
+
+The following tests are included:
+- `test_levenshtein`: Tests the edit distance on known pairs.
+- `test_bk_tree_matches_brute_force`: Tests BK-tree searches against checking every word.
+- `test_fuzzy_terms_matches_brute_force`: Tests fuzzy lookup on every index type against checking every word.
+- `test_fuzzy_search`: Tests that the postings of all the close words are unioned.
+- `test_hash_map_keeps_bk_tree`: Tests that HashMapIndex reuses one BK-tree and keeps it in step with inserts and deletes.
+"""
+import pickle
+import random
+import pytest
+from indexer.query.fuzzy import levenshtein, BKTree, fuzzy_terms, fuzzy_search
+from indexer.trees.bst_index import BinarySearchTreeIndex
+from indexer.trees.avl_tree import AVLTreeIndex
+from indexer.maps.hash_map import HashMapIndex
+from indexer.arrays.array import SortedArrayIndex
+
+def random_words(n, seed):
+  rng = random.Random(seed)
+  return sorted({"".join(rng.choice("abcde") for _ in range(rng.randint(1, 6))) for _ in range(n)})
+
+def brute_force(words, word, k):
+  matches = [(other, levenshtein(word, other)) for other in words]
+  return sorted([match for match in matches if match[1] <= k], key=lambda match: (match[1], match[0]))
+
+@pytest.mark.parametrize("a, b, distance", [("", "", 0), ("kitten", "sitting", 3), ("north", "nroth", 2), ("", "abc", 3), ("flaw", "lawn", 2)])
+def test_levenshtein(a, b, distance):
+  assert levenshtein(a, b) == distance
+  assert levenshtein(b, a) == distance
+
+@pytest.mark.parametrize("k", [0, 1, 2])
+def test_bk_tree_matches_brute_force(k):
+  words = random_words(400, 1)
+  tree = BKTree(words + words[:10])
+
+  assert len(tree) == len(words)
+  for query in random_words(30, 2):
+    assert tree.search(query, k) == brute_force(words, query, k)
+
+@pytest.mark.parametrize("index_type", [BinarySearchTreeIndex, AVLTreeIndex, HashMapIndex, SortedArrayIndex])
+@pytest.mark.parametrize("k", [0, 1, 2])
+def test_fuzzy_terms_matches_brute_force(index_type, k):
+  words = random_words(400, 3)
+  index = index_type()
+  for i, word in enumerate(words):
+    index.insert(word, i)
+
+  for query in random_words(30, 4) + [""]:
+    assert fuzzy_terms(index, query, k) == brute_force(words, query, k)
+
+def test_fuzzy_search():
+  index = SortedArrayIndex()
+  index.bulk_load([("marker", [2]), ("market", [1, 4]), ("markets", [4, 7]), ("money", [3])])
+
+  assert fuzzy_search(index, "markte", 2) == [1, 2, 4, 7]
+  assert fuzzy_search(index, "markte", 0) == []
+  assert fuzzy_search(HashMapIndex(), "anything", 1) == []
+
+def test_hash_map_keeps_bk_tree():
+  words = random_words(300, 5)
+  index = HashMapIndex()
+  for i, word in enumerate(words):
+    index.insert(word, i)
+  fuzzy_terms(index, "abc", 1)
+  tree = index.bk_tree()
+
+  index.insert("zzzzz", 0)
+  for i, word in enumerate(words[:100]):
+    index.delete(word, i)
+  index.insert(words[0], 7) # a deleted word coming back
+  live = sorted(words[100:] + [words[0], "zzzzz"])
+  for query in random_words(20, 6) + ["zzzz"]:
+    assert fuzzy_terms(index, query, 1) == brute_force(live, query, 1)
+  assert index.bk_tree() is tree and len(tree) == len(live)
+
+  copy = pickle.loads(pickle.dumps(index))
+  assert copy._bk_tree is None
+  assert fuzzy_terms(copy, "zzzz", 1) == [("zzzzz", 1)]
@@ -0,0 +1,64 @@
+"""
+This module contains unit tests for the HashMapIndex class.
+
+The following tests are included:
+- `test_insert_and_search`: Tests the `insert` and `search` methods.
+- `test_colliding_terms_are_kept`: Tests that terms sharing a home slot are all kept.
+- `test_keys_survive_resizes`: Tests that every key is reachable during and after incremental resizes.
+- `test_resize_is_incremental`: Tests that a resize moves the old table over a few slots at a time.
+- `test_pickle_round_trip`: Tests that a pickled table still finds its keys.
+"""
+import pickle
+import pytest
+from indexer.maps.hash_map import HashMapIndex, MIGRATE_STEP
+
+@pytest.fixture
+def hash_map():
+  return HashMapIndex(expected_keys=4)
+
+def test_insert_and_search(hash_map):
+  hash_map.insert('a', 1)
+  hash_map.insert('a', 2)
+  hash_map.insert('b', 3)
+
+  assert hash_map.search('a') == [1, 2]
+  assert hash_map.search('b') == [3]
+  assert hash_map.search('c') is None
+
+def test_colliding_terms_are_kept(hash_map):
+  mask = hash_map.bucket_size - 1
+  home = hash_map.hash_function('a') & mask
+  colliding = [w for w in (f"w{i}" for i in range(1000)) if hash_map.hash_function(w) & mask == home][:3]
+  for i, word in enumerate(colliding):
+    hash_map.insert(word, i)
+
+  assert [hash_map.search(word) for word in colliding] == [[0], [1], [2]]
+
+def test_keys_survive_resizes(hash_map):
+  words = [f"term{i}" for i in range(2000)]
+  for i, word in enumerate(words):
+    hash_map.insert(word, i)
+    assert hash_map.search(words[i // 2]) == [i // 2]
+
+  assert hash_map.count_keys() == 2000
+  assert hash_map.get_keys_in_order() == sorted(words)
+
+def test_resize_is_incremental():
+  hash_map = HashMapIndex(expected_keys=100)
+  capacity = hash_map.bucket_size
+  i = 0
+  while hash_map._old_buckets is None:
+    hash_map.insert(f"term{i}", i)
+    i += 1
+
+  assert hash_map.bucket_size == 2 * capacity
+  hash_map.insert("next", 0)
+  assert hash_map._migrate_pos == MIGRATE_STEP
+  assert hash_map.search("term0") == [0]
+
+def test_pickle_round_trip(hash_map):
+  for i in range(50):
+    hash_map.insert(f"term{i}", i)
+  restored = pickle.loads(pickle.dumps(hash_map))
+
+  assert all(restored.search(f"term{i}") == [i] for i in range(50))
@@ -0,0 +1,70 @@
+"""
+This module contains unit tests for the posting intersection kernel in indexer.postings.intersect.
+
+The following tests are included:
+- `test_gallop`: Tests that galloping finds the first id >= target from a start position.
+- `test_intersect_many_lists`: Tests intersecting more than three lists of mixed types.
+- `test_intersect_decodes_lazily`: Tests that compressed lists are ordered by length and only decoded as far as needed.
+- `test_intersect_empty_list`: Tests the early exit when any list is empty.
+- `test_search_all`: Tests AND queries of any length against every index.
+"""
+import random
+import pytest
+from indexer.postings.intersect import gallop, intersect
+from indexer.postings.posting_list import PostingList
+from indexer.postings.compressed import CompressedPostingList
+from indexer.trees.bst_index import BinarySearchTreeIndex
+from indexer.trees.avl_tree import AVLTreeIndex
+from indexer.maps.hash_map import HashMapIndex
+from indexer.arrays.array import SortedArrayIndex
+
+def test_gallop():
+  seq = list(range(0, 200, 2))
+
+  assert gallop(seq, 0, 0) == 0
+  assert gallop(seq, 51, 3) == 26
+  assert gallop(seq, 150, 74) == 75
+  assert gallop(seq, 500, 0) == 100
+  assert all(gallop(seq, t, 0) == (t + 1) // 2 for t in range(200))
+
+class CountingList(CompressedPostingList):
+  # counts the ids decoded from it
+  decoded = 0
+
+  def __iter__(self):
+    for doc_id in super().__iter__():
+      self.decoded += 1
+      yield doc_id
+
+  def as_array(self):
+    raise AssertionError("the whole list was decoded")
+
+def test_intersect_decodes_lazily():
+  rare = CountingList([3, 40, 90])
+  common = CountingList(range(0, 100000, 2))
+
+  assert intersect([common, PostingList(range(100)), rare]) == [40, 90]
+  assert rare.decoded == 3
+  assert common.decoded == 47 # 0, 2, ..., 90 and the id after it
+
+def test_intersect_many_lists():
+  rng = random.Random(4300)
+  lists = [sorted(rng.sample(range(2000), size)) for size in (900, 50, 1500, 400)]
+  expected = sorted(set(lists[0]) & set(lists[1]) & set(lists[2]) & set(lists[3]))
+
+  assert intersect([PostingList(lists[0]), CompressedPostingList(lists[1]), lists[2], PostingList(lists[3])]) == expected
+
+def test_intersect_empty_list():
+  assert intersect([PostingList([1, 2]), None]) == []
+  assert intersect([PostingList([1, 2]), PostingList()]) == []
+  assert intersect([]) == []
+
+@pytest.mark.parametrize("index_type", [BinarySearchTreeIndex, AVLTreeIndex, HashMapIndex, SortedArrayIndex])
+def test_search_all(index_type):
+  index = index_type()
+  index.bulk_load([('a', [1, 2, 3, 4]), ('b', [2, 3, 4]), ('c', [3, 4, 9]), ('d', [4])])
+
+  assert index.search_all(['a', 'b', 'c']) == [3, 4]
+  assert index.search_all(['a', 'b', 'c', 'd']) == [4]
+  assert index.search_all(['a', 'a']) == [1, 2, 3, 4]
+  assert index.search_all(['a', 'zzz']) == []
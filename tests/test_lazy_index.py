@@ -0,0 +1,99 @@
+"""
+This module contains unit tests for the lazy-loading index handle in indexer.util.lazy_index.
+
+The following tests are included:
+- `test_open_loads_no_postings`: Tests that opening the handle caches no postings.
+- `test_matches_source_index`: Tests that every term's postings equal the source index's, for several posting types.
+- `test_postings_are_cached`: Tests that a second search is answered from the cache.
+- `test_cache_is_bounded`: Tests that the cache never holds more than max_terms posting lists.
+- `test_search_many_and_range`: Tests batch lookups (with misses and repeats) and range scans.
+- `test_scans_dont_fill_cache`: Tests that range scans leave the cache alone and fuzzy lookups read no postings.
+- `test_pickles_as_path`: Tests that pickling the handle reopens the file.
+"""
+import pickle
+import pytest
+from indexer.util.binary_index import save_binary_index
+from indexer.util.lazy_index import LazyIndex
+from indexer.query.fuzzy import fuzzy_terms
+from indexer.arrays.array import SortedArrayIndex
+from indexer.postings.posting_list import PostingList
+from indexer.postings.compressed import CompressedPostingList
+from indexer.postings.frequency import FrequencyPostingList
+
+TERMS = ["apple", "bank", "bond", "market", "rally", "stock", "zinc"]
+
+def build(posting_type=PostingList):
+  index = SortedArrayIndex(posting_type=posting_type)
+  for doc_id in range(6):
+    index.documents.add(f"doc_{doc_id}.json")
+  index.bulk_load((term, [doc_id for doc_id in range(6) if (doc_id + i) % 3 != 0]) for i, term in enumerate(TERMS))
+  return index
+
+@pytest.fixture
+def path(tmp_path):
+  path = str(tmp_path / "index.idx")
+  save_binary_index(build(), path)
+  return path
+
+def test_open_loads_no_postings(path):
+  with LazyIndex(path) as lazy:
+    assert len(lazy.cache) == 0
+    assert lazy.get_keys_in_order() == TERMS
+    assert lazy.documents.name_of(5) == "doc_5.json"
+
+@pytest.mark.parametrize("posting_type", [PostingList, CompressedPostingList, FrequencyPostingList])
+def test_matches_source_index(posting_type, tmp_path):
+  index = build(posting_type)
+  path = str(tmp_path / "index.idx")
+  save_binary_index(index, path)
+  with LazyIndex(path) as lazy:
+    for term in TERMS:
+      assert isinstance(lazy.search(term), posting_type)
+      assert list(lazy.search(term)) == list(index.search(term))
+    assert lazy.search("missing") is None
+
+def test_postings_are_cached(path):
+  with LazyIndex(path) as lazy:
+    first = lazy.search("bank")
+    assert lazy.search("bank") is first
+    assert lazy.cache.hits == 1 and lazy.cache.misses == 1
+
+def test_cache_is_bounded(path):
+  with LazyIndex(path, max_terms=2) as lazy:
+    for term in TERMS:
+      lazy.search(term)
+      assert len(lazy.cache) <= 2
+    assert list(lazy.search("apple")) == [1, 2, 4, 5] # evicted, read again from the file
+
+def test_search_many_and_range(path):
+  with LazyIndex(path) as lazy:
+    lazy.search("stock")
+    results = lazy.search_many(["zinc", "nope", "stock", "zinc"])
+    assert results[1] is None
+    assert results[0] is results[3]
+    assert [term for term, docs in lazy.range("bond", "rally")] == ["bond", "market"]
+    assert [term for term, docs in lazy.prefix("b")] == ["bank", "bond"]
+
+def test_scans_dont_fill_cache(path, monkeypatch):
+  with LazyIndex(path) as lazy:
+    hot = lazy.search("stock")
+    scanned = [(term, list(docs)) for term, docs in lazy.range("bank", "stock")]
+    assert len(lazy.cache) == 1 # the scan cached nothing
+    assert scanned == [(term, list(lazy.search(term))) for term in ["bank", "bond", "market", "rally"]]
+    assert next(lazy.range("stock"))[1] is hot
+
+    lazy.cache.clear()
+    monkeypatch.setattr(lazy, "_read_postings", lambda i: pytest.fail("postings were read"))
+    assert list(lazy.range_keys("bo", "s")) == ["bond", "market", "rally"]
+    assert fuzzy_terms(lazy, "bonk", 1) == [("bank", 1), ("bond", 1)]
+    assert len(lazy.cache) == 0
+
+def test_pickles_as_path(path):
+  lazy = LazyIndex(path, max_terms=3)
+  lazy.search("bank")
+  reopened = pickle.loads(pickle.dumps(lazy))
+  assert reopened.max_terms == 3
+  assert len(reopened.cache) == 0
+  assert list(reopened.search("bank")) == list(lazy.search("bank"))
+  reopened.close()
+  lazy.close()
@@ -0,0 +1,110 @@
+"""
+This module contains unit tests for incremental re-indexing with indexer.util.manifest.
+
+The following tests are included:
+- `test_first_run_indexes_everything`: Tests that an empty manifest indexes every file and records it.
+- `test_unchanged_corpus_parses_nothing`: Tests that a second run with no changes parses no files.
+- `test_touched_file_is_not_reindexed`: Tests that a new mtime with the same content doesn't count as a change.
+- `test_incremental_matches_full_rebuild`: Tests that added, changed and removed files give the same results as a full rebuild.
+- `test_same_name_in_two_folders`: Tests that removing a file doesn't remove a same-named file in another folder.
+- `test_manifest_round_trip`: Tests that a saved manifest loads back the same entries.
+"""
+import os
+import json
+import pytest
+from indexer.util.manifest import Manifest, manifest_path, index_files_incremental
+from indexer.util.corpus import index_files
+from indexer.maps.hash_map import HashMapIndex
+from indexer.arrays.array import SortedArrayIndex
+from indexer.trees.avl_tree import AVLTreeIndex
+
+ARTICLES = {
+  "news_0001.json": {"title": "Stocks Rally", "url": "https://www.reuters.com/a", "author": "Jane Doe", "preprocessed_text": ["stock", "market"]},
+  "news_0002.json": {"title": "Bank News", "url": "https://cnn.com/b", "author": "", "preprocessed_text": ["bank", "market"]},
+  "news_0003.json": {"title": "Rally Ends", "url": "https://cnn.com/c", "author": "John Roe", "preprocessed_text": ["stock", "bank"]},
+}
+
+def write(folder, name, article):
+  (folder / name).write_text(json.dumps(article))
+
+@pytest.fixture
+def corpus(tmp_path):
+  sub = tmp_path / "data" / "2018_01"
+  sub.mkdir(parents=True)
+  for name, article in ARTICLES.items():
+    write(sub, name, article)
+  return tmp_path / "data"
+
+def results(index, words):
+  # by file name, so an incremental index (named by relative path) can be compared with index_files
+  return {word: sorted(os.path.basename(name) for name in index.documents.resolve(index.search(word))) for word in words}
+
+def test_first_run_indexes_everything(corpus):
+  index = HashMapIndex()
+  manifest = Manifest()
+  assert index_files_incremental(str(corpus), index, manifest) == (3, 0, 0)
+  assert len(manifest) == 3
+  assert results(index, ["market"]) == {"market": ["news_0001.json", "news_0002.json"]}
+
+def test_unchanged_corpus_parses_nothing(corpus):
+  index = HashMapIndex()
+  manifest = Manifest()
+  index_files_incremental(str(corpus), index, manifest)
+  assert index_files_incremental(str(corpus), index, manifest) == (0, 0, 0)
+  assert index.documents.count() == 3
+
+def test_touched_file_is_not_reindexed(corpus):
+  index = HashMapIndex()
+  manifest = Manifest()
+  index_files_incremental(str(corpus), index, manifest)
+  path = corpus / "2018_01" / "news_0002.json"
+  stat = os.stat(path)
+  os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+  assert index_files_incremental(str(corpus), index, manifest) == (0, 0, 0)
+  assert manifest.files[os.path.join("2018_01", "news_0002.json")]["mtime_ns"] == stat.st_mtime_ns + 10**9
+
+@pytest.mark.parametrize("index_type", [HashMapIndex, SortedArrayIndex, AVLTreeIndex])
+def test_incremental_matches_full_rebuild(corpus, index_type):
+  index = index_type()
+  manifest = Manifest()
+  index_files_incremental(str(corpus), index, manifest)
+
+  sub = corpus / "2018_01"
+  os.remove(sub / "news_0001.json")
+  write(sub, "news_0002.json", {"title": "Bond Yields", "url": "https://cnn.com/b", "author": "", "preprocessed_text": ["bond"]})
+  write(sub, "news_0004.json", {"title": "Market Wrap", "url": "https://cnn.com/d", "author": "", "preprocessed_text": ["stock"]})
+  assert index_files_incremental(str(corpus), index, manifest) == (1, 1, 1)
+
+  rebuilt = index_type()
+  index_files(str(corpus), rebuilt)
+  words = ["stock", "market", "bank", "bond", "rally", "jane"]
+  assert results(index, words) == results(rebuilt, words)
+  assert index.documents.count() == 3
+  assert sorted(manifest.files) == sorted(os.path.join("2018_01", name) for name in ["news_0002.json", "news_0003.json", "news_0004.json"])
+
+def test_same_name_in_two_folders(corpus):
+  other = corpus / "2018_02"
+  other.mkdir()
+  write(other, "news_0001.json", {"title": "", "url": "https://cnn.com/e", "author": "", "preprocessed_text": ["bond", "market"]})
+  index = AVLTreeIndex()
+  manifest = Manifest()
+  assert index_files_incremental(str(corpus), index, manifest) == (4, 0, 0)
+  assert index.documents.count() == 4
+
+  os.remove(corpus / "2018_01" / "news_0001.json")
+  assert index_files_incremental(str(corpus), index, manifest) == (0, 0, 1)
+  assert index.documents.resolve(index.search("bond")) == [os.path.join("2018_02", "news_0001.json")]
+  assert sorted(index.documents.resolve(index.search("market"))) == [os.path.join("2018_01", "news_0002.json"), os.path.join("2018_02", "news_0001.json")]
+  assert index.search("jane") is None
+
+def test_manifest_round_trip(corpus, tmp_path):
+  manifest = Manifest()
+  index_files_incremental(str(corpus), HashMapIndex(), manifest)
+  path = manifest_path(str(tmp_path / "index.pkl"))
+  manifest.save(path)
+  assert path.endswith("index.pkl.manifest.json")
+  assert Manifest.load(path).files == manifest.files
+  assert len(Manifest.load(str(tmp_path / "missing.json"))) == 0
+  (tmp_path / "old.json").write_text(json.dumps({"version": 1, "files": {}}))
+  with pytest.raises(ValueError):
+    Manifest.load(str(tmp_path / "old.json"))
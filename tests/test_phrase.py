@@ -0,0 +1,71 @@
+"""
+This module contains unit tests for positional postings and phrase / NEAR queries.
+
+The following tests are included:
+- `test_positional_posting_list`: Tests storing and merging token offsets per document.
+- `test_non_positional_index_rejects_phrases`: Tests the error for phrase queries on a plain index.
+- `test_phrase_and_near_search`: Tests phrase and NEAR matching on a positional corpus for every index.
+- `test_phrase_in_boolean_query`: Tests quoted phrases and NEAR/k inside boolean queries.
+"""
+import json
+import pytest
+from indexer.postings.positional import PositionalPostingList
+from indexer.query.phrase import phrase_search, near_search
+from indexer.query.planner import boolean_search
+from indexer.util.corpus import index_files
+from indexer.trees.bst_index import BinarySearchTreeIndex
+from indexer.trees.avl_tree import AVLTreeIndex
+from indexer.maps.hash_map import HashMapIndex
+from indexer.arrays.array import SortedArrayIndex
+
+ARTICLES = {
+  "news_0.json": ["stock", "market", "rally", "bank"],
+  "news_1.json": ["market", "stock", "fall", "bank", "rate"],
+  "news_2.json": ["bank", "raise", "rate", "stock", "market"],
+}
+
+@pytest.fixture
+def corpus(tmp_path):
+  for name, words in ARTICLES.items():
+    (tmp_path / name).write_text(json.dumps({"title": "", "url": "https://cnn.com", "author": "", "preprocessed_text": words}))
+  return str(tmp_path)
+
+def test_positional_posting_list():
+  postings = PositionalPostingList()
+  postings.add((2, [7, 1]))
+  postings.add((5, [3]))
+  postings.add((0, [4]))
+  postings.add((2, [9]))
+
+  assert postings == [0, 2, 5]
+  assert postings.positions_of(2) == [1, 7, 9]
+  assert postings.positions_of(0) == [4]
+  assert postings.positions_of(5) == [3]
+  assert postings.positions_of(3) == []
+
+def test_non_positional_index_rejects_phrases():
+  index = SortedArrayIndex()
+  index.insert('a', 0)
+  index.insert('b', 0)
+
+  with pytest.raises(ValueError):
+    phrase_search(index, ['a', 'b'])
+
+@pytest.mark.parametrize("index_type", [BinarySearchTreeIndex, AVLTreeIndex, HashMapIndex, SortedArrayIndex])
+def test_phrase_and_near_search(corpus, index_type):
+  index = index_type(posting_type=PositionalPostingList)
+  index_files(corpus, index)
+
+  assert index.search_all(['stock', 'market']) == [0, 1, 2]
+  assert phrase_search(index, ['stock', 'market']) == [0, 2]
+  assert phrase_search(index, ['raise', 'rate', 'stock']) == [2]
+  assert phrase_search(index, ['stock', 'missing']) == []
+  assert near_search(index, 'bank', 'rate', 1) == [1]
+  assert near_search(index, 'bank', 'rate', 2) == [1, 2]
+
+def test_phrase_in_boolean_query(corpus):
+  index = SortedArrayIndex(posting_type=PositionalPostingList)
+  index_files(corpus, index)
+
+  assert boolean_search(index, '"stock market" AND NOT rally') == [2]
+  assert boolean_search(index, 'bank NEAR/1 rate OR rally') == [0, 1]
@@ -0,0 +1,114 @@
+"""
+This module contains unit tests for the posting list and document dictionary types.
+
+The following tests are included:
+- `test_document_dictionary_round_trip`: Tests that names get dense ids and resolve back.
+- `test_posting_list_compares_like_a_list`: Tests list-style equality, len and iteration.
+- `test_indexes_store_typed_postings`: Tests that every index stores PostingList values.
+- `test_posting_list_sorted_and_unique`: Tests in-order appends, duplicates and out-of-order adds.
+- `test_posting_list_merge`: Tests bulk merging of sorted and unsorted runs.
+- `test_vbyte_round_trip`: Tests variable-byte encoding and decoding.
+- `test_compressed_posting_list`: Tests sorted, duplicate-free adds and streaming decode.
+- `test_indexes_with_compressed_postings`: Tests every index with compressed posting lists.
+- `test_indexes_ignore_duplicate_postings`: Tests that every index keeps postings sorted and unique.
+"""
+import pytest
+from array import array
+from indexer.postings.document_dictionary import DocumentDictionary
+from indexer.postings.posting_list import PostingList
+from indexer.postings.compressed import CompressedPostingList, vbyte_encode, vbyte_decode
+from indexer.trees.bst_index import BinarySearchTreeIndex
+from indexer.trees.avl_tree import AVLTreeIndex
+from indexer.maps.hash_map import HashMapIndex
+from indexer.arrays.array import SortedArrayIndex
+
+def test_document_dictionary_round_trip():
+  documents = DocumentDictionary()
+
+  assert documents.add("news_1.json") == 0
+  assert documents.add("news_2.json") == 1
+  assert documents.add("news_1.json") == 0
+  assert len(documents) == 2
+  assert documents.get_id("news_2.json") == 1
+  assert documents.resolve([1, 0]) == ["news_2.json", "news_1.json"]
+  assert documents.resolve(None) == []
+
+def test_posting_list_compares_like_a_list():
+  postings = PostingList([3, 5])
+  postings.add(8)
+
+  assert postings == [3, 5, 8]
+  assert postings == PostingList([3, 5, 8])
+  assert postings != [3, 5]
+  assert len(postings) == 3
+  assert list(postings) == [3, 5, 8]
+  assert 5 in postings
+  assert isinstance(postings._ids, array)
+
+@pytest.mark.parametrize("index_type", [BinarySearchTreeIndex, AVLTreeIndex, HashMapIndex, SortedArrayIndex])
+def test_indexes_store_typed_postings(index_type):
+  index = index_type()
+  index.insert('a', 1)
+  index.insert('a', 2)
+
+  assert isinstance(index.search('a'), PostingList)
+  assert index.search('a') == [1, 2]
+
+def test_posting_list_sorted_and_unique():
+  postings = PostingList()
+  for doc_id in [1, 4, 4, 9, 2, 9, 0, 4]:
+    postings.add(doc_id)
+
+  assert postings == [0, 1, 2, 4, 9]
+
+def test_posting_list_merge():
+  postings = PostingList([1, 5])
+  postings.merge([8, 7])
+  assert postings == [1, 5, 7, 8]
+
+  postings.merge([5, 2, 10])
+  assert postings == [1, 2, 5, 7, 8, 10]
+
+def test_vbyte_round_trip():
+  out = bytearray()
+  numbers = [0, 1, 127, 128, 300, 2 ** 32 - 1]
+  for number in numbers:
+    vbyte_encode(number, out)
+
+  decoded, pos = [], 0
+  while pos < len(out):
+    number, pos = vbyte_decode(out, pos)
+    decoded.append(number)
+  assert decoded == numbers
+  assert len(out) == 1 + 1 + 1 + 2 + 2 + 5
+
+def test_compressed_posting_list():
+  postings = CompressedPostingList([2, 3, 500])
+  postings.add(500)
+  postings.add(1)
+  postings.add(7)
+
+  assert postings == [1, 2, 3, 7, 500]
+  assert len(postings) == 5
+  assert 7 in postings and 8 not in postings
+  assert next(iter(postings)) == 1
+  assert len(postings._data) == 6
+
+@pytest.mark.parametrize("index_type", [BinarySearchTreeIndex, AVLTreeIndex, HashMapIndex, SortedArrayIndex])
+def test_indexes_with_compressed_postings(index_type):
+  index = index_type(posting_type=CompressedPostingList)
+  index.bulk_load([('a', [1, 4]), ('b', [2])])
+  index.insert('a', 9)
+  index.insert('c', 3)
+
+  assert isinstance(index.search('a'), CompressedPostingList)
+  assert index.search('a') == [1, 4, 9]
+  assert index.search('c') == [3]
+
+@pytest.mark.parametrize("index_type", [BinarySearchTreeIndex, AVLTreeIndex, HashMapIndex, SortedArrayIndex])
+def test_indexes_ignore_duplicate_postings(index_type):
+  index = index_type()
+  for doc_id in [3, 1, 3, 2, 1]:
+    index.insert('a', doc_id)
+
+  assert index.search('a') == [1, 2, 3]
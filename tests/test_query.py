@@ -0,0 +1,61 @@
+"""
+This module contains unit tests for the boolean query parser and planner in indexer.query.
+
+The following tests are included:
+- `test_parse_precedence`: Tests that NOT binds tighter than AND, which binds tighter than OR.
+- `test_parse_errors`: Tests that malformed queries raise QuerySyntaxError.
+- `test_planner_orders_and_rewrites`: Tests rarest-first ordering and NOT as a difference.
+- `test_planner_short_circuits_missing_terms`: Tests that an AND with an unindexed word is Empty.
+- `test_boolean_search`: Tests query results against every index type.
+"""
+import pytest
+from indexer.query.parser import parse_query, QuerySyntaxError, Term, And, Or, Not
+from indexer.query.planner import plan_query, boolean_search, TermScan, Intersect, Difference, Empty
+from indexer.trees.bst_index import BinarySearchTreeIndex
+from indexer.trees.avl_tree import AVLTreeIndex
+from indexer.maps.hash_map import HashMapIndex
+from indexer.arrays.array import SortedArrayIndex
+
+POSTINGS = [('bank', [0, 1, 2, 3, 4, 5]), ('bond', [2, 6]), ('crypto', [1, 3]), ('stock', [0, 1, 2, 7])]
+
+def build(index_type):
+  index = index_type()
+  for i in range(8):
+    index.documents.add(f"news_{i}.json")
+  index.bulk_load(POSTINGS)
+  return index
+
+def test_parse_precedence():
+  assert parse_query("a OR b c AND NOT d") == Or([Term('a'), And([Term('b'), Term('c'), Not(Term('d'))])])
+  assert parse_query("(A OR b) c") == And([Or([Term('a'), Term('b')]), Term('c')])
+
+@pytest.mark.parametrize("query", ["", "a AND", "(a OR b", "a )", "OR a", "NOT"])
+def test_parse_errors(query):
+  with pytest.raises(QuerySyntaxError):
+    parse_query(query)
+
+def test_planner_orders_and_rewrites():
+  index = build(SortedArrayIndex)
+  plan = plan_query(parse_query("bank AND stock AND NOT crypto AND bond"), index)
+
+  assert isinstance(plan, Difference)
+  assert [step.word for step in plan.include.children] == ['bond', 'stock', 'bank']
+  assert [step.word for step in plan.excludes] == ['crypto']
+
+def test_planner_short_circuits_missing_terms():
+  index = build(SortedArrayIndex)
+
+  assert plan_query(parse_query("bank missing stock"), index) == Empty()
+  assert plan_query(parse_query("bank OR missing"), index) == TermScan('bank', index.search('bank'))
+
+@pytest.mark.parametrize("index_type", [BinarySearchTreeIndex, AVLTreeIndex, HashMapIndex, SortedArrayIndex])
+def test_boolean_search(index_type):
+  index = build(index_type)
+
+  assert boolean_search(index, "bank stock") == [0, 1, 2]
+  assert boolean_search(index, "bank AND stock AND NOT crypto") == [0, 2]
+  assert boolean_search(index, "bond OR crypto") == [1, 2, 3, 6]
+  assert boolean_search(index, "(bond OR crypto) AND NOT (bank AND stock)") == [3, 6]
+  assert boolean_search(index, "NOT bank") == [6, 7]
+  assert boolean_search(index, "NOT NOT bond") == [2, 6]
+  assert boolean_search(index, "stock AND missing") == []
@@ -0,0 +1,68 @@
+"""
+This module contains unit tests for the radix tree (compressed trie) index.
+
+The following tests are included:
+- `test_insert_and_search`: Tests inserting words and searching for them.
+- `test_search_missing`: Tests searches for words that aren't indexed, including prefixes of indexed words.
+- `test_edges_are_compressed`: Tests that single-child chains are merged into one edge.
+- `test_keys_in_order`: Tests that iteration gives the keys sorted, against a random vocabulary.
+- `test_prefix_and_range`: Tests prefix and range scans against the sorted key list.
+- `test_bulk_load`: Tests loading (key, values) pairs.
+"""
+import random
+import pytest
+from indexer.trees.radix_tree import RadixTreeIndex
+
+WORDS = ["north", "northern", "northeast", "nor", "note", "apple", "app", "", "zebra", "a"]
+
+@pytest.fixture
+def radix():
+  radix = RadixTreeIndex()
+  for i, word in enumerate(WORDS):
+    radix.insert(word, i)
+    radix.insert(word, i + 100)
+  return radix
+
+def test_insert_and_search(radix):
+  for i, word in enumerate(WORDS):
+    assert radix.search(word) == [i, i + 100]
+  assert radix.count_keys() == len(WORDS)
+
+@pytest.mark.parametrize("word", ["no", "nort", "northe", "northerner", "b", "apples", "zeb"])
+def test_search_missing(radix, word):
+  assert radix.search(word) is None
+
+def test_edges_are_compressed():
+  radix = RadixTreeIndex()
+  radix.insert("romane", 1)
+  radix.insert("romanus", 2)
+  radix.insert("romulus", 3)
+
+  assert radix.count_nodes() == 6 # root, "rom", "an", "e", "us", "ulus"
+  assert radix.root.children["r"].label == "rom"
+
+def test_keys_in_order():
+  rng = random.Random(7)
+  words = {"".join(rng.choice("abc") for _ in range(rng.randint(1, 8))) for _ in range(2000)}
+  radix = RadixTreeIndex()
+  for word in rng.sample(sorted(words), len(words)):
+    radix.insert(word, 1)
+
+  assert radix.get_keys_in_order() == sorted(words)
+  assert all(radix.search(word) == [1] for word in words)
+
+@pytest.mark.parametrize("prefix", ["", "n", "nor", "nort", "north", "northern", "northerns", "x", "ap"])
+def test_prefix_and_range(radix, prefix):
+  keys = sorted(WORDS)
+
+  assert [key for key, _ in radix.prefix(prefix)] == [key for key in keys if key.startswith(prefix)]
+  assert [key for key, _ in radix.range(prefix, "o")] == [key for key in keys if prefix <= key < "o"]
+
+def test_bulk_load():
+  radix = RadixTreeIndex()
+  radix.bulk_load([("cat", [1, 2]), ("cats", [3]), ("dog", [2])])
+  radix.bulk_load([("cat", [5])])
+
+  assert radix.search("cat") == [1, 2, 5]
+  assert radix.get_keys_in_order() == ["cat", "cats", "dog"]
+  assert radix.get_avg_value_list_len() == 5 / 3
@@ -0,0 +1,57 @@
+"""
+This module contains unit tests for the range and prefix scans of the ordered indexes.
+
+The following tests are included:
+- `test_range_matches_sorted_keys`: Tests range scans against slicing the sorted key list.
+- `test_prefix`: Tests prefix scans, including empty and missing prefixes.
+- `test_prefix_end`: Tests the exclusive upper bound computed for a prefix.
+- `test_range_is_lazy`: Tests that a scan stops reading once its consumer stops.
+- `test_hash_map_has_no_range`: Tests that the hash map refuses ordered scans.
+"""
+import random
+import pytest
+from indexer.abstract_index import prefix_end
+from indexer.trees.bst_index import BinarySearchTreeIndex
+from indexer.trees.avl_tree import AVLTreeIndex
+from indexer.maps.hash_map import HashMapIndex
+from indexer.arrays.array import SortedArrayIndex
+
+WORDS = ["nor", "north", "northeast", "northern", "northwest", "nose", "note", "apple", "zebra", "norths"]
+ORDERED = [BinarySearchTreeIndex, AVLTreeIndex, SortedArrayIndex]
+
+@pytest.fixture(params=ORDERED)
+def index(request):
+  index = request.param()
+  for i, word in enumerate(random.Random(4).sample(WORDS, len(WORDS))):
+    index.insert(word, i)
+  return index
+
+@pytest.mark.parametrize("lo, hi", [(None, None), ("b", "nose"), ("north", "north"), ("nose", None), (None, "a"), ("zz", None)])
+def test_range_matches_sorted_keys(index, lo, hi):
+  expected = [word for word in sorted(WORDS) if (lo is None or word >= lo) and (hi is None or word < hi)]
+
+  assert [word for word, postings in index.range(lo, hi)] == expected
+
+def test_prefix(index):
+  assert [word for word, postings in index.prefix("north")] == ["north", "northeast", "northern", "norths", "northwest"]
+  assert [word for word, postings in index.prefix("x")] == []
+  assert len(list(index.prefix(""))) == len(WORDS)
+  assert dict(index.prefix("zeb"))["zebra"] == index.search("zebra")
+
+def test_prefix_end():
+  assert prefix_end("north") == "norti"
+  assert prefix_end("ab" + chr(0x10FFFF)) == "ac"
+  assert prefix_end("") is None
+
+@pytest.mark.parametrize("index_type", ORDERED)
+def test_range_is_lazy(index_type):
+  index = index_type()
+  index.bulk_load((f"k{i:05d}", [i]) for i in range(5000))
+  scan = index.range("k02500")
+
+  assert next(scan)[0] == "k02500"
+  assert next(scan)[0] == "k02501"
+
+def test_hash_map_has_no_range():
+  with pytest.raises(NotImplementedError):
+    list(HashMapIndex().prefix("a"))
@@ -0,0 +1,86 @@
+"""
+This module contains unit tests for BM25 ranking and WAND top-k retrieval in indexer.query.ranking.
+
+The following tests are included:
+- `test_frequency_posting_list`: Tests storing term frequencies next to doc ids.
+- `test_top_k_matches_exhaustive_scoring`: Tests that WAND returns the same top k as scoring every document.
+- `test_top_k_skips_documents`: Tests that WAND scores fewer documents than the union of the postings.
+- `test_top_k_with_no_results_wanted`: Tests that k <= 0 returns no documents.
+- `test_ingestion_records_frequencies_and_lengths`: Tests that index_files stores tfs and document lengths.
+"""
+import json
+import random
+import pytest
+from indexer.postings.frequency import FrequencyPostingList
+from indexer.query.ranking import BM25Ranker
+from indexer.util.corpus import index_files
+from indexer.arrays.array import SortedArrayIndex
+from indexer.maps.hash_map import HashMapIndex
+from indexer.trees.avl_tree import AVLTreeIndex
+
+def build(index_type, num_docs, postings):
+  index = index_type(posting_type=FrequencyPostingList)
+  rng = random.Random(7)
+  for i in range(num_docs):
+    index.documents.set_length(index.documents.add(f"news_{i}.json"), rng.randint(20, 400))
+  index.bulk_load(sorted(postings.items()))
+  return index
+
+def random_postings(num_docs):
+  rng = random.Random(4300)
+  postings = {}
+  for word, df in [("market", 800), ("stock", 600), ("bank", 300), ("merger", 25), ("beanpot", 3)]:
+    docs = sorted(rng.sample(range(num_docs), df))
+    postings[word] = [(doc_id, rng.randint(1, 12)) for doc_id in docs]
+  return postings
+
+def test_frequency_posting_list():
+  postings = FrequencyPostingList()
+  postings.add((4, 2))
+  postings.add((1, 5))
+  postings.add(9)
+  postings.add((4, 3))
+
+  assert postings == [1, 4, 9]
+  assert [postings.tf_at(i) for i in range(3)] == [5, 3, 1]
+  assert postings.max_tf == 5
+
+@pytest.mark.parametrize("index_type", [SortedArrayIndex, HashMapIndex, AVLTreeIndex])
+@pytest.mark.parametrize("words", [["market", "stock"], ["market", "stock", "bank", "merger", "beanpot"], ["merger", "missing"]])
+def test_top_k_matches_exhaustive_scoring(index_type, words):
+  index = build(index_type, 1000, random_postings(1000))
+  ranker = BM25Ranker(index)
+  candidates = set()
+  for word in words:
+    candidates.update(index.search(word) or [])
+  expected = sorted((ranker.score(words, doc_id) for doc_id in candidates), reverse=True)[:10]
+
+  result = ranker.top_k(words, k=10)
+  assert [score for _, score in result] == pytest.approx(expected)
+  assert all(ranker.score(words, doc_id) == pytest.approx(score) for doc_id, score in result)
+
+def test_top_k_skips_documents():
+  postings = random_postings(1000)
+  index = build(SortedArrayIndex, 1000, postings)
+  ranker = BM25Ranker(index)
+  ranker.top_k(["market", "stock", "beanpot"], k=3)
+
+  union = len({doc_id for word in ["market", "stock", "beanpot"] for doc_id, _ in postings[word]})
+  assert ranker.documents_scored < union / 2
+
+def test_top_k_with_no_results_wanted():
+  ranker = BM25Ranker(build(SortedArrayIndex, 1000, random_postings(1000)))
+  assert ranker.top_k(["market", "stock"], k=0) == []
+  assert ranker.top_k(["market"], k=-1) == []
+  assert ranker.documents_scored == 0
+
+def test_ingestion_records_frequencies_and_lengths(tmp_path):
+  (tmp_path / "news_0.json").write_text(json.dumps({"title": "", "url": "", "author": "", "preprocessed_text": ["bank", "rate", "bank"]}))
+  (tmp_path / "news_1.json").write_text(json.dumps({"title": "", "url": "", "author": "", "preprocessed_text": ["rate"]}))
+  index = SortedArrayIndex(posting_type=FrequencyPostingList)
+  index_files(str(tmp_path), index)
+
+  assert index.search("bank").tf_at(0) == 2
+  assert index.documents.length_of(0) == 3
+  assert index.documents.length_of(1) == 1
+  assert BM25Ranker(index).top_k(["bank", "rate"], k=1)[0][0] == 0
@@ -0,0 +1,51 @@
+"""
+This module contains unit tests for the batch lookup API (search_many) of every index.
+
+The following tests are included:
+- `test_search_many_matches_search`: Tests that a batch gives the same results as one search per key.
+- `test_search_many_degenerate_bst`: Tests a batch against a BST built from sorted inserts.
+- `test_search_many_during_hash_resize`: Tests batches while a hash resize is in progress.
+- `test_cached_search_many`: Tests that only cache misses reach the wrapped index.
+"""
+import random
+import pytest
+from indexer.trees.bst_index import BinarySearchTreeIndex
+from indexer.trees.avl_tree import AVLTreeIndex
+from indexer.maps.hash_map import HashMapIndex
+from indexer.arrays.array import SortedArrayIndex
+from indexer.query.cache import CachedIndex
+
+WORDS = [f"word{i:04d}" for i in range(0, 2000, 3)]
+
+@pytest.mark.parametrize("index_type", [BinarySearchTreeIndex, AVLTreeIndex, HashMapIndex, SortedArrayIndex])
+def test_search_many_matches_search(index_type):
+  rng = random.Random(12)
+  index = index_type()
+  for i, word in enumerate(rng.sample(WORDS, len(WORDS))):
+    index.insert(word, i)
+  batch = [f"word{rng.randrange(2000):04d}" for _ in range(1500)] + ["", "zzz", "word0000"]
+
+  assert index.search_many(batch) == [index.search(word) for word in batch]
+
+def test_search_many_degenerate_bst():
+  bst = BinarySearchTreeIndex()
+  for i, word in enumerate(WORDS[:300]):
+    bst.insert(word, i)
+
+  assert bst.search_many(["word0003", "nope", "word0897"]) == [[1], None, [299]]
+
+def test_search_many_during_hash_resize():
+  hash_map = HashMapIndex(expected_keys=8)
+  for i, word in enumerate(WORDS):
+    hash_map.insert(word, i)
+    if hash_map._old_buckets is not None:
+      assert hash_map.search_many([word, WORDS[0], "nope"]) == [[i], [0], None]
+
+def test_cached_search_many():
+  index = SortedArrayIndex()
+  index.bulk_load([('a', [1]), ('b', [2])])
+  cached = CachedIndex(index)
+  cached.search('a')
+
+  assert cached.search_many(['a', 'b', 'c', 'a']) == [[1], [2], [], [1]]
+  assert cached.cache.hits == 1 and cached.cache.misses == 3
@@ -0,0 +1,155 @@
+"""
+This module contains unit tests for the LSM-style SegmentedIndex in indexer.segments.segmented_index.
+
+The following tests are included:
+- `test_matches_reference_index`: Tests that random inserts and deletes give the same results as a HashMapIndex.
+- `test_size_tiered_merging`: Tests that flushed segments are merged by size tier.
+- `test_merge_into_oldest_drops_deletes`: Tests that deletes are forgotten once merged into the oldest segment.
+- `test_delete_doesnt_merge_postings`: Tests that delete checks each segment's own list instead of merging the term's postings.
+- `test_update_document_replaces_positions`: Tests that a re-indexed document doesn't keep positions from older segments.
+- `test_snapshot_is_isolated`: Tests that a snapshot doesn't see later inserts, deletes or merges.
+- `test_background_merger_consistent_reads`: Tests that reads running during background merges always see every posting.
+- `test_bulk_load_and_pickle`: Tests bulk loading a run as a segment and pickling the index.
+"""
+import pickle
+import random
+import threading
+import pytest
+from indexer.segments import segmented_index
+from indexer.segments.segmented_index import SegmentedIndex
+from indexer.maps.hash_map import HashMapIndex
+from indexer.postings.posting_list import PostingList
+from indexer.postings.frequency import FrequencyPostingList
+from indexer.postings.positional import PositionalPostingList
+
+WORDS = [f"w{i:02d}" for i in range(30)]
+
+@pytest.mark.parametrize("posting_type", [PostingList, FrequencyPostingList])
+def test_matches_reference_index(posting_type):
+  random.seed(7)
+  index = SegmentedIndex(posting_type=posting_type, memtable_size=16, merge_factor=3, background=False)
+  reference = HashMapIndex(posting_type=posting_type)
+  for step in range(2000):
+    word = random.choice(WORDS)
+    doc_id = random.randrange(50)
+    if random.random() < 0.25:
+      assert index.delete(word, doc_id) == reference.delete(word, doc_id)
+    else:
+      value = (doc_id, random.randint(1, 5)) if posting_type is FrequencyPostingList else doc_id
+      index.insert(word, value)
+      reference.insert(word, value)
+  for word in WORDS:
+    expected = reference.search(word)
+    postings = index.search(word)
+    assert list(postings or []) == list(expected or [])
+    if posting_type is FrequencyPostingList and expected:
+      assert [postings.tf_at(i) for i in range(len(postings))] == [expected.tf_at(i) for i in range(len(expected))]
+  assert index.get_keys_in_order() == sorted(reference.get_keys_in_order())
+  assert index.merges > 0
+
+def test_size_tiered_merging():
+  index = SegmentedIndex(memtable_size=10, merge_factor=4, background=False)
+  for doc_id in range(10 * 15):
+    index.insert(f"t{doc_id % 10}", doc_id)
+  assert index.flushes == 15
+  assert index.segment_sizes() == [40, 40, 40, 10, 10, 10] # every 4 flushes are merged into a segment of the next tier
+  index.insert("t0", 150)
+  for doc_id in range(151, 160):
+    index.insert(f"t{doc_id % 10}", doc_id)
+  assert index.segment_sizes() == [160] # the 4th segment of 40 cascades into one of 160
+  assert list(index.search("t3")) == list(range(3, 160, 10))
+
+def test_merge_into_oldest_drops_deletes():
+  index = SegmentedIndex(memtable_size=4, merge_factor=2, background=False)
+  for doc_id in range(4):
+    index.insert("stock", doc_id)
+  assert index.delete("stock", 1)
+  assert not index.delete("stock", 1)
+  for doc_id in range(4, 7):
+    index.insert("bank", doc_id)
+  assert len(index.segment_sizes()) == 1 # the two segments were merged into one
+  assert index._segments[0].deletes == {}
+  assert list(index.search("stock")) == [0, 2, 3]
+
+def test_delete_doesnt_merge_postings(monkeypatch):
+  index = SegmentedIndex(memtable_size=4, merge_factor=10, background=False)
+  for doc_id in range(12): # three segments, each holding part of "stock"
+    index.insert("stock", doc_id)
+  index.delete("stock", 5)
+  index.insert("stock", 5) # back in a newer segment than its delete
+  index.delete("stock", 2)
+  def fail(*args):
+    raise AssertionError("delete merged postings")
+  monkeypatch.setattr(segmented_index, "combine_postings", fail)
+
+  assert not index.delete("stock", 2) and not index.delete("stock", 40) and not index.delete("bond", 1)
+  assert index.delete("stock", 5) and index.delete("stock", 11)
+  monkeypatch.undo()
+  assert list(index.search("stock")) == [0, 1, 3, 4, 6, 7, 8, 9, 10]
+
+def test_update_document_replaces_positions():
+  index = SegmentedIndex(posting_type=PositionalPostingList, memtable_size=3, background=False)
+  doc_id = index.add_document("a.json", ["stock", "market", "stock"])
+  index.add_document("b.json", ["bank"])
+  index.flush()
+  assert index.update_document("a.json", ["bank", "stock"]) == doc_id
+  assert index.search("market") is None
+  assert index.search("stock").positions_of(doc_id) == [1]
+  assert index.search("bank").positions_of(doc_id) == [0]
+
+def test_snapshot_is_isolated():
+  index = SegmentedIndex(memtable_size=2, merge_factor=2, background=False)
+  index.insert("stock", 0)
+  index.insert("stock", 1)
+  index.insert("bank", 2)
+  snapshot = index.snapshot()
+  index.insert("stock", 3)
+  index.delete("stock", 0)
+  index.insert("bank", 4)
+  index.insert("bond", 5)
+  assert list(snapshot.search("stock")) == [0, 1]
+  assert list(snapshot.search("bank")) == [2]
+  assert snapshot.get_keys_in_order() == ["bank", "stock"]
+  assert list(index.search("stock")) == [1, 3]
+
+def test_background_merger_consistent_reads():
+  index = SegmentedIndex(memtable_size=50, merge_factor=3)
+  inserted = []
+  errors = []
+  done = threading.Event()
+
+  def reader():
+    while not done.is_set():
+      count = len(inserted)
+      postings = index.search("market")
+      if len(postings or []) < count:
+        errors.append((count, len(postings or [])))
+
+  thread = threading.Thread(target=reader)
+  thread.start()
+  for doc_id in range(3000):
+    index.insert("market", doc_id)
+    inserted.append(doc_id)
+  done.set()
+  thread.join()
+  index.wait_for_merges()
+  assert errors == []
+  assert index.merges > 0
+  assert list(index.search("market")) == list(range(3000))
+  index.close()
+
+def test_bulk_load_and_pickle():
+  index = SegmentedIndex(memtable_size=100)
+  index.insert("zinc", 9)
+  index.bulk_load([("bank", [1, 2]), ("stock", [2, 3])])
+  with pytest.raises(ValueError):
+    index.bulk_load([("b", [1]), ("a", [1])])
+  assert index.flushes == 1
+  assert list(index.search("bank")) == [1, 2]
+  assert [term for term, postings in index.prefix("s")] == ["stock"]
+  loaded = pickle.loads(pickle.dumps(index))
+  loaded.insert("stock", 4)
+  assert list(loaded.search("stock")) == [2, 3, 4]
+  assert list(index.search("stock")) == [2, 3]
+  loaded.close()
+  index.close()
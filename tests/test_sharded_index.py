@@ -0,0 +1,134 @@
+"""
+This module contains unit tests for the term-sharded ShardedIndex in indexer.shards.sharded_index.
+
+The following tests are included:
+- `test_matches_single_index`: Tests that a sharded build gives the same postings as one index, for several shard types.
+- `test_terms_are_partitioned`: Tests that every term lives on exactly the shard its hash picks.
+- `test_buffered_inserts_are_visible`: Tests that buffered inserts are sent before any read.
+- `test_search_all_and_range`: Tests AND queries and range scans merged across shards.
+- `test_range_streams_in_batches`: Tests that range scans fetch each shard's part in batches, so an early stop fetches little.
+- `test_queries_look_up_words_in_one_round`: Tests that boolean, phrase and BM25 queries send all their words to the shards at once.
+- `test_remove_document`: Tests removing a document from every shard it is on.
+- `test_shard_errors_are_raised`: Tests that an error in a worker is raised in the coordinator.
+- `test_pickle_keeps_shards`: Tests that pickling keeps the shard contents and restarts the workers.
+"""
+import pickle
+import pytest
+from indexer.shards.sharded_index import ShardedIndex, shard_of
+from indexer.maps.hash_map import HashMapIndex
+from indexer.arrays.array import SortedArrayIndex
+from indexer.trees.avl_tree import AVLTreeIndex
+from indexer.postings.frequency import FrequencyPostingList
+from indexer.postings.positional import PositionalPostingList
+from indexer.query.planner import boolean_search
+from indexer.query.ranking import BM25Ranker
+from indexer.query.fuzzy import fuzzy_terms, levenshtein
+
+ITEMS = [(f"term{i:03d}", [doc_id for doc_id in range(20) if doc_id % (i % 5 + 1) == 0]) for i in range(60)]
+
+@pytest.fixture
+def sharded():
+  index = ShardedIndex(num_shards=3, index_type=SortedArrayIndex)
+  index.bulk_load(ITEMS)
+  yield index
+  index.close()
+
+@pytest.mark.parametrize("index_type", [HashMapIndex, SortedArrayIndex, AVLTreeIndex])
+def test_matches_single_index(index_type):
+  single = index_type(posting_type=FrequencyPostingList)
+  single.bulk_load(ITEMS)
+  with ShardedIndex(num_shards=3, index_type=index_type, posting_type=FrequencyPostingList) as sharded:
+    sharded.bulk_load(ITEMS)
+    keys = [key for key, docs in ITEMS]
+    assert sharded.get_keys_in_order() == keys
+    assert [list(postings) for postings in sharded.search_many(keys)] == [list(single.search(key)) for key in keys]
+    assert isinstance(sharded.search("term007"), FrequencyPostingList)
+
+def test_terms_are_partitioned(sharded):
+  sizes = sharded.shard_sizes()
+  assert sum(sizes) == len(ITEMS) == sharded.count_keys()
+  assert sizes == [sum(1 for key, docs in ITEMS if shard_of(key, 3) == shard) for shard in range(3)]
+  assert all(size > 0 for size in sizes)
+
+def test_buffered_inserts_are_visible():
+  with ShardedIndex(num_shards=2, batch_size=1000) as index:
+    for doc_id in range(5):
+      index.insert("stock", doc_id)
+      index.insert("bank", doc_id * 2)
+    assert list(index.search("stock")) == [0, 1, 2, 3, 4]
+    assert index.search_many(["bank", "missing"])[0] == [0, 2, 4, 6, 8]
+    assert index.search("missing") is None
+
+def test_search_all_and_range(sharded):
+  assert sharded.search_all(["term001", "term002", "term001"]) == [0, 6, 12, 18]
+  assert sharded.search_all(["term001", "missing"]) == []
+  assert [key for key, docs in sharded.range("term010", "term014")] == ["term010", "term011", "term012", "term013"]
+  assert [key for key, docs in sharded.prefix("term05")] == [f"term05{i}" for i in range(10)]
+
+def count_rounds(index):
+  # wraps _broadcast to count the parallel rounds of requests sent to the shards
+  rounds = []
+  broadcast = index._broadcast
+  def counted(requests):
+    rounds.append(sorted(requests))
+    return broadcast(requests)
+  index._broadcast = counted
+  return rounds
+
+def test_range_streams_in_batches():
+  keys = [f"k{i:04d}" for i in range(1000)]
+  with ShardedIndex(num_shards=3, index_type=AVLTreeIndex) as index:
+    index.bulk_load((key, [i]) for i, key in enumerate(keys))
+    assert [key for key, postings in index.range()] == keys
+    assert list(index.range_keys("k0100", "k0900")) == keys[100:900]
+    assert [list(postings) for key, postings in index.range("k0500", "k0503")] == [[500], [501], [502]]
+
+    rounds = count_rounds(index)
+    scan = index.range_keys()
+    assert [next(scan) for _ in range(5)] == keys[:5]
+    assert len(rounds) == 1 # only the first small batch of every shard
+    for query in ["k0x42", "k0042", "zzz"]:
+      expected = [(key, levenshtein(query, key)) for key in keys if levenshtein(query, key) <= 1]
+      assert fuzzy_terms(index, query, 1) == sorted(expected, key=lambda match: (match[1], match[0]))
+
+def test_queries_look_up_words_in_one_round():
+  with ShardedIndex(num_shards=4, posting_type=PositionalPostingList) as index:
+    index.add_document("a.json", ["new", "york", "stock", "market", "bank"])
+    index.add_document("b.json", ["york", "new", "stock", "bank"])
+    index.add_document("c.json", ["stock", "market", "new", "york"])
+    index.shard_sizes() # sends the buffered inserts
+    rounds = count_rounds(index)
+
+    assert boolean_search(index, "stock AND market AND new AND york") == [0, 2]
+    assert boolean_search(index, '"new york" AND NOT bank') == [2]
+    assert boolean_search(index, "(bank OR market) AND stock NEAR/1 market") == [0, 2]
+    assert len(rounds) == 3 and all(len(shards) > 1 for shards in rounds)
+    assert [doc_id for doc_id, score in BM25Ranker(index).top_k(["market", "bank", "york"], 3)][0] == 0
+    assert len(rounds) == 4
+
+def test_remove_document():
+  with ShardedIndex(num_shards=4) as index:
+    index.add_document("a.json", ["stock", "market", "bank", "bond", "rally"])
+    doc_id = index.add_document("b.json", ["stock", "bank"])
+    assert index.remove_document("a.json") == 5
+    assert index.search("market") is None
+    assert list(index.search("stock")) == [doc_id]
+    assert index.documents.count() == 1
+    assert not index.delete("stock", 0)
+
+def test_shard_errors_are_raised():
+  with ShardedIndex(num_shards=2, index_type=HashMapIndex) as index:
+    index.insert("stock", 1)
+    with pytest.raises(NotImplementedError):
+      list(index.range("a", "z"))
+    assert list(index.search("stock")) == [1] # the pipes are still usable
+
+def test_pickle_keeps_shards(sharded):
+  loaded = pickle.loads(pickle.dumps(sharded))
+  try:
+    assert loaded.get_keys_in_order() == sharded.get_keys_in_order()
+    loaded.insert("term000", 99)
+    assert list(loaded.search("term000"))[-1] == 99
+    assert 99 not in list(sharded.search("term000"))
+  finally:
+    loaded.close()
@@ -0,0 +1,60 @@
+"""
+This module contains unit tests for the iterative (recursion-free) BST and AVL code.
+
+The following tests are included:
+- `test_sorted_inserts_past_recursion_limit`: Tests a degenerate BST far deeper than the recursion limit.
+- `test_avl_random_inserts`: Tests AVL search, order and balance against a dictionary.
+- `test_avl_heights_are_correct`: Tests every stored AVL height against the real subtree height.
+- `test_avl_duplicate_key_adds_once`: Tests that re-inserting a key adds the value once and keeps the shape.
+"""
+import random
+import sys
+import pytest
+from indexer.trees.bst_index import BinarySearchTreeIndex
+from indexer.trees.avl_tree import AVLTreeIndex
+
+def test_sorted_inserts_past_recursion_limit():
+  n = sys.getrecursionlimit() * 3
+  bst = BinarySearchTreeIndex()
+  for i in range(n):
+    bst.insert(i, i)
+
+  assert bst.tree_height() == n
+  assert bst.count_nodes() == n
+  assert bst.search(n - 1) == [n - 1]
+  assert bst.get_keys_in_order() == list(range(n))
+  assert bst.get_leaf_keys() == [n - 1]
+  assert [key for key, _ in bst.range(n - 3)] == [n - 3, n - 2, n - 1]
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_avl_random_inserts(seed):
+  rng = random.Random(seed)
+  avl = AVLTreeIndex()
+  expected = {}
+  for i in range(3000):
+    key = rng.randrange(1000)
+    avl.insert(key, i)
+    expected.setdefault(key, []).append(i)
+
+  assert avl.get_keys_in_order() == sorted(expected)
+  assert all(avl.search(key) == docs for key, docs in expected.items())
+  assert all(abs(factor) <= 1 for _, factor in avl.get_balance_factors(avl.root))
+  assert avl.tree_height() <= 1.45 * len(expected).bit_length()
+
+def test_avl_heights_are_correct():
+  avl = AVLTreeIndex()
+  for key in range(500): # sorted input forces a rotation after almost every insert
+    avl.insert(key, key)
+
+  for node in avl:
+    assert node.height == avl._tree_height(node)
+
+def test_avl_duplicate_key_adds_once():
+  avl = AVLTreeIndex()
+  for key in "abcdefg":
+    avl.insert(key, 1)
+  shape = [(node.key, node.height) for node in avl]
+  avl.insert("a", 2)
+
+  assert avl.search("a") == [1, 2]
+  assert [(node.key, node.height) for node in avl] == shape